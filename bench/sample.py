@@ -0,0 +1,70 @@
+"""Draw a random sample of Wikipedia titles for the benchmark corpus.
+
+Titles come from the MediaWiki list=random API through lib/fetch.py's
+rate-limited fetcher, so the corpus mixes titles the way the bot's live
+search sees them: mostly obscure pages, a few TMNT matches per thousand.
+Run from the repository root, then record a new baseline from the same
+machine and say why in the commit:
+
+    python -m bench.sample --size 5000    # rewrites bench/corpus/titles.txt
+"""
+import argparse
+import asyncio
+import sys
+
+from bench.run import CORPUS_PATH
+
+DEFAULT_SIZE = 5000
+# Gives up after this many titles per unique one wanted, in case the API
+# keeps repeating itself.
+MAX_DRAWS = 3
+
+
+async def sampleTitles(size: int, fetcher=None):
+    """Return size distinct random titles, in the order they arrived.
+
+    Args:
+        size: Integer, titles wanted.
+        fetcher: lib.fetch.RandomTitleFetcher, a default one if None.
+    Returns:
+        List of titles, shorter than size if too many repeated.
+    """
+    from lib import fetch
+
+    fetcher = fetcher or fetch.RandomTitleFetcher()
+    seen = {}
+    drawn = 0
+    titles = fetcher.titles()
+    try:
+        async for title in titles:
+            drawn += 1
+            seen.setdefault(title, None)
+            if len(seen) >= size or drawn >= size * MAX_DRAWS:
+                break
+    finally:
+        await titles.aclose()
+    return list(seen)
+
+
+def writeCorpus(titles, path=CORPUS_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        for title in titles:
+            f.write(title + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help=f"titles to sample (default: {DEFAULT_SIZE})")
+    parser.add_argument("--out", default=str(CORPUS_PATH),
+                        help="file to write (default: the benchmark corpus)")
+    args = parser.parse_args(argv)
+
+    titles = asyncio.run(sampleTitles(args.size))
+    writeCorpus(titles, args.out)
+    print(f"Wrote {len(titles)} random titles to {args.out}")
+    return 0 if len(titles) == args.size else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Startup import-time report for the bot's entry point.
+
+Runs `main.py --help`, or a bundle built by `main.py build-bundle`, under
+`python -X importtime` and breaks the time spent importing down by top-level
+package. --help imports everything main.py imports at module level and
+nothing else, which is what every cron run pays before doing any work. Run
+from the repository root:
+
+    python -m bench.startup                            # report for main.py
+    python -m bench.startup --target dist/tmnt.pyz     # report for a bundle
+    python -m bench.startup --budget-ratio 1           # exit 1 if over budget
+
+A run is over budget if any DEFERRED package is imported at startup at all,
+those are only meant to load when a command first uses them, or if importing
+main takes longer than:
+
+- --budget-ratio times as long as starting a bare `python -c pass`, measured
+  in the same run. This scales with the machine, so it holds on shared CI
+  runners too.
+- --budget-ms milliseconds, for comparing runs on one machine.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET_RATIO = 1.0
+DEFAULT_RUNS = 5
+# Heavy dependencies no command loads before it needs them.
+DEFERRED = ("numpy", "aiohttp", "wikipedia", "bs4", "requests", "PIL",
+            "num2words", "pronouncing", "requests_oauthlib", "asyncio")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parseImportTimes(stderr: str):
+    """Parse -X importtime output.
+
+    >>> parseImportTimes('import time: self [us] | cumulative | imported package\\n'
+    ...                  'import time:       120 |        150 |   lib.meter\\n')
+    [('lib.meter', 120, 150, 1)]
+
+    Returns:
+        List of (module, self µs, cumulative µs, nesting depth) tuples.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative),
+                            (len(indent) - 1) // 2))
+    return imports
+
+
+def measure(target=None, runs=DEFAULT_RUNS):
+    """Start the entry point runs times, keeping the fastest.
+
+    Args:
+        target: String or None, a .pyz bundle, main.py if None.
+    Returns:
+        Dict with wall_ms, the whole process; main_ms, importing main and
+        everything it imports; packages, {top-level package: self ms}; and
+        deferred, the DEFERRED packages that were imported.
+    """
+    command = [sys.executable, "-X", "importtime",
+               target or str(ROOT / "main.py"), "--help"]
+    best = None
+    # A fresh cache directory, so a bundle's one-off extraction happens
+    # in the first run and the rest measure a normal start.
+    with tempfile.TemporaryDirectory() as cache:
+        env = {**os.environ, "TMNT_BUNDLE_CACHE": cache}
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(command, cwd=ROOT, env=env, text=True,
+                                    capture_output=True, check=True)
+            wall = (time.perf_counter() - start) * 1000
+            report = _summarize(parseImportTimes(result.stderr), wall)
+            if best is None or report["main_ms"] < best["main_ms"]:
+                best = report
+    return best
+
+
+def measureBare(runs=DEFAULT_RUNS):
+    """Return the fastest of runs starts of `python -c pass`, in ms."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        wall = (time.perf_counter() - start) * 1000
+        best = wall if best is None else min(best, wall)
+    return best
+
+
+def _summarize(imports, wall_ms):
+    packages = defaultdict(float)
+    main_us = 0
+    seen = set()
+    for name, self_us, cumulative, depth in imports:
+        top = name.split(".")[0]
+        packages[top] += self_us / 1000
+        seen.add(top)
+        if name == "main":
+            main_us = cumulative
+        elif top in ("lib", "main") and depth == 0:
+            # Run as a script, main.py's own imports are at the top level.
+            main_us += cumulative
+    return {
+        "wall_ms": wall_ms,
+        "main_ms": main_us / 1000,
+        "packages": dict(packages),
+        "deferred": sorted(seen.intersection(DEFERRED)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--target", help="bundle to measure instead of main.py")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"starts to take the fastest of (default: {DEFAULT_RUNS})")
+    parser.add_argument("--budget-ratio", type=float, default=None,
+                        help="fail if importing main takes longer than this "
+                             "many bare interpreter starts (CI uses "
+                             f"{DEFAULT_BUDGET_RATIO:g})")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if importing main takes longer than this")
+    parser.add_argument("--top", type=int, default=15,
+                        help="packages to list (default: 15)")
+    args = parser.parse_args(argv)
+
+    report = measure(args.target, args.runs)
+    print(f"{args.target or 'main.py'}: {report['wall_ms']:.0f}ms to start, "
+          f"{report['main_ms']:.1f}ms importing main")
+    budgets = []
+    if args.budget_ms is not None:
+        budgets.append((args.budget_ms, f"budget {args.budget_ms:.0f}ms"))
+    if args.budget_ratio is not None:
+        bare = measureBare(args.runs)
+        print(f"python -c pass: {bare:.0f}ms to start")
+        budgets.append((bare * args.budget_ratio,
+                        f"budget {args.budget_ratio:g} x {bare:.0f}ms bare start"))
+    ranked = sorted(report["packages"].items(), key=lambda item: -item[1])
+    for package, ms in ranked[:args.top]:
+        print(f"  {ms:8.1f}ms  {package}")
+
+    failed = False
+    if report["deferred"]:
+        print(f"OVER BUDGET: imported at startup: {', '.join(report['deferred'])}",
+              file=sys.stderr)
+        failed = True
+    for budget, description in budgets:
+        if report["main_ms"] > budget:
+            print(f"OVER BUDGET: importing main took {report['main_ms']:.1f}ms, "
+                  f"{description}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Banned word and phrase filter.
+
+Ban lists live in plain text files (BANNED_WORDS_PATH, BANNED_PHRASES_PATH)
+and are compiled into one Aho-Corasick automaton, so a title is checked in a
+single pass however long the lists grow. The files are re-read whenever they
+change, so a long-running bot never needs a restart to pick up new bans.
+"""
+import os
+import re
+import threading
+import time
+
+from lib import tokens
+from lib.constants import (
+    BAN_RELOAD_INTERVAL,
+    BANNED_PHRASES_PATH,
+    BANNED_WORDS_PATH,
+)
+
+# Banned words are matched against whole words with non-letters stripped out,
+# phrases against the lowercased title, both as lib/tokens.py normalizes
+# them. Both are searched in one pass over
+# "<lowercased title>\x01\x00<word>\x00<word>\x00...". Words, wrapped in
+# \x00, can only match after the \x01. Phrases can match on either side, so
+# a one-word phrase also catches the word with punctuation stripped out, e.g.
+# "shooting" in "Shoot.ing".
+_NOT_LETTER_OR_EDGE = re.compile(r"[^a-z\x00]")
+_ASCII_NOT_LETTER = bytes(c for c in range(128)
+                          if not (chr(c).islower() or c == 0))
+# Raw ASCII titles skip tokenizing: one bytes.translate() turns the lowercased
+# title into its stripped words, separators mapped to \x00 and everything else
+# that isn't a letter deleted. Runs of separators leave empty words, which no
+# banned word matches.
+_ASCII_SEPARATORS = "".join(
+    chr(c) for c in range(128)
+    if chr(c).isspace() or tokens.TRANSLATION.get(c) in (" ", ord(" ")))
+_ASCII_WORDS_TABLE = bytes.maketrans(_ASCII_SEPARATORS.encode("ascii"),
+                                     b"\x00" * len(_ASCII_SEPARATORS))
+_ASCII_NOT_WORD = bytes(c for c in range(128)
+                        if not (chr(c).islower() or chr(c) in _ASCII_SEPARATORS))
+_WORDS_START = "\x01"
+_WORD_EDGE = "\x00"
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher.
+
+    >>> AhoCorasick(['he', 'she', 'hers']).search('ushers')
+    'she'
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        if self._out[node] is None:
+            self._out[node] = pattern
+
+    def _link(self):
+        """Breadth-first fill of failure links, inheriting outputs."""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def search(self, text: str):
+        """Return the first pattern found in text, or None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+
+class BanFilter:
+    """Ban lists loaded from files and compiled into one matcher."""
+
+    def __init__(self, words_path=BANNED_WORDS_PATH,
+                 phrases_path=BANNED_PHRASES_PATH,
+                 reload_interval=BAN_RELOAD_INTERVAL):
+        self.words_path = words_path
+        self.phrases_path = phrases_path
+        self.reload_interval = reload_interval
+        self._mtimes = None
+        self._next_check = 0
+        self.reload()
+
+    def reload(self, force: bool = False):
+        """Recompile the ban lists if either file changed since last load.
+
+        The new matcher is swapped in whole, so titles being checked on other
+        threads see either the old lists or the new ones.
+
+        Returns:
+            Bool, True if the lists were recompiled.
+        """
+        self._next_check = time.monotonic() + self.reload_interval
+        mtimes = (_mtime(self.words_path), _mtime(self.phrases_path))
+        if not force and mtimes == self._mtimes:
+            return False
+        self.words = loadBanList(self.words_path)
+        self.phrases = loadBanList(self.phrases_path)
+        patterns = list(self.phrases)
+        patterns += [_WORD_EDGE + word + _WORD_EDGE for word in self.words]
+        self._matcher = AhoCorasick(patterns)
+        self._mtimes = mtimes
+        return True
+
+    def match(self, title):
+        """Return the banned word or phrase found in title, or None.
+
+        Args:
+            title: String, or the Tokens of one from tokens.tokenize().
+        """
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        if isinstance(title, str):
+            if title.isascii() and "&" not in title:
+                lowered = title.lower()
+                title_words = lowered.encode("ascii").translate(
+                    _ASCII_WORDS_TABLE, _ASCII_NOT_WORD).decode("ascii")
+                found = self._matcher.search(
+                    lowered + _WORDS_START + _WORD_EDGE + title_words
+                    + _WORD_EDGE)
+                return found.strip(_WORD_EDGE) if found else None
+            title = tokens.tokenize(title)
+        title_words = _WORD_EDGE.join(title.words)
+        if title_words.isascii():
+            title_words = title_words.encode("ascii").translate(
+                None, _ASCII_NOT_LETTER).decode("ascii")
+        else:
+            title_words = _NOT_LETTER_OR_EDGE.sub("", title_words)
+        text = (title.lowered + _WORDS_START + _WORD_EDGE + title_words
+                + _WORD_EDGE)
+        found = self._matcher.search(text)
+        return found.strip(_WORD_EDGE) if found else None
+
+
+def loadBanList(path: str):
+    """Read a ban list file into a tuple of lowercased entries.
+
+    Blank lines and lines starting with # are skipped. Entries are stripped
+    of surrounding whitespace unless wrapped in double quotes.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            if len(entry) > 1 and entry[0] == entry[-1] == '"':
+                entry = entry[1:-1]
+            entries.append(entry.lower())
+    return tuple(entries)
+
+
+def getFilter():
+    """Return the process-wide BanFilter, loading it on first use."""
+    global _filter
+    if _filter is None:
+        with _filter_lock:
+            if _filter is None:
+                _filter = BanFilter()
+    return _filter
+
+
+def reloadBanLists(force: bool = False):
+    """Re-read the ban list files now rather than at the next interval."""
+    return getFilter().reload(force)
+
+
+def containsBanned(title):
+    return getFilter().match(title) is not None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,263 @@
+"""Classify many titles at once with numpy.
+
+words.isTMNT() looks every word of every title up and steps the meter one
+syllable at a time in Python. For a whole batch of titles this module instead:
+
+- tokenizes every title up front and gives each distinct word one id, so a
+  word is looked up once per classifier however many titles share it;
+- turns each word, all of its pronunciations included, into a row of the
+  meter states it can reach from every state, by running the uint8-encoded
+  stresses of all new words through the meter's transition table together;
+- steps every title one word position at a time, holding each title's
+  reachable states as a bitmask, so a position costs a handful of array
+  operations for the whole batch.
+
+Words are only looked up once some live title reaches them, so titles still
+stop costing lookups at their first impossible word. Ban lists are checked
+last, and only for titles that fit the meter, since those are rare.
+
+Results agree with isTMNT(). Reason codes agree with matchTitle() except
+that "length" versus "pattern" is judged from whole words: a title dying on
+a word that takes it past the meter's length is "length" even if the
+syllable it died on was inside it.
+"""
+import numpy as np
+
+from lib.constants import BATCH_CACHE_WORDS, MAX_PRONUNCIATIONS
+from lib import estimate
+from lib import metrics
+from lib import words
+
+# Reason codes in the array classifyBatch() returns, REASONS[code] is the
+# name matchTitle() and the metrics use.
+MATCHED = 0
+BANNED = 1
+OOV = 2
+LENGTH = 3
+PATTERN = 4
+REASONS = (None, "banned", "oov", "length", "pattern")
+
+# Stress symbol padding shorter pronunciations, maps every state to itself.
+_PAD = 3
+_ONE = np.uint64(1)
+
+_classifiers = {}
+
+
+class BatchClassifier:
+    """Vectorized matcher for one meter, remembering the words it has seen.
+
+    Args:
+        meter: Meter or MeterSet, of at most 64 states.
+        max_words: Integer, forget every word once this many are remembered.
+    """
+
+    def __init__(self, meter=words.TMNT, max_words=BATCH_CACHE_WORDS):
+        states = len(meter.transitions)
+        if states > 64:
+            raise ValueError(f"{states} meter states, bitmasks hold 64")
+        self.meter = meter
+        self.max_words = max_words
+        self._states = states
+        # Row `states` is the dead state, which every symbol keeps dead.
+        self._table = np.full((states + 1, _PAD + 1), states, dtype=np.int16)
+        for state, transitions in enumerate(meter.transitions):
+            for syllable, nxt in transitions.items():
+                self._table[state, int(syllable)] = nxt
+        self._table[:, _PAD] = np.arange(states + 1)
+        self._bits = np.left_shift(_ONE, np.arange(states, dtype=np.uint64))
+        self._accepting = np.uint64(sum(
+            1 << state for state in range(states) if meter.accepting[state]))
+        self._start = np.uint64(0 if meter.start < 0 else 1 << meter.start)
+        self._max = meter.max_syllables
+        self._min = meter.min_syllables or 0
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}
+        self._words = []
+        self._ready = np.zeros(0, dtype=bool)
+        self._reach = np.zeros((0, self._states), dtype=np.uint64)
+        self._syllables = np.zeros(0, dtype=np.int16)
+        self._oov = np.zeros(0, dtype=bool)
+
+    def classify(self, titles):
+        """Match every title against the meter.
+
+        Args:
+            titles: Sequence of raw title strings.
+        Returns:
+            Tuple of (bool array, True where the title fits and isn't banned;
+            uint8 array of reason codes, MATCHED where it fits).
+        """
+        count = len(titles)
+        matched = np.zeros(count, dtype=bool)
+        reasons = np.full(count, MATCHED, dtype=np.uint8)
+        if not count:
+            return matched, reasons
+        if len(self._ids) > self.max_words:
+            self._reset()
+
+        ids = self._tokenize(titles)
+        frontier = np.full(count, self._start, dtype=np.uint64)
+        syllables = np.zeros(count, dtype=np.int32)
+        alive = frontier != 0
+        reasons[~alive] = PATTERN
+
+        for position in range(ids.shape[1]):
+            word_ids = ids[:, position]
+            rows = np.flatnonzero(alive & (word_ids >= 0))
+            if not len(rows):
+                break
+            word_ids = word_ids[rows]
+            self._prepare(word_ids)
+
+            oov = self._oov[word_ids]
+            reasons[rows[oov]] = OOV
+            alive[rows[oov]] = False
+            rows, word_ids = rows[~oov], word_ids[~oov]
+
+            current = frontier[rows]
+            reach = self._reach[word_ids]
+            nxt = np.zeros(len(rows), dtype=np.uint64)
+            for state in range(self._states):
+                has_state = (current & self._bits[state]) != 0
+                nxt |= np.where(has_state, reach[:, state], np.uint64(0))
+            syllables[rows] += self._syllables[word_ids]
+            frontier[rows] = nxt
+
+            dead = rows[nxt == 0]
+            alive[dead] = False
+            reasons[dead] = self._deadReason(syllables[dead])
+
+        ended = np.flatnonzero(alive)
+        fits = (frontier[ended] & self._accepting) != 0
+        matched[ended[fits]] = True
+        rejected = ended[~fits]
+        too_short = syllables[rejected] < self._min
+        reasons[rejected] = np.where(too_short, LENGTH,
+                                     self._deadReason(syllables[rejected]))
+
+        for i in np.flatnonzero(matched):
+            if words.containsBanned(titles[i]):
+                matched[i] = False
+                reasons[i] = BANNED
+        return matched, reasons
+
+    def _deadReason(self, syllables):
+        if self._max is None:
+            return np.full(len(syllables), PATTERN, dtype=np.uint8)
+        return np.where(syllables > self._max, LENGTH, PATTERN).astype(np.uint8)
+
+    def _tokenize(self, titles):
+        """Return an int32 array of word ids, -1 past each title's end."""
+        ids = self._ids
+        tokenized = []
+        for title in titles:
+            title_ids = []
+            for word in words.tokenize(title).words:
+                word_id = ids.get(word)
+                if word_id is None:
+                    word_id = ids[word] = len(self._words)
+                    self._words.append(word)
+                title_ids.append(word_id)
+            tokenized.append(title_ids)
+
+        # Every word has a syllable, so a title longer than the meter is dead
+        # by then and later positions never need stepping.
+        width = max(map(len, tokenized))
+        if self._max is not None:
+            width = min(width, self._max + 1)
+        array = np.full((len(titles), width), -1, dtype=np.int32)
+        for i, title_ids in enumerate(tokenized):
+            title_ids = title_ids[:width]
+            array[i, :len(title_ids)] = title_ids
+        self._grow(len(self._words))
+        return array
+
+    def _grow(self, size):
+        have = len(self._ready)
+        if size <= have:
+            return
+        size = max(size, 2 * have)
+        extra = size - have
+        self._ready = np.concatenate([self._ready, np.zeros(extra, dtype=bool)])
+        self._reach = np.concatenate(
+            [self._reach, np.zeros((extra, self._states), dtype=np.uint64)])
+        self._syllables = np.concatenate(
+            [self._syllables, np.zeros(extra, dtype=np.int16)])
+        self._oov = np.concatenate([self._oov, np.zeros(extra, dtype=bool)])
+
+    def _prepare(self, word_ids):
+        """Look up and compile every word in word_ids not seen before."""
+        new = np.unique(word_ids[~self._ready[word_ids]])
+        if not len(new):
+            return
+        owners = []
+        variants = []
+        for word_id in new:
+            word = self._words[word_id]
+            stresses = words.wordStresses(word) or estimate.estimateStresses(word)
+            if not stresses:
+                self._oov[word_id] = True
+                continue
+            self._syllables[word_id] = len(stresses[0])
+            for variant in stresses[:MAX_PRONUNCIATIONS]:
+                owners.append(word_id)
+                variants.append(variant)
+        self._ready[new] = True
+        if not variants:
+            return
+
+        # Every pronunciation as a row of uint8 stresses, padded with _PAD.
+        symbols = np.full((len(variants), max(map(len, variants))), _PAD,
+                          dtype=np.uint8)
+        for i, variant in enumerate(variants):
+            symbols[i, :len(variant)] = np.frombuffer(
+                variant.encode("ascii"), dtype=np.uint8) - ord("0")
+
+        # ends[v, s] is where pronunciation v leads from state s.
+        ends = np.empty((len(variants), self._states), dtype=np.int16)
+        for state in range(self._states):
+            current = np.full(len(variants), state, dtype=np.int16)
+            for column in symbols.T:
+                current = self._table[current, column]
+            ends[:, state] = current
+        live = ends < self._states
+        bits = np.where(live, np.left_shift(_ONE, np.where(live, ends, 0)
+                                            .astype(np.uint64)), np.uint64(0))
+        np.bitwise_or.at(self._reach, np.array(owners), bits)
+
+
+def getClassifier(meter=words.TMNT):
+    """Return the process-wide BatchClassifier for meter."""
+    classifier = _classifiers.get(id(meter))
+    if classifier is None or classifier.meter is not meter:
+        classifier = _classifiers[id(meter)] = BatchClassifier(meter)
+    return classifier
+
+
+def classifyBatch(titles, meter=words.TMNT):
+    """Check a batch of titles against a meter, TMNT by default.
+
+    >>> matched, reasons = classifyBatch(
+    ...     ['Teenage Mutant Ninja Turtles', 'Teenage Mutant Rugby Player'])
+    >>> matched.tolist(), [REASONS[code] for code in reasons]
+    ([True, False], [None, 'banned'])
+
+    Args:
+        titles: Sequence of raw title strings.
+        meter: Meter or MeterSet, a title matches if it fits any of it.
+    Returns:
+        Tuple of (bool array of matches, uint8 array of reason codes, see
+        REASONS).
+    """
+    matched, reasons = getClassifier(meter).classify(titles)
+    counts = np.bincount(reasons, minlength=len(REASONS))
+    if counts[MATCHED]:
+        metrics.inc("titles_matched_total", int(counts[MATCHED]))
+    for code in range(1, len(REASONS)):
+        if counts[code]:
+            metrics.inc("titles_rejected_total", int(counts[code]),
+                        reason=REASONS[code])
+    return matched, reasons
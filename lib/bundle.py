@@ -0,0 +1,143 @@
+"""Build the bot into one zipapp with its bytecode and assets embedded.
+
+A cron run from a checkout compiles or stats every module it imports and
+needs the lexicon built next to the source. buildBundle() instead writes a
+single executable zip, run with `python3 tmnt.pyz post`, holding:
+
+- main.py and lib/ precompiled to unchecked-hash .pyc files, so nothing is
+  compiled or checked against a source file at startup;
+- assets/, the prebuilt lexicon, stress model, ban lists and fonts included.
+
+The lexicon is memory-mapped, which can't be done inside a zip, so the
+first run extracts assets/ to CACHE_DIR/<digest of the assets>/ and every
+run points TMNT_ASSETS there before lib.constants is imported. That is also
+why this module imports lib.constants lazily.
+
+Third-party packages come from the interpreter's site-packages as before.
+numpy, Pillow and aiohttp are C extensions and zipimport can't load those.
+The bytecode only runs on the Python version that built it.
+"""
+import hashlib
+import io
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Where bundles extract their assets. Not in lib/constants.py, which has to
+# be imported after extraction.
+CACHE_DIR = os.environ.get("TMNT_BUNDLE_CACHE") or os.path.join(
+    os.path.expanduser("~"), ".cache", "tmnt", "bundle")
+DIGEST_NAME = "assets.sha256"
+
+_MAIN = """\
+import sys
+
+if sys.version_info[:2] != {version!r}:
+    sys.exit("This bundle was built for Python {dotted}, "
+             "rebuild it with `main.py build-bundle`.")
+
+from lib import bundle
+
+bundle.run()
+"""
+
+
+def buildBundle(out: str, lexicon_path=None):
+    """Write the zipapp.
+
+    Args:
+        out: String, path of the .pyz to write.
+        lexicon_path: String or None, compiled lexicon to embed,
+                      LEXICON_PATH if None.
+    Returns:
+        Integer, size of the bundle in bytes.
+    Raises:
+        FileNotFoundError: the lexicon hasn't been built.
+    """
+    from lib.constants import ASSETS, LEXICON_PATH
+
+    lexicon_path = lexicon_path or LEXICON_PATH
+    if not os.path.exists(lexicon_path):
+        raise FileNotFoundError(
+            f"{lexicon_path} missing, run `main.py build-lexicon` first")
+
+    with tempfile.TemporaryDirectory() as staging:
+        staging = Path(staging)
+        sources = [ROOT / "main.py"] + sorted((ROOT / "lib").glob("*.py"))
+        for source in sources:
+            relative = source.relative_to(ROOT)
+            py_compile.compile(
+                str(source), cfile=str(staging / relative.with_suffix(".pyc")),
+                dfile=str(relative), doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        # zipimport needs a regular package to find lib/ inside the zip.
+        if not (ROOT / "lib" / "__init__.py").exists():
+            (staging / "lib" / "__init__.py").write_text("")
+
+        assets = staging / "assets"
+        shutil.copytree(ASSETS, assets, ignore=shutil.ignore_patterns(
+            "lexicon.bin", "*.tmp"))
+        shutil.copy(lexicon_path, assets / "lexicon.bin")
+        (staging / DIGEST_NAME).write_text(_digest(assets))
+
+        version = sys.version_info[:2]
+        (staging / "__main__.py").write_text(_MAIN.format(
+            version=version, dotted=".".join(map(str, version))))
+
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        zipapp.create_archive(staging, out, interpreter="/usr/bin/env python3",
+                              compressed=True)
+    return os.path.getsize(out)
+
+
+def extractAssets(archive: str, cache_dir=CACHE_DIR):
+    """Extract a bundle's assets unless an earlier run already did.
+
+    Returns:
+        String, the directory holding them.
+    """
+    with zipfile.ZipFile(archive) as bundle:
+        digest = bundle.read(DIGEST_NAME).decode("ascii").strip()
+        target = os.path.join(cache_dir, digest)
+        if os.path.isdir(target):
+            return target
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".extract-", dir=cache_dir)
+        for name in bundle.namelist():
+            if name.startswith("assets/") and not name.endswith("/"):
+                bundle.extract(name, staging)
+    try:
+        os.rename(os.path.join(staging, "assets"), target)
+    except OSError:
+        # Another run extracted the same assets first.
+        if not os.path.isdir(target):
+            raise
+    shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def run():
+    """Entry point of a bundle: extract assets, then run main.py's CLI."""
+    archive = __spec__.loader.archive
+    os.environ.setdefault("TMNT_ASSETS", extractAssets(archive))
+
+    import main
+
+    main.cli()
+
+
+def _digest(directory):
+    sha = hashlib.sha256()
+    for path in sorted(Path(directory).rglob("*")):
+        if path.is_file():
+            sha.update(str(path.relative_to(directory)).encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(io.DEFAULT_BUFFER_SIZE), b""):
+                    sha.update(block)
+    return sha.hexdigest()
@@ -0,0 +1,102 @@
+"""SQLite-backed queue of vetted TMNT titles waiting to be posted.
+
+Harvest mode fills the queue ahead of time so post mode only has to take the
+oldest unposted title, and never waits on a lucky streak of random pages.
+Each title is stored once, with when it was harvested and when it was posted,
+or when and why it was dropped as not worth posting.
+"""
+import sqlite3
+import time
+
+from lib.constants import QUEUE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    title TEXT PRIMARY KEY,
+    harvested_at REAL NOT NULL,
+    posted_at REAL,
+    dropped_at REAL,
+    drop_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS candidates_waiting ON candidates (harvested_at)
+    WHERE posted_at IS NULL AND dropped_at IS NULL;
+"""
+_WAITING = "posted_at IS NULL AND dropped_at IS NULL"
+
+
+class CandidateQueue:
+    """Queue of titles shared by harvest and post processes.
+
+    Args:
+        path: String, SQLite database file, created if missing.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        # Harvest and post run as separate processes, WAL lets one read
+        # while the other writes.
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, title: str, harvested_at=None):
+        """Queue a title unless it was ever queued before, posted and
+        dropped titles included.
+
+        Returns:
+            Bool, True if the title was new.
+        """
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO candidates (title, harvested_at) VALUES (?, ?)",
+            (title, harvested_at or time.time()))
+        return cursor.rowcount == 1
+
+    def nextCandidate(self):
+        """Return the oldest unposted title, or None if the queue is empty.
+
+        The title stays queued until markPosted(), so a failed post is
+        retried next time.
+        """
+        row = self._db.execute(
+            f"SELECT title FROM candidates WHERE {_WAITING} "
+            "ORDER BY harvested_at LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def pendingTitles(self, limit=None):
+        """Return waiting titles, oldest first, at most limit of them."""
+        rows = self._db.execute(
+            f"SELECT title FROM candidates WHERE {_WAITING} "
+            "ORDER BY harvested_at LIMIT ?", (-1 if limit is None else limit,))
+        return [row[0] for row in rows]
+
+    def markPosted(self, title: str, posted_at=None):
+        self._db.execute("UPDATE candidates SET posted_at = ? WHERE title = ?",
+                         (posted_at or time.time(), title))
+
+    def drop(self, title: str, reason=None, dropped_at=None):
+        """Take a title that shouldn't be posted, e.g. a disambiguation page,
+        out of the queue. Its row is kept, so it is never offered again
+        however often it is harvested."""
+        self._db.execute(
+            "UPDATE candidates SET dropped_at = ?, drop_reason = ? "
+            "WHERE title = ?", (dropped_at or time.time(), reason, title))
+
+    def pending(self):
+        """Return the number of titles harvested but not posted or dropped."""
+        return self._db.execute(
+            f"SELECT COUNT(*) FROM candidates WHERE {_WAITING}").fetchone()[0]
+
+    def get(self, title: str):
+        """Return (harvested_at, posted_at) for a title, or None."""
+        return self._db.execute(
+            "SELECT harvested_at, posted_at FROM candidates WHERE title = ?",
+            (title,)).fetchone()
@@ -1,25 +1,128 @@
+import os
 import re
 from pathlib import Path
 
 MAX_ATTEMPTS = 450
 MAX_STATUS_LEN = 280
 BACKOFF = 0.75
-TIMEOUT_BACKOFF = 240
+SCAN_CHUNK_SIZE = 2000
+
+# Async fetcher, see lib/fetch.py. Keep these polite:
+# https://www.mediawiki.org/wiki/API:Etiquette
+WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
+USER_AGENT = ("tmnt_wikipedia_bot/1.0 "
+              "(https://github.com/catleeball/tmnt_wikipedia_bot)")
+FETCH_CONCURRENCY = 4
+FETCH_RATE = 2.0  # requests per second
+FETCH_BURST = 4
+FETCH_BATCH = 10
+FETCH_TIMEOUT = 30
 
 HOME = str(Path.home())
+# A bundle built by lib/bundle.py points TMNT_ASSETS at its extracted assets.
+ASSETS = Path(os.environ.get("TMNT_ASSETS")
+              or Path(__file__).resolve().parent.parent / "assets")
 
 # Compiled web screenshot binary: https://github.com/catleeball/WebScreenShot
 WSS = "/usr/local/share/tmnt/wss"
 # This is a slightly modified version of what's what http://glench.com/tmnt
 URL = f"file:///{HOME}/src/tmnt_wikipedia_bot/assets/html/tmnt.html"
 SCREENSHOT_PATH = "/tmp/tmnt-logo.png"
+# Fonts for the in-process renderer, see lib/render.py. The banner font is the
+# first of these that loads, like the CSS font-family fallback list.
+TURTLES_FONT_PATH = str(ASSETS / "html" / "Turtles.ttf")
+BANNER_FONT_PATHS = (
+    "/System/Library/Fonts/Supplemental/Futura.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+)
 KEY_PATH = f"{HOME}/src/tmnt_wikipedia_bot/.keys"
-TMNT_STRESSES = re.compile(r"1[02]1[02]1[02]1[02]")
+# Harvested titles waiting to be posted, see lib/candidates.py.
+QUEUE_PATH = f"{HOME}/src/tmnt_wikipedia_bot/candidates.db"
+# Stress signature of every scanned title, see lib/signatures.py.
+INDEX_PATH = f"{HOME}/src/tmnt_wikipedia_bot/signatures.db"
+# Bloom filter of posted titles, see lib/history.py. About 9MB on disk.
+HISTORY_PATH = f"{HOME}/src/tmnt_wikipedia_bot/posted.bloom"
+HISTORY_CAPACITY = 5_000_000
+HISTORY_ERROR_RATE = 0.001
+# Publisher endpoints, see lib/publish.py. Mastodon's comes from lib/keys.py.
+TWITTER_API_URL = "https://api.twitter.com/1.1"
+TWITTER_UPLOAD_URL = "https://upload.twitter.com/1.1"
+PUBLISH_TIMEOUT = 60
+# Rendered logos, see lib/rendercache.py. Bump RENDER_VERSION whenever a
+# change to lib/render.py alters rendered output, so cached renders expire.
+RENDER_VERSION = 1
+RENDER_CACHE_DIR = f"{HOME}/.cache/tmnt/logos"
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+# Retrying failed title fetches, see lib/retry.py. Backoff after the nth
+# failure in a row is random up to min(RETRY_CAP, RETRY_BASE * 2**(n-1)); a run
+# gives up after RETRY_ATTEMPTS failures in a row or RETRY_BUDGET seconds lost
+# to failures in all.
+RETRY_BASE = 2.0
+RETRY_CAP = 120.0
+RETRY_ATTEMPTS = 20
+RETRY_BUDGET = 30 * 60
+# The circuit breaker opens after BREAKER_FAILURES failures in a row, and lets
+# a trial request through after BREAKER_RESET seconds, doubling while trial
+# requests keep failing, up to BREAKER_MAX_RESET.
+BREAKER_FAILURES = 5
+BREAKER_RESET = 60.0
+BREAKER_MAX_RESET = 600.0
+# Page lookups for queued titles before posting, see lib/enrich.py. Pages
+# shorter than ENRICH_MIN_LENGTH bytes count as stubs, and each post ranks up
+# to ENRICH_POOL of the oldest queued titles.
+ENRICH_CACHE_PATH = f"{HOME}/src/tmnt_wikipedia_bot/pages.db"
+ENRICH_BATCH = 50
+ENRICH_TTL = 24 * 60 * 60
+ENRICH_MIN_LENGTH = 1500
+ENRICH_PAGEVIEW_DAYS = 30
+ENRICH_POOL = 50
+# Harvest mode stops once this many titles are waiting.
+HARVEST_TARGET = 48
+# Daemon mode posts every POST_INTERVAL seconds, give or take POST_JITTER.
+POST_INTERVAL = 4 * 60 * 60
+POST_JITTER = 20 * 60
+# After n failed harvests in a row the daemon waits BACKOFF * 2**n seconds, up
+# to this many, before harvesting again.
+HARVEST_MAX_BACKOFF = 10 * 60
+# Stage timings and rejection counters, see lib/metrics.py. A path ending in
+# .prom is written as a Prometheus textfile, anything else gets JSON lines.
+METRICS_PATH = f"{HOME}/log/tmnt-metrics.jsonl"
+# Zipapp built by `main.py build-bundle`, see lib/bundle.py.
+BUNDLE_PATH = "dist/tmnt.pyz"
+# Built by `main.py build-lexicon`, see lib/lexicon.py.
+LEXICON_PATH = str(ASSETS / "lexicon.bin")
+# Guesses stresses for words missing from the lexicon, built by
+# `main.py build-estimator`, see lib/estimate.py. A guess is only used when at
+# least ESTIMATE_CONFIDENCE of the training words it comes from agree.
+ESTIMATOR_PATH = str(ASSETS / "stress_model.tsv.gz")
+ESTIMATE_CONFIDENCE = 0.8
+ESTIMATE_MAX_SUFFIX = 5
+ESTIMATE_MIN_SUPPORT = 3
+ESTIMATE_CACHE_SIZE = 8192
+# Meter syntax is described in lib/meter.py.
+TMNT_METER = r"1[02]1[02]1[02]1[02]"
+TMNT_STRESSES = re.compile(TMNT_METER)
+# Most CMUdict pronunciations of one word tried when matching a meter.
+MAX_PRONUNCIATIONS = 4
+# Distinct words a batch classifier remembers before starting over, see
+# lib/batch.py.
+BATCH_CACHE_WORDS = 200_000
+# Numerals outside the table compiled into the lexicon that are remembered.
+NUMERAL_CACHE_SIZE = 4096
+# Meters classify() checks every title against, by name.
+METERS = {
+    "tmnt": TMNT_METER,
+    "iambic_pentameter": r"([02]1){5}[02]?",
+    "limerick": r"0?[02]1[02][02]1[02][02]1[02]{0,2}",
+    "haiku": r"[012]{17}",
+}
 CHARS_ONLY = re.compile("[^a-zA-Z]")
 
-BANNED_WORDS = ("rape", "nazi", "victim", "shootings", "bombing", "bombings")
-BANNED_PHRASES = ("shooting", "railway station", "rugby union",
-                  "historic district", "murder of", "killing of",
-                  "rugby player", ", baron ")  # parens are back, baby  r"("
+# Ban list files, see lib/banned.py. Parens are back, baby.
+BANNED_WORDS_PATH = str(ASSETS / "banned" / "words.txt")
+BANNED_PHRASES_PATH = str(ASSETS / "banned" / "phrases.txt")
+# Seconds between checks for edited ban lists.
+BAN_RELOAD_INTERVAL = 60
 PRONUNCIATION_OVERRIDES = (("HD", "10"), ("U.S.", "10"), ("Laos", "1"), ("vs.",
                                                                          "10"))
@@ -0,0 +1,142 @@
+"""Long-running bot process with an internal post scheduler.
+
+Running from cron pays for interpreter start-up, imports and lexicon loading
+on every post. The daemon loads all of that once, then loops: post when the
+next (jittered) post time comes round, and harvest into the candidate queue
+while waiting for it. SIGTERM and SIGINT finish the current step and exit,
+SIGHUP re-reads the ban lists.
+"""
+import random
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from lib.constants import (
+    BACKOFF,
+    HARVEST_MAX_BACKOFF,
+    POST_INTERVAL,
+    POST_JITTER,
+)
+from lib import banned
+from lib import history
+from lib import lexicon
+from lib import publish
+
+# _step() returns this when the step raised or exited.
+_FAILED = object()
+
+
+class Daemon:
+    """Post on an interval and harvest in between until stopped.
+
+    Args:
+        post: Function, posts one title. If it raises, even SystemExit, the
+              error is logged and the next post is tried at the next post
+              time. If it returns False there was nothing to post, and it is
+              tried again after the next harvest batch.
+        harvest: Function, fetches and queues one batch of titles, returning
+                 False once the queue is full. If it raises, the wait before
+                 the next batch doubles with each failure in a row.
+        interval: Float, average seconds between posts.
+        jitter: Float, each post time is moved by up to this many seconds
+                either way, so posts don't land on the same minute every day.
+        backoff: Float, seconds to wait between harvest batches.
+        post_now: Bool, post as soon as the daemon starts.
+        max_backoff: Float, most seconds to wait after failed harvests.
+    """
+
+    def __init__(self, post, harvest, interval=POST_INTERVAL, jitter=POST_JITTER,
+                 backoff=BACKOFF, post_now=False,
+                 max_backoff=HARVEST_MAX_BACKOFF):
+        self.post = post
+        self.harvest = harvest
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff = backoff
+        self.post_now = post_now
+        self.max_backoff = max_backoff
+        self.failed_harvests = 0
+        # Titles posted, not counting posts that failed.
+        self.posts = 0
+        self._stop = threading.Event()
+
+    def nextPostTime(self, now: float):
+        delay = self.interval + random.uniform(-self.jitter, self.jitter)
+        return now + max(0.0, delay)
+
+    def harvestBackoff(self):
+        """Seconds to wait before the next harvest batch."""
+        return min(self.max_backoff, self.backoff * 2 ** self.failed_harvests)
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    def warmUp(self):
+        """Load everything a post needs, so the first one isn't slower."""
+        lexicon.getLexicon()
+        banned.getFilter()
+        history.getHistory()
+        publish.getPublishers()
+
+    def installSignalHandlers(self):
+        signal.signal(signal.SIGTERM, self._onStop)
+        signal.signal(signal.SIGINT, self._onStop)
+        signal.signal(signal.SIGHUP, self._onReload)
+
+    def run(self):
+        """Loop until stop() or a stop signal."""
+        now = time.monotonic()
+        next_post = now if self.post_now else self.nextPostTime(now)
+        while not self.stopping:
+            now = time.monotonic()
+            if now >= next_post:
+                posted = self._step(self.post)
+                if posted is False:
+                    # Nothing queued yet, try again after a harvest batch.
+                    next_post = time.monotonic() + self.harvestBackoff()
+                    continue
+                if posted is not _FAILED:
+                    self.posts += 1
+                next_post = self.nextPostTime(time.monotonic())
+                print(f"[{datetime.now()}] Next post in "
+                      f"{next_post - time.monotonic():.0f}s")
+                continue
+
+            harvested = self._step(self.harvest)
+            if harvested is False:
+                # Queue is full, nothing to do until the next post.
+                self._stop.wait(next_post - now)
+                continue
+            if harvested is _FAILED:
+                self.failed_harvests += 1
+            else:
+                self.failed_harvests = 0
+            self._stop.wait(min(self.harvestBackoff(), next_post - now))
+        print(f"[{datetime.now()}] Daemon stopped after {self.posts} posts.")
+
+    def _step(self, fn):
+        try:
+            return fn()
+        except SystemExit as e:
+            # The one-shot code paths exit on failure; here that only means
+            # this step failed.
+            print(f"[{datetime.now()}] {fn.__name__} failed (exit {e.code}), "
+                  "continuing.")
+        except Exception:
+            print(f"[{datetime.now()}] {fn.__name__} failed, continuing.")
+            traceback.print_exc()
+        return _FAILED
+
+    def _onStop(self, signum, frame):
+        print(f"[{datetime.now()}] Got {signal.Signals(signum).name}, stopping.")
+        self.stop()
+
+    def _onReload(self, signum, frame):
+        print(f"[{datetime.now()}] Got SIGHUP, reloading ban lists.")
+        banned.reloadBanLists(force=True)
@@ -0,0 +1,284 @@
+"""Look up the pages behind queued titles and rank them before posting.
+
+A title passing isTMNT() says nothing about its page, so disambiguation
+pages, redirects and near-empty stubs used to get posted too. Before posting,
+the pending candidates are looked up in one MediaWiki query per ENRICH_BATCH
+titles, the most one prop= query takes:
+
+    action=query&prop=info|pageprops|pageviews&redirects&titles=A|B|...
+
+giving each page's length, whether it is a disambiguation page, where it
+redirects and its recent pageviews. Results are kept in a SQLite cache for
+ENRICH_TTL seconds, so the same pending titles aren't looked up on every
+post. rankCandidates() drops the pages not worth posting and orders the rest
+by pageviews, then length.
+"""
+import json
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+
+from lib.constants import (
+    ENRICH_BATCH,
+    ENRICH_CACHE_PATH,
+    ENRICH_MIN_LENGTH,
+    ENRICH_PAGEVIEW_DAYS,
+    ENRICH_TTL,
+    FETCH_TIMEOUT,
+    USER_AGENT,
+    WIKI_API_URL,
+)
+from lib import metrics
+
+# Continuations followed for one batch, pageviews arrive in several parts.
+_MAX_CONTINUES = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    title TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class PageInfo:
+    """What MediaWiki says about the page behind a title.
+
+    Attributes:
+        title: String, the title as queued.
+        missing: Bool, no such page.
+        disambiguation: Bool, the page is a disambiguation page.
+        redirect: String or None, the title this one redirects to.
+        length: Integer, page size in bytes.
+        pageviews: Integer, views over the last ENRICH_PAGEVIEW_DAYS days.
+    """
+
+    title: str
+    missing: bool = False
+    disambiguation: bool = False
+    redirect: str = None
+    length: int = 0
+    pageviews: int = 0
+
+
+class PageInfoCache:
+    """PageInfo by title in one SQLite file, each kept for ttl seconds.
+
+    Args:
+        path: String, SQLite database file, created if missing.
+        ttl: Float, seconds a lookup stays fresh.
+        clock: Function returning the time in seconds.
+    """
+
+    def __init__(self, path=ENRICH_CACHE_PATH, ttl=ENRICH_TTL, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, titles):
+        """Return {title: PageInfo} for the titles with a fresh lookup."""
+        oldest = self.clock() - self.ttl
+        found = {}
+        for title in titles:
+            row = self._db.execute(
+                "SELECT info FROM pages WHERE title = ? AND fetched_at > ?",
+                (title, oldest)).fetchone()
+            if row is not None:
+                found[title] = PageInfo(**json.loads(row[0]))
+        return found
+
+    def put(self, infos):
+        """Store PageInfos, replacing older lookups of the same titles."""
+        now = self.clock()
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                [(info.title, json.dumps(asdict(info)), now) for info in infos])
+            self._db.execute("DELETE FROM pages WHERE fetched_at <= ?",
+                             (now - self.ttl,))
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+
+class PageInfoClient:
+    """Batched page property lookups against a MediaWiki API.
+
+    Args:
+        api_url: String, the api.php endpoint.
+        batch: Integer, titles per query, at most 50 for MediaWiki.
+        days: Integer, days of pageviews to sum, at most 60.
+        timeout: Float, seconds to wait for a response.
+    """
+
+    def __init__(self, api_url=WIKI_API_URL, batch=ENRICH_BATCH,
+                 days=ENRICH_PAGEVIEW_DAYS, timeout=FETCH_TIMEOUT):
+        self.api_url = api_url
+        self.batch = batch
+        self.days = days
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers["User-Agent"] = USER_AGENT
+        return self._session
+
+    def fetch(self, titles):
+        """Look titles up, batch titles per request.
+
+        Returns:
+            Dict of title to PageInfo, one for every title.
+        Raises:
+            requests.RequestException: the API couldn't be reached.
+            RuntimeError: the API returned an error.
+        """
+        titles = list(dict.fromkeys(titles))
+        infos = {}
+        for start in range(0, len(titles), self.batch):
+            chunk = titles[start:start + self.batch]
+            with metrics.timed("enrich"):
+                infos.update(self._fetchBatch(chunk))
+        return infos
+
+    def _fetchBatch(self, titles):
+        params = {
+            "action": "query",
+            "prop": "info|pageprops|pageviews",
+            "ppprop": "disambiguation",
+            "pvipdays": str(self.days),
+            "redirects": "1",
+            "titles": "|".join(titles),
+            "format": "json",
+            "formatversion": "2",
+            "maxlag": "5",
+        }
+        aliases = {}
+        redirects = {}
+        pages = {}
+        for _ in range(_MAX_CONTINUES):
+            resp = self.session.post(self.api_url, data=params,
+                                     timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            if "error" in data:
+                raise RuntimeError(f"MediaWiki error: {data['error']}")
+            query = data.get("query", {})
+            aliases.update((n["from"], n["to"]) for n in query.get("normalized", ()))
+            redirects.update((r["from"], r["to"]) for r in query.get("redirects", ()))
+            for page in query.get("pages", ()):
+                _mergePage(pages.setdefault(page["title"], {}), page)
+            if "continue" not in data:
+                break
+            params = {**params, **data["continue"]}
+
+        infos = {}
+        for title in titles:
+            name = aliases.get(title, title)
+            redirect = redirects.get(name)
+            page = pages.get(redirect or name, {"missing": True})
+            views = page.get("pageviews") or {}
+            infos[title] = PageInfo(
+                title=title,
+                missing=bool(page.get("missing") or page.get("invalid")),
+                disambiguation="disambiguation" in page.get("pageprops", {}),
+                redirect=redirect,
+                length=page.get("length", 0),
+                pageviews=sum(count for count in views.values() if count))
+        return infos
+
+
+class Enricher:
+    """Cached, batched PageInfo lookups.
+
+    Args:
+        client: PageInfoClient, a default one if None.
+        cache: PageInfoCache or None, lookups are never cached if None.
+    """
+
+    def __init__(self, client=None, cache=None):
+        self.client = client or PageInfoClient()
+        self.cache = cache
+
+    def enrich(self, titles):
+        """Return {title: PageInfo}, only looking up titles not cached."""
+        infos = self.cache.get(titles) if self.cache is not None else {}
+        if infos:
+            metrics.inc("enrich_cache_total", len(infos), result="hit")
+        missing = [title for title in titles if title not in infos]
+        if missing:
+            metrics.inc("enrich_cache_total", len(missing), result="miss")
+            fetched = self.client.fetch(missing)
+            if self.cache is not None:
+                self.cache.put(fetched.values())
+            infos.update(fetched)
+        return infos
+
+
+def rejectReason(info, min_length=ENRICH_MIN_LENGTH):
+    """Return why a page isn't worth posting, or None if it is.
+
+    >>> rejectReason(PageInfo('Turtle', length=120))
+    'stub'
+    """
+    if info.missing:
+        return "missing"
+    if info.disambiguation:
+        return "disambiguation"
+    if info.redirect is not None:
+        return "redirect"
+    if info.length < min_length:
+        return "stub"
+    return None
+
+
+def rankCandidates(titles, infos, min_length=ENRICH_MIN_LENGTH):
+    """Order titles by how worth posting their pages are.
+
+    Args:
+        titles: List of titles, in queue order.
+        infos: Dict of title to PageInfo, see Enricher.enrich().
+        min_length: Integer, pages shorter than this are stubs.
+    Returns:
+        Tuple of (titles worth posting, most viewed then longest first, ties
+        left in queue order; dict of the other titles to rejectReason()).
+    """
+    ranked = []
+    rejected = {}
+    for title in titles:
+        reason = rejectReason(infos[title], min_length)
+        if reason is None:
+            ranked.append(title)
+        else:
+            rejected[title] = reason
+            metrics.inc("enrich_rejected_total", reason=reason)
+    ranked.sort(key=lambda title: (infos[title].pageviews, infos[title].length),
+                reverse=True)
+    return ranked, rejected
+
+
+def _mergePage(merged, page):
+    # Continued responses repeat a page with more of its pageviews.
+    views = {**merged.get("pageviews", {}), **(page.get("pageviews") or {})}
+    merged.update(page)
+    merged["pageviews"] = views
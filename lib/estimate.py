@@ -0,0 +1,231 @@
+"""Guess the stresses of words missing from the lexicon.
+
+Proper nouns, foreign names and new words are common in Wikipedia titles, and
+without a guess one unknown word throws the whole title away. Words with the
+same ending and the same number of vowel groups tend to share a stress
+pattern (-ation, -ology, -ski), so the estimator is a table from (vowel
+groups, word suffix) to the most common stress string of CMUdict words ending
+that way, together with the share of those words that have it.
+
+A word is estimated from the longest of its suffixes, up to max_suffix
+letters, that the table has. The guess is used only if that share is at
+least the confidence threshold. buildEstimator() trains the table from
+CMUdict and writes it as a small gzipped text file:
+
+    TMNTEST1 <TAB> max_suffix
+    vowel groups <TAB> suffix <TAB> stresses <TAB> confidence
+
+Rows that predict the same thing as their one-letter-shorter suffix are left
+out, since backing off to that suffix gives the same answer.
+"""
+import gzip
+import io
+import os
+import random
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from lib.constants import (
+    ESTIMATE_CACHE_SIZE,
+    ESTIMATE_CONFIDENCE,
+    ESTIMATE_MAX_SUFFIX,
+    ESTIMATE_MIN_SUPPORT,
+    ESTIMATOR_PATH,
+)
+
+MAGIC = "TMNTEST1"
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+_estimator = None
+
+
+class StressEstimator:
+    """Suffix table mapping unknown words to a likely stress string.
+
+    Args:
+        table: Dict of (vowel groups, suffix) to (stresses, confidence).
+        max_suffix: Integer, longest suffix in the table.
+        threshold: Float, least confidence a guess is used at.
+    """
+
+    def __init__(self, table: dict, max_suffix=ESTIMATE_MAX_SUFFIX,
+                 threshold=ESTIMATE_CONFIDENCE):
+        self.table = table
+        self.max_suffix = max_suffix
+        self.threshold = threshold
+
+    def __len__(self):
+        return len(self.table)
+
+    @classmethod
+    def load(cls, path=ESTIMATOR_PATH, threshold=ESTIMATE_CONFIDENCE):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            magic, max_suffix = f.readline().rstrip("\n").split("\t")
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a stress estimator")
+            table = {}
+            for line in f:
+                groups, suffix, stresses, confidence = line.rstrip("\n").split("\t")
+                table[int(groups), suffix] = (stresses, float(confidence))
+        return cls(table, int(max_suffix), threshold)
+
+    def save(self, path=ESTIMATOR_PATH):
+        tmp_path = path + ".tmp"
+        # No name or mtime in the gzip header, so rebuilding from the same
+        # CMUdict gives identical bytes.
+        with open(tmp_path, "wb") as out, \
+                gzip.GzipFile("", "wb", fileobj=out, mtime=0) as raw, \
+                io.TextIOWrapper(raw, encoding="utf-8") as f:
+            f.write(f"{MAGIC}\t{self.max_suffix}\n")
+            for (groups, suffix), (stresses, confidence) in sorted(self.table.items()):
+                f.write(f"{groups}\t{suffix}\t{stresses}\t{confidence:.3f}\n")
+        os.replace(tmp_path, path)
+
+    def guess(self, word: str):
+        """Return (stresses, confidence) for word, or None if it can't guess.
+
+        The threshold isn't applied, see stresses().
+        """
+        word = _normalize(word)
+        if word is None:
+            return None
+        groups = vowelGroups(word)
+        for length in range(min(self.max_suffix, len(word)), 0, -1):
+            entry = self.table.get((groups, word[-length:]))
+            if entry is not None:
+                return entry
+        return None
+
+    def stresses(self, word: str):
+        """Return a one-element tuple of the guessed stresses, like a lexicon
+        lookup, or None if there's no guess at the confidence threshold."""
+        entry = self.guess(word)
+        if entry is None or entry[1] < self.threshold:
+            return None
+        return (entry[0],)
+
+
+def vowelGroups(word: str):
+    """Count runs of vowels, less a silent final e, as a syllable estimate.
+
+    >>> vowelGroups('turtle'), vowelGroups('plate'), vowelGroups('zxq')
+    (2, 1, 0)
+    """
+    groups = len(_VOWEL_GROUPS.findall(word))
+    if groups > 1 and word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+        groups -= 1
+    return groups
+
+
+def trainEstimator(pronunciations, max_suffix=ESTIMATE_MAX_SUFFIX,
+                   min_support=ESTIMATE_MIN_SUPPORT):
+    """Build a StressEstimator from (word, stresses) pairs.
+
+    Args:
+        pronunciations: Iterable of (word, stress string), the first seen
+                        for a word is the one learned.
+        max_suffix: Integer, longest suffix to learn.
+        min_support: Integer, least words a suffix needs to be learned.
+    Returns:
+        StressEstimator.
+    """
+    counts = defaultdict(Counter)
+    seen = set()
+    for word, stresses in pronunciations:
+        word = _normalize(word)
+        if word is None or word in seen:
+            continue
+        seen.add(word)
+        groups = vowelGroups(word)
+        for length in range(1, min(max_suffix, len(word)) + 1):
+            counts[groups, word[-length:]][stresses] += 1
+
+    best = {}
+    for key, counter in counts.items():
+        total = sum(counter.values())
+        if total >= min_support:
+            stresses, count = counter.most_common(1)[0]
+            best[key] = (stresses, round(count / total, 3))
+
+    table = {}
+    for (groups, suffix), entry in best.items():
+        parent = best.get((groups, suffix[1:])) if len(suffix) > 1 else None
+        if (parent is None or parent[0] != entry[0]
+                or abs(parent[1] - entry[1]) >= 0.1):
+            table[groups, suffix] = entry
+    return StressEstimator(table, max_suffix)
+
+
+def evaluate(estimator, pronunciations):
+    """Return (coverage, precision) of estimator on (word, stresses) pairs.
+
+    Coverage is the share of words guessed at the threshold, precision the
+    share of those guesses that are right.
+    """
+    guessed = correct = total = 0
+    for word, stresses in pronunciations:
+        total += 1
+        guess = estimator.stresses(word)
+        if guess is not None:
+            guessed += 1
+            correct += guess[0] == stresses
+    return guessed / max(total, 1), correct / max(guessed, 1)
+
+
+def buildEstimator(path=ESTIMATOR_PATH, holdout=0.05, seed=0):
+    """Train on CMUdict, report held-out accuracy, and write the model.
+
+    The reported numbers come from a model trained without a random holdout
+    share of words; the model written is then trained on every word.
+
+    Args:
+        path: String, where to write the model.
+        holdout: Float, share of words held out for the report.
+        seed: Integer, seed for picking the held-out words.
+    Returns:
+        Tuple of (table rows written, held-out coverage, held-out precision).
+    """
+    import pronouncing
+
+    pronouncing.init_cmu()
+    first = {}
+    for word, phones in pronouncing.pronunciations:
+        if word not in first and _normalize(word):
+            first[word] = pronouncing.stresses(phones)
+    pairs = sorted(first.items())
+    random.Random(seed).shuffle(pairs)
+    split = int(len(pairs) * holdout)
+    coverage, precision = evaluate(trainEstimator(pairs[split:]), pairs[:split])
+
+    estimator = trainEstimator(pairs)
+    estimator.save(path)
+    return len(estimator), coverage, precision
+
+
+def getEstimator():
+    """Return the process-wide estimator, or None if no model was built."""
+    global _estimator
+    if _estimator is None and os.path.exists(ESTIMATOR_PATH):
+        _estimator = StressEstimator.load(ESTIMATOR_PATH)
+    return _estimator
+
+
+@lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def estimateStresses(word: str):
+    """Guess stresses for a word the lexicon doesn't have.
+
+    Returns:
+        Tuple with the guessed stress string, or None if there's no model or
+        no guess confident enough.
+    """
+    estimator = getEstimator()
+    if estimator is None:
+        return None
+    return estimator.stresses(word)
+
+
+def _normalize(word):
+    word = word.lower().replace("'", "")
+    if not word.isalpha() or not word.isascii() or not vowelGroups(word):
+        return None
+    return word
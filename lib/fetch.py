@@ -0,0 +1,189 @@
+"""Asynchronous random-title fetcher for the MediaWiki API.
+
+Several list=random requests are kept in flight over one pooled aiohttp
+session. A token bucket caps the request rate so the bot stays within
+Wikipedia's API etiquette (identify with a User-Agent, keep requests modest,
+honour maxlag), and titles are handed to the classifier as each batch lands
+instead of one blocking batch at a time.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from lib.constants import (
+    FETCH_BATCH,
+    FETCH_BURST,
+    FETCH_CONCURRENCY,
+    FETCH_RATE,
+    FETCH_TIMEOUT,
+    USER_AGENT,
+    WIKI_API_URL,
+)
+from lib import metrics
+from lib import words
+
+
+class TokenBucket:
+    """Allow rate events per second on average, in bursts up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a token is available, then take it."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class FetchStats:
+    """Counters for one search, for titles-per-second and time-to-match."""
+
+    requests: int = 0
+    errors: int = 0
+    titles: int = 0
+    started: float = field(default_factory=time.monotonic)
+    first_match: float = None
+
+    def titlesPerSecond(self):
+        elapsed = time.monotonic() - self.started
+        return self.titles / elapsed if elapsed > 0 else 0.0
+
+    def timeToFirstMatch(self):
+        if self.first_match is None:
+            return None
+        return self.first_match - self.started
+
+
+class RandomTitleFetcher:
+    """Stream random main-namespace titles from a MediaWiki API.
+
+    Args:
+        api_url: String, the api.php endpoint.
+        concurrency: Integer, requests kept in flight, and the size of the
+                     HTTP connection pool.
+        rate: Float, average requests per second allowed.
+        burst: Float, requests allowed back to back before rate applies.
+        batch: Integer, titles asked for per request.
+    """
+
+    def __init__(self, api_url=WIKI_API_URL, concurrency=FETCH_CONCURRENCY,
+                 rate=FETCH_RATE, burst=FETCH_BURST, batch=FETCH_BATCH):
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.params = {
+            "action": "query",
+            "list": "random",
+            "rnnamespace": "0",
+            "rnlimit": str(batch),
+            "format": "json",
+            "maxlag": "5",
+        }
+        self.stats = FetchStats()
+
+    async def titles(self):
+        """Yield titles as they arrive, until the caller stops iterating."""
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
+        headers = {"User-Agent": USER_AGENT}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=headers) as session:
+            workers = [asyncio.create_task(self._worker(session, queue))
+                       for _ in range(self.concurrency)]
+            try:
+                while True:
+                    item = await queue.get()
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, session, queue):
+        try:
+            while True:
+                await self.bucket.acquire()
+                for title in await self._fetchBatch(session):
+                    await queue.put(title)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    async def _fetchBatch(self, session):
+        with metrics.timed("fetch"):
+            return await self._request(session)
+
+    async def _request(self, session):
+        self.stats.requests += 1
+        try:
+            async with session.get(self.api_url, params=self.params) as resp:
+                if resp.status == 429 or resp.status >= 500:
+                    self.stats.errors += 1
+                    await asyncio.sleep(_retryAfter(resp))
+                    return []
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            self.stats.errors += 1
+            return []
+
+        if "error" in data:
+            self.stats.errors += 1
+            if data["error"].get("code") == "maxlag":
+                await asyncio.sleep(_retryAfter(resp))
+                return []
+            raise RuntimeError(f"MediaWiki error: {data['error']}")
+
+        titles = [page["title"] for page in data["query"]["random"]]
+        self.stats.titles += len(titles)
+        return titles
+
+
+async def searchForTMNTAsync(max_titles: int, fetcher=None, isMatch=words.isTMNT):
+    """Classify titles as they stream in until one matches.
+
+    Args:
+        max_titles: Integer, give up after checking this many titles.
+        fetcher: RandomTitleFetcher, a default one if None.
+        isMatch: Function from title to bool, words.isTMNT by default.
+    Returns:
+        Tuple of (matching title or None, FetchStats).
+    """
+    fetcher = fetcher or RandomTitleFetcher()
+    checked = 0
+    titles = fetcher.titles()
+    try:
+        async for title in titles:
+            checked += 1
+            if isMatch(title):
+                fetcher.stats.first_match = time.monotonic()
+                return title, fetcher.stats
+            if checked >= max_titles:
+                break
+    finally:
+        await titles.aclose()
+    return None, fetcher.stats
+
+
+def _retryAfter(resp):
+    try:
+        return max(1.0, float(resp.headers.get("Retry-After", 5)))
+    except ValueError:
+        return 5.0
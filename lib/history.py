@@ -0,0 +1,111 @@
+"""Record of titles already posted, so nothing goes out twice.
+
+Titles are kept in a Bloom filter stored in a memory-mapped file. Membership
+checks and inserts touch a fixed number of bits, whatever the history size,
+and the file stays a few megabytes after millions of titles. The cost is an
+occasional false positive (HISTORY_ERROR_RATE), which only means skipping a
+title that was never actually posted.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+from lib.constants import HISTORY_CAPACITY, HISTORY_ERROR_RATE, HISTORY_PATH
+
+MAGIC = b"TMNTBLM1"
+# magic, bit count, hash count, items added
+_HEADER = struct.Struct("<8sQIxxxxQ")
+
+_history = None
+
+
+class BloomFilter:
+    """File-backed Bloom filter, created at path if it doesn't exist.
+
+    Args:
+        path: String, filter file.
+        capacity: Integer, items the filter is sized for. Ignored when
+                  opening an existing file.
+        error_rate: Float, false positive rate at capacity.
+    """
+
+    def __init__(self, path: str, capacity=HISTORY_CAPACITY,
+                 error_rate=HISTORY_ERROR_RATE):
+        self.path = path
+        if not os.path.exists(path):
+            _createFilter(path, capacity, error_rate)
+        self._file = open(path, "r+b")
+        self._buf = mmap.mmap(self._file.fileno(), 0)
+        magic, self.bits, self.hashes, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Bloom filter file")
+
+    def close(self):
+        self._buf.flush()
+        self._buf.close()
+        self._file.close()
+
+    def __len__(self):
+        return _HEADER.unpack_from(self._buf, 0)[3]
+
+    def __contains__(self, item: str):
+        buf = self._buf
+        for index in self._indexes(item):
+            if not buf[_HEADER.size + (index >> 3)] & (1 << (index & 7)):
+                return False
+        return True
+
+    def add(self, item: str):
+        """Add item, returning False if it was (probably) already present."""
+        new = False
+        buf = self._buf
+        for index in self._indexes(item):
+            offset = _HEADER.size + (index >> 3)
+            bit = 1 << (index & 7)
+            if not buf[offset] & bit:
+                buf[offset] |= bit
+                new = True
+        if new:
+            magic, bits, hashes, count = _HEADER.unpack_from(buf, 0)
+            _HEADER.pack_into(buf, 0, magic, bits, hashes, count + 1)
+        return new
+
+    def flush(self):
+        self._buf.flush()
+
+    def _indexes(self, item):
+        # Double hashing: k indexes from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+
+def getHistory():
+    """Return the process-wide posted-title history, opening it on first use."""
+    global _history
+    if _history is None:
+        _history = BloomFilter(HISTORY_PATH)
+    return _history
+
+
+def wasPosted(title: str):
+    return title in getHistory()
+
+
+def markPosted(title: str):
+    history = getHistory()
+    history.add(title)
+    history.flush()
+
+
+def _createFilter(path, capacity, error_rate):
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, bits, hashes, 0))
+        f.truncate(_HEADER.size + (bits + 7) // 8)
+    os.replace(tmp_path, path)
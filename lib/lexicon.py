@@ -0,0 +1,160 @@
+"""Compiled word-to-stress lexicon.
+
+CMUdict, PRONUNCIATION_OVERRIDES and the common numerals from
+numerals.buildTable() are compiled once by buildLexicon() into a
+small binary table, which is then opened with mmap so a cron run neither parses
+the dictionary text nor keeps a dict of phone lists in memory.
+
+File layout, all integers little-endian uint32:
+
+    MAGIC | count | offsets[count + 1] | records
+
+Each record is the lowercased word in UTF-8, a NUL byte, then every distinct
+stress string for the word (ASCII '0', '1', '2') joined by commas. Records are
+sorted by their word bytes, so lookups are a binary search over the offsets.
+"""
+import mmap
+import os
+import struct
+
+from lib.constants import LEXICON_PATH, PRONUNCIATION_OVERRIDES
+
+MAGIC = b"TMNTLEX1"
+_HEADER = struct.Struct("<8sI")
+_OFFSET = struct.Struct("<I")
+
+_lexicon = None
+
+
+class Lexicon:
+    """Read-only view of a compiled lexicon file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled lexicon")
+        self._offsets = _HEADER.size
+        self._records = self._offsets + (self._count + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, word: str):
+        """Return a tuple of every stress string for word, or None if unknown.
+
+        >>> getLexicon().lookup('Turtles')
+        ('10',)
+        """
+        key = word.lower().encode("utf-8")
+        buf = self._buf
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._span(mid)
+            sep = buf.find(b"\0", start, end)
+            probe = buf[start:sep]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return tuple(buf[sep + 1:end].decode("ascii").split(","))
+        return None
+
+    def _span(self, i):
+        start, end = struct.unpack_from("<II", self._buf,
+                                        self._offsets + i * _OFFSET.size)
+        return self._records + start, self._records + end
+
+
+class PronouncingLexicon:
+    """Fallback lexicon reading CMUdict through pronouncing at runtime.
+
+    Used when no compiled lexicon has been built, so the bot keeps working
+    (slowly) straight from a fresh checkout.
+    """
+
+    def __init__(self):
+        self._overrides = _overrides()
+
+    def lookup(self, word: str):
+        import pronouncing
+
+        word = word.lower()
+        if word in self._overrides:
+            return self._overrides[word]
+        phones = pronouncing.phones_for_word(word)
+        if not phones:
+            return None
+        return _distinct(pronouncing.stresses(p) for p in phones)
+
+
+def getLexicon():
+    """Return the process-wide lexicon, opening it on first use."""
+    global _lexicon
+    if _lexicon is None:
+        if os.path.exists(LEXICON_PATH):
+            _lexicon = Lexicon(LEXICON_PATH)
+        else:
+            _lexicon = PronouncingLexicon()
+    return _lexicon
+
+
+def lookup(word: str):
+    """Return a tuple of every stress string for word, or None if unknown."""
+    return getLexicon().lookup(word)
+
+
+def buildLexicon(path=LEXICON_PATH):
+    """Compile CMUdict, PRONUNCIATION_OVERRIDES and numerals into a lexicon.
+
+    Args:
+        path: String, where to write the compiled lexicon.
+    Returns:
+        Integer, number of words written.
+    """
+    import pronouncing
+    from lib import numerals
+
+    pronouncing.init_cmu()
+    entries = {}
+    for word, phones in pronouncing.pronunciations:
+        entries.setdefault(word.lower(), []).append(pronouncing.stresses(phones))
+    entries.update(_overrides())
+
+    def lookupEntry(word):
+        return _distinct(entries[word]) if word in entries else None
+
+    for numeral, stresses in numerals.buildTable(lookupEntry).items():
+        entries.setdefault(numeral, stresses)
+
+    records = []
+    for word, stresses in entries.items():
+        record = (word.encode("utf-8") + b"\0"
+                  + ",".join(_distinct(stresses)).encode("ascii"))
+        records.append(record)
+    records.sort(key=lambda r: r[:r.index(b"\0")])
+
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(records)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for record in records:
+            f.write(record)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def _overrides():
+    return {word.lower(): (stresses,)
+            for word, stresses in PRONUNCIATION_OVERRIDES}
+
+
+def _distinct(stresses):
+    return tuple(dict.fromkeys(stresses))
@@ -0,0 +1,398 @@
+"""Meter patterns compiled to small automata over syllable stresses.
+
+A meter is written as a regular expression over the stress alphabet '0', '1'
+and '2', e.g. TMNT is "1[02]1[02]1[02]1[02]". Supported syntax is literals,
+'.', classes like [02] or [0-2], groups, '|', and the quantifiers ?, *, + and
+{m}, {m,}, {m,n}. A pattern must match a title's whole stress string.
+
+Patterns compile to a DFA with every state that can no longer reach a match
+removed, so a matcher fed one syllable at a time learns a title is hopeless on
+the first syllable that can't fit, instead of after building the whole string.
+
+Any number of meters can be compiled together into one MeterSet, which tells
+which of them a title fits from a single pass over its syllables. The meters
+in lib/constants.py METERS, plus any added with registerMeter(), are served
+ready-compiled by getMeters().
+"""
+from collections import deque
+
+from lib.constants import METERS
+
+ALPHABET = "012"
+DEAD = -1
+
+
+class MeterSet:
+    """Several named meters compiled together into one automaton.
+
+    Every state records which meters accept there, so one pass over a
+    title's syllables classifies it against all of them at once, and the
+    title is only rejected once no meter can match any more.
+
+    >>> meters = MeterSet({'tmnt': '1[02]1[02]1[02]1[02]', 'eight': '.{8}'})
+    >>> sorted(meters.matches('12101010'))
+    ['eight', 'tmnt']
+    >>> sorted(meters.matches('01010101'))
+    ['eight']
+    """
+
+    def __init__(self, meters: dict):
+        self.meters = dict(meters)
+        asts = [(name, _Parser(pattern).parse())
+                for name, pattern in self.meters.items()]
+        self.transitions, self.accepting = _compile(asts)
+        self.start = 0 if self.transitions else DEAD
+        self.min_syllables, self.max_syllables = _lengthBounds(
+            self.transitions, self.accepting)
+
+    def step(self, state: int, syllable: str):
+        """Advance state by one stress digit, returning DEAD on rejection."""
+        if state == DEAD:
+            return DEAD
+        return self.transitions[state].get(syllable, DEAD)
+
+    def accepted(self, state: int):
+        """Return the frozenset of meter names accepting at state."""
+        if state == DEAD:
+            return frozenset()
+        return self.accepting[state]
+
+    def matches(self, stresses: str):
+        """Return the frozenset of meter names a whole stress string fits."""
+        state = self.start
+        for syllable in stresses:
+            state = self.step(state, syllable)
+            if state == DEAD:
+                break
+        return self.accepted(state)
+
+
+class Meter(MeterSet):
+    """A single compiled meter pattern.
+
+    >>> tmnt = Meter('1[02]1[02]1[02]1[02]')
+    >>> tmnt.matches('12101010')
+    True
+    >>> tmnt.step(tmnt.start, '0') == DEAD
+    True
+    """
+
+    def __init__(self, pattern: str):
+        super().__init__({pattern: pattern})
+        self.pattern = pattern
+
+    def accepts(self, state: int):
+        return bool(self.accepted(state))
+
+    def matches(self, stresses: str):
+        return bool(super().matches(stresses))
+
+
+_registry = dict(METERS)
+_compiled = None
+
+
+def registerMeter(name: str, pattern: str):
+    """Add or replace a meter in the registry used by getMeters().
+
+    The pattern is compiled straight away so a bad one fails here, not on
+    the next classification.
+    """
+    global _compiled
+    Meter(pattern)
+    _registry[name] = pattern
+    _compiled = None
+
+
+def unregisterMeter(name: str):
+    global _compiled
+    del _registry[name]
+    _compiled = None
+
+
+def getMeters():
+    """Return every registered meter compiled into one MeterSet."""
+    global _compiled
+    if _compiled is None:
+        _compiled = MeterSet(_registry)
+    return _compiled
+
+
+class _Parser:
+    """Recursive descent parser from pattern text to a small AST.
+
+    Nodes are ("set", chars), ("cat", [nodes]), ("alt", [nodes]) and
+    ("rep", node, min, max), where max is None for unbounded.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.pos = 0
+
+    def parse(self):
+        node = self._alternation()
+        if self.pos != len(self.pattern):
+            self._error("unexpected ')'")
+        return node
+
+    def _peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def _take(self):
+        char = self._peek()
+        self.pos += 1
+        return char
+
+    def _error(self, message):
+        raise ValueError(f"bad meter {self.pattern!r} at {self.pos}: {message}")
+
+    def _alternation(self):
+        options = [self._sequence()]
+        while self._peek() == "|":
+            self._take()
+            options.append(self._sequence())
+        return options[0] if len(options) == 1 else ("alt", options)
+
+    def _sequence(self):
+        items = []
+        while self._peek() not in (None, "|", ")"):
+            items.append(self._quantified(self._atom()))
+        return ("cat", items)
+
+    def _atom(self):
+        char = self._take()
+        if char is None:
+            self._error("pattern ends early")
+        if char in ALPHABET:
+            return ("set", frozenset(char))
+        if char == ".":
+            return ("set", frozenset(ALPHABET))
+        if char == "[":
+            return ("set", self._charClass())
+        if char == "(":
+            node = self._alternation()
+            if self._take() != ")":
+                self._error("missing ')'")
+            return node
+        self._error(f"unexpected {char!r}")
+
+    def _charClass(self):
+        chars = set()
+        while self._peek() != "]":
+            char = self._take()
+            if char is None:
+                self._error("missing ']'")
+            if char not in ALPHABET:
+                self._error(f"{char!r} is not a stress digit")
+            if self._peek() == "-":
+                self._take()
+                end = self._take()
+                if end is None or end not in ALPHABET or end < char:
+                    self._error("bad range")
+                chars.update(c for c in ALPHABET if char <= c <= end)
+            else:
+                chars.add(char)
+        self._take()
+        if not chars:
+            self._error("empty class")
+        return frozenset(chars)
+
+    def _quantified(self, node):
+        while self._peek() in ("?", "*", "+", "{"):
+            char = self._take()
+            if char == "?":
+                node = ("rep", node, 0, 1)
+            elif char == "*":
+                node = ("rep", node, 0, None)
+            elif char == "+":
+                node = ("rep", node, 1, None)
+            else:
+                low, high = self._bounds()
+                node = ("rep", node, low, high)
+        return node
+
+    def _bounds(self):
+        end = self.pattern.find("}", self.pos)
+        if end == -1:
+            self._error("missing '}'")
+        low, comma, high = self.pattern[self.pos:end].partition(",")
+        self.pos = end + 1
+        try:
+            low = int(low)
+            high = (int(high) if high else None) if comma else low
+        except ValueError:
+            self._error("bad repeat count")
+        if high is not None and high < low:
+            self._error("bad repeat range")
+        return low, high
+
+
+class _NFA:
+    def __init__(self):
+        self.epsilons = []
+        self.edges = []
+
+    def state(self):
+        self.epsilons.append([])
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    def build(self, node):
+        """Thompson construction, returning the (start, end) states of node."""
+        kind = node[0]
+        start = self.state()
+        if kind == "set":
+            end = self.state()
+            self.edges[start].append((node[1], end))
+        elif kind == "cat":
+            end = start
+            for item in node[1]:
+                item_start, item_end = self.build(item)
+                self.epsilons[end].append(item_start)
+                end = item_end
+        elif kind == "alt":
+            end = self.state()
+            for option in node[1]:
+                option_start, option_end = self.build(option)
+                self.epsilons[start].append(option_start)
+                self.epsilons[option_end].append(end)
+        else:
+            _, item, low, high = node
+            end = start
+            for _ in range(low):
+                item_start, item_end = self.build(item)
+                self.epsilons[end].append(item_start)
+                end = item_end
+            if high is None:
+                item_start, item_end = self.build(item)
+                self.epsilons[end].append(item_start)
+                self.epsilons[item_end].append(end)
+            else:
+                skip = self.state()
+                for _ in range(high - low):
+                    item_start, item_end = self.build(item)
+                    self.epsilons[end].append(item_start)
+                    self.epsilons[end].append(skip)
+                    end = item_end
+                self.epsilons[end].append(skip)
+                end = skip
+        return start, end
+
+    def closure(self, states):
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            for nxt in self.epsilons[stack.pop()]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return frozenset(seen)
+
+
+def _compile(asts):
+    """Subset-construct one DFA from (name, ast) pairs and drop dead states.
+
+    Returns:
+        Tuple of (transitions, accepting): transitions[state] maps a stress
+        digit to the next live state, accepting[state] is the frozenset of
+        names whose pattern matches there.
+    """
+    nfa = _NFA()
+    nfa_start = nfa.state()
+    final = {}
+    for name, ast in asts:
+        start, end = nfa.build(ast)
+        nfa.epsilons[nfa_start].append(start)
+        final.setdefault(end, set()).add(name)
+
+    start = nfa.closure([nfa_start])
+    ids = {start: 0}
+    subsets = [start]
+    transitions = []
+    for subset in subsets:
+        row = {}
+        for syllable in ALPHABET:
+            targets = [target for state in subset
+                       for chars, target in nfa.edges[state]
+                       if syllable in chars]
+            if not targets:
+                continue
+            nxt = nfa.closure(targets)
+            if nxt not in ids:
+                ids[nxt] = len(subsets)
+                subsets.append(nxt)
+            row[syllable] = ids[nxt]
+        transitions.append(row)
+    accepting = [frozenset(name for state in subset
+                           for name in final.get(state, ()))
+                 for subset in subsets]
+
+    live = _liveStates(transitions, accepting)
+    if 0 not in live:
+        return [], []
+    # Renumber live states, keeping the start state at 0.
+    order = sorted(live)
+    renumber = {old: new for new, old in enumerate(order)}
+    pruned = [{syllable: renumber[nxt]
+               for syllable, nxt in transitions[old].items() if nxt in live}
+              for old in order]
+    return pruned, [accepting[old] for old in order]
+
+
+def _liveStates(transitions, accepting):
+    """States from which some accepting state is reachable."""
+    reverse = [[] for _ in transitions]
+    for state, row in enumerate(transitions):
+        for nxt in row.values():
+            reverse[nxt].append(state)
+    live = {state for state, accept in enumerate(accepting) if accept}
+    stack = list(live)
+    while stack:
+        for prev in reverse[stack.pop()]:
+            if prev not in live:
+                live.add(prev)
+                stack.append(prev)
+    return live
+
+
+def _lengthBounds(transitions, accepting):
+    """Fewest and most syllables a match can have, most being None if unbounded."""
+    if not transitions:
+        return None, None
+    depth = {0: 0}
+    queue = deque([0])
+    while queue:
+        state = queue.popleft()
+        for nxt in transitions[state].values():
+            if nxt not in depth:
+                depth[nxt] = depth[state] + 1
+                queue.append(nxt)
+    shortest = min(depth[s] for s, accept in enumerate(accepting) if accept)
+
+    # Longest path exists only if the (fully live) DFA is acyclic.
+    longest = {}
+    visiting = set()
+
+    def _longest(state):
+        if state in longest:
+            return longest[state]
+        if state in visiting:
+            raise _Cycle
+        visiting.add(state)
+        best = 0 if accepting[state] else -1
+        for nxt in transitions[state].values():
+            rest = _longest(nxt)
+            if rest >= 0:
+                best = max(best, rest + 1)
+        visiting.discard(state)
+        longest[state] = best
+        return best
+
+    try:
+        return shortest, _longest(0)
+    except _Cycle:
+        return shortest, None
+
+
+class _Cycle(Exception):
+    pass
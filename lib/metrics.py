@@ -0,0 +1,185 @@
+"""Per-stage timing and rejection counters.
+
+Stages (fetch, tokenize, ban_filter, stress_lookup, meter_match, render,
+publish) record latency histograms in stage_seconds, and every classified
+title bumps titles_matched_total or titles_rejected_total with the reject
+reason (banned, oov, length, pattern). export() writes everything either as
+one JSON line appended per run, or as a Prometheus textfile for
+node_exporter's textfile collector, so BACKOFF and MAX_ATTEMPTS can be tuned
+from real numbers.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PREFIX = "tmnt_"
+# Histogram bucket upper bounds in seconds, +Inf is implied.
+BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+_BOUNDS = [str(bound) for bound in BUCKETS] + ["+Inf"]
+
+
+class Counter:
+    """A monotonically increasing count for one name and label set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, value=1):
+        with self._lock:
+            self.value += value
+
+
+class Histogram:
+    """Observation counts per BUCKETS bound, plus their sum and count."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+
+class Metrics:
+    """Counters and histograms keyed by name and labels.
+
+    Hot paths should look a series up once with counter() or histogram() and
+    keep it, rather than paying for the label lookup in inc() and observe()
+    on every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def counter(self, name: str, **labels):
+        """Return the Counter for name and labels, creating it at zero."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._counters:
+                self._counters[key] = Counter()
+            return self._counters[key]
+
+    def histogram(self, name: str, **labels):
+        """Return the Histogram for name and labels, creating it empty."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            return self._histograms[key]
+
+    def inc(self, name: str, value=1, **labels):
+        self.counter(name, **labels).inc(value)
+
+    def observe(self, name: str, seconds: float, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    @contextmanager
+    def timed(self, stage: str, **labels):
+        """Record the time spent in the with block under stage_seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start,
+                         stage=stage, **labels)
+
+    def reset(self):
+        """Zero every series. Series handed out earlier stay registered."""
+        with self._lock:
+            for counter in self._counters.values():
+                counter.value = 0
+            for histogram in self._histograms.values():
+                histogram.counts = [0] * (len(BUCKETS) + 1)
+                histogram.sum = 0.0
+                histogram.count = 0
+
+    def recorded(self):
+        """Return True if any series has counted or observed anything."""
+        with self._lock:
+            return (any(c.value for c in self._counters.values())
+                    or any(h.count for h in self._histograms.values()))
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            counters = {_series(name, labels): counter.value
+                        for (name, labels), counter in self._counters.items()}
+            histograms = {}
+            for (name, labels), histogram in self._histograms.items():
+                histograms[_series(name, labels)] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": dict(zip(_BOUNDS, histogram.counts)),
+                }
+        return {"time": datetime.now().isoformat(), "counters": counters,
+                "histograms": histograms}
+
+    def toPrometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, labels), counter in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}{_series(name, labels)} {counter.value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket in zip(_BOUNDS, histogram.counts):
+                cumulative += bucket
+                series = _series(name + "_bucket", labels + (("le", bound),))
+                lines.append(f"{PREFIX}{series} {cumulative}")
+            lines.append(f"{PREFIX}{_series(name + '_sum', labels)} {histogram.sum}")
+            lines.append(f"{PREFIX}{_series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """Write metrics to path: Prometheus textfile if it ends in .prom,
+        otherwise append one JSON line."""
+        if path.endswith(".prom"):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.toPrometheus())
+            os.replace(tmp_path, path)
+        else:
+            with open(path, "a") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{pairs}}}"
+
+
+_metrics = Metrics()
+counter = _metrics.counter
+histogram = _metrics.histogram
+inc = _metrics.inc
+observe = _metrics.observe
+timed = _metrics.timed
+reset = _metrics.reset
+recorded = _metrics.recorded
+snapshot = _metrics.snapshot
+toPrometheus = _metrics.toPrometheus
+export = _metrics.export
@@ -0,0 +1,141 @@
+"""Stresses of numerals as they are read aloud in titles.
+
+Four-digit numbers are read as years ("1984" -> "nineteen eighty-four"), other
+numbers as cardinals, and "21st"-style tokens as ordinals. Years 1000-2099,
+0-999 and their ordinals cover nearly every numeral in Wikipedia titles, so
+buildTable() spells those out once and lexicon.buildLexicon() compiles them
+into the lexicon next to the words. Anything else is spelled out with
+num2words on first sight and memoized.
+"""
+import itertools
+import re
+from functools import lru_cache
+
+from lib.constants import MAX_PRONUNCIATIONS, NUMERAL_CACHE_SIZE
+from lib import lexicon
+
+ORDINAL_SUFFIXES = ("nd", "rd", "st", "th")
+_SPOKEN_SEPARATORS = re.compile(r"[\s,-]+")
+
+
+def isNumeral(token: str):
+    """True if token is all digits, or digits then an ordinal suffix."""
+    if token.isdigit():
+        return True
+    return token[-2:] in ORDINAL_SUFFIXES and token[:-2].isdigit()
+
+
+def spokenForm(token: str):
+    """Spell a numeral out the way it is read.
+
+    >>> spokenForm('1984')
+    'nineteen eighty-four'
+
+    >>> spokenForm('21st')
+    'twenty-first'
+
+    Args:
+        token: String, a numeral, see isNumeral().
+    Returns:
+        String, words as num2words writes them, or None if token isn't a
+        numeral num2words can spell.
+    """
+    # Imported here, most numerals are read from the lexicon's table.
+    from num2words import num2words as n2w
+
+    try:
+        if token.isdigit():
+            if len(token) == 4:
+                return n2w(token, to="year")
+            return n2w(token)
+        if isNumeral(token):
+            return n2w(token[:-2], to="ordinal")
+    except Exception:
+        pass
+    return None
+
+
+def spokenWords(token: str):
+    """Return the words of spokenForm() split for lookup, or None.
+
+    num2words hyphenates compounds like "twenty-one", which the lexicon only
+    knows as separate words.
+    """
+    spoken = spokenForm(token)
+    if spoken is None:
+        return None
+    return [word for word in _SPOKEN_SEPARATORS.split(spoken) if word]
+
+
+def stressesFor(token: str, lookup):
+    """Stress strings for a numeral read aloud.
+
+    Each reading joins one pronunciation of every spoken word, first
+    pronunciations first, so the first reading is the most common one.
+
+    Args:
+        token: String, a numeral, see isNumeral().
+        lookup: Function from word to a tuple of stress strings or None.
+    Returns:
+        Tuple of at most MAX_PRONUNCIATIONS stress strings, empty if any
+        spoken word is unknown, or None if token isn't a numeral.
+    """
+    spoken = spokenWords(token)
+    if spoken is None:
+        return None
+    choices = []
+    for word in spoken:
+        variants = lookup(word)
+        if not variants:
+            return ()
+        choices.append(variants[:MAX_PRONUNCIATIONS])
+    readings = dict.fromkeys("".join(p) for p in itertools.product(*choices))
+    return tuple(itertools.islice(readings, MAX_PRONUNCIATIONS))
+
+
+def buildTable(lookup):
+    """Stresses of years 1000-2099, 0-999 and the ordinals 1st-999th.
+
+    Args:
+        lookup: Function from word to a tuple of stress strings or None.
+    Returns:
+        Dict of numeral to tuple of stress strings, unknown ones left out.
+    """
+    tokens = [str(n) for n in range(1000)]
+    tokens += [str(n) for n in range(1000, 2100)]
+    tokens += [ordinal(n) for n in range(1, 1000)]
+    table = {}
+    for token in tokens:
+        stresses = stressesFor(token, lookup)
+        if stresses:
+            table[token] = stresses
+    return table
+
+
+def ordinal(n: int):
+    """Write n with its English ordinal suffix.
+
+    >>> ordinal(1), ordinal(12), ordinal(23)
+    ('1st', '12th', '23rd')
+    """
+    if n % 100 in (11, 12, 13):
+        return f"{n}th"
+    return f"{n}{({1: 'st', 2: 'nd', 3: 'rd'}).get(n % 10, 'th')}"
+
+
+@lru_cache(maxsize=NUMERAL_CACHE_SIZE)
+def numeralStresses(token: str):
+    """Stress strings for a numeral, from the lexicon table or num2words.
+
+    >>> numeralStresses('1984')[0]
+    '11101'
+
+    Args:
+        token: String, a word from a title.
+    Returns:
+        Tuple of stress strings, empty if the numeral can't be read, or None
+        if token isn't a numeral.
+    """
+    if not isNumeral(token):
+        return None
+    return lexicon.lookup(token) or stressesFor(token, lexicon.lookup) or ()
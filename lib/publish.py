@@ -0,0 +1,163 @@
+"""Post a status and logo to every configured network at once.
+
+Each network gets its own thread, so a slow or failing one never holds up or
+aborts the others, and all of them upload the same in-memory image. Clients
+keep one authenticated requests.Session each, so a long-running process pays
+for connection and TLS setup once rather than per post. Mastodon is posted to
+with its access token alone, skipping the password log-in round-trip.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+from requests_oauthlib import OAuth1
+
+from lib.constants import PUBLISH_TIMEOUT, TWITTER_API_URL, TWITTER_UPLOAD_URL
+from lib import keys as k
+from lib import metrics
+
+_publishers = None
+
+
+@dataclass
+class PublishResult:
+    """Outcome of posting to one network.
+
+    Attributes:
+        network: String, network name.
+        ok: Bool, whether the status was posted.
+        latency: Float, seconds spent posting, image upload included.
+        status_id: String or None, id of the new status.
+        error: String or None, what went wrong.
+    """
+
+    network: str
+    ok: bool
+    latency: float
+    status_id: str = None
+    error: str = None
+
+
+class TwitterPublisher:
+    """Twitter v1.1 media upload and status update over one OAuth1 session."""
+
+    name = "twitter"
+
+    def __init__(self, api_url=TWITTER_API_URL, upload_url=TWITTER_UPLOAD_URL,
+                 timeout=PUBLISH_TIMEOUT):
+        self.api_url = api_url
+        self.upload_url = upload_url
+        self.timeout = timeout
+        self._session = None
+
+    def configured(self):
+        return all((k.TWITTER_CONSUMER_KEY, k.TWITTER_CONSUMER_SECRET,
+                    k.TWITTER_ACCESS_TOKEN, k.TWITTER_ACCESS_TOKEN_SECRET))
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.auth = OAuth1(
+                k.TWITTER_CONSUMER_KEY, k.TWITTER_CONSUMER_SECRET,
+                k.TWITTER_ACCESS_TOKEN, k.TWITTER_ACCESS_TOKEN_SECRET)
+        return self._session
+
+    def post(self, text: str, image: bytes = None):
+        """Post text and an optional PNG, returning the new status id."""
+        data = {"status": text}
+        if image:
+            resp = self.session.post(
+                f"{self.upload_url}/media/upload.json",
+                files={"media": ("tmnt-logo.png", image, "image/png")},
+                timeout=self.timeout)
+            resp.raise_for_status()
+            data["media_ids"] = resp.json()["media_id_string"]
+        resp = self.session.post(f"{self.api_url}/statuses/update.json",
+                                 data=data, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()["id_str"]
+
+
+class MastodonPublisher:
+    """Mastodon media upload and status post over one bearer-token session."""
+
+    name = "mastodon"
+
+    def __init__(self, base_url=None, access_token=None, timeout=PUBLISH_TIMEOUT):
+        self.base_url = (base_url or k.MASTO_URL).rstrip("/")
+        self.access_token = access_token or k.MASTO_ACCESS_TOKEN
+        self.timeout = timeout
+        self._session = None
+
+    def configured(self):
+        return bool(self.base_url and self.access_token)
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers["Authorization"] = f"Bearer {self.access_token}"
+        return self._session
+
+    def post(self, text: str, image: bytes = None):
+        """Post text and an optional PNG, returning the new status id."""
+        data = {"status": text}
+        if image:
+            resp = self.session.post(
+                f"{self.base_url}/api/v2/media",
+                files={"file": ("tmnt-logo.png", image, "image/png")},
+                timeout=self.timeout)
+            resp.raise_for_status()
+            data["media_ids[]"] = resp.json()["id"]
+        resp = self.session.post(f"{self.base_url}/api/v1/statuses",
+                                 data=data, timeout=self.timeout)
+        resp.raise_for_status()
+        return str(resp.json()["id"])
+
+
+def getPublishers():
+    """Return the process-wide publishers for every network with keys set."""
+    global _publishers
+    if _publishers is None:
+        _publishers = [publisher for publisher in
+                       (TwitterPublisher(), MastodonPublisher())
+                       if publisher.configured()]
+    return _publishers
+
+
+def publish(text: str, image: bytes = None, publishers=None):
+    """Post to every network concurrently and report how each went.
+
+    Args:
+        text: String, status text.
+        image: Bytes, PNG logo shared by every upload.
+        publishers: List of publishers, getPublishers() if None.
+    Returns:
+        List of PublishResult, one per publisher, in the order given.
+    """
+    publishers = getPublishers() if publishers is None else publishers
+    if not publishers:
+        return []
+    with ThreadPoolExecutor(max_workers=len(publishers)) as pool:
+        jobs = [pool.submit(_timedPost, publisher, text, image)
+                for publisher in publishers]
+        return [job.result() for job in jobs]
+
+
+def _timedPost(publisher, text, image):
+    start = time.perf_counter()
+    try:
+        status_id = publisher.post(text, image)
+    except Exception as e:
+        result = PublishResult(publisher.name, False, time.perf_counter() - start,
+                               error=f"{type(e).__name__}: {e}")
+    else:
+        result = PublishResult(publisher.name, True, time.perf_counter() - start,
+                               status_id=status_id)
+    metrics.observe("stage_seconds", result.latency, stage="publish",
+                    network=publisher.name)
+    metrics.inc("publish_total", network=publisher.name,
+                outcome="ok" if result.ok else "error")
+    return result
@@ -0,0 +1,295 @@
+"""In-process TMNT logo renderer.
+
+Draws the same layout as assets/html/tmnt.html with Pillow: the first three
+words in white capitals, each letter skewed, on a red banner with pointed red
+ends, and the rest of the title underneath in the Turtles font, green with a
+black outline, each letter rotated along an arc. Trimming, the white border
+and PNG encoding all happen in memory, so a render is one function call
+returning bytes, with no browser, ImageMagick, zopfli or temp file.
+"""
+import io
+import math
+import re
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from lib.constants import BANNER_FONT_PATHS, TURTLES_FONT_PATH
+
+WHITE = (255, 255, 255, 255)
+BLACK = (0, 0, 0, 255)
+RED = (255, 0, 0, 255)
+GREEN = (156, 203, 64, 255)
+
+# Sizes in px, from the stylesheet in tmnt.html.
+BANNER_FONT_SIZE = 30
+BANNER_LINE_HEIGHT = 40
+BANNER_BORDER = 6
+BANNER_SKEW = (25, -25)
+END_WIDTH = 70
+END_OVERLAP = 65
+END_SKEW = 30
+END_DROP = 15
+TURTLES_FONT_SIZE = 120
+TURTLES_OUTLINE = 6
+TURTLES_ROTATE = (-30, 30)
+TURTLES_ARC = 270
+TURTLES_OVERLAP = 30
+SPACE_WIDTH = 8
+# ImageMagick `-border 15%x20%`, as a fraction of the trimmed size per side.
+BORDER = (0.15, 0.20)
+
+_fonts = {}
+
+
+def renderLogo(title: str, optimize: bool = True, palette: bool = True):
+    """Render a TMNT logo for an already padded title.
+
+    Args:
+        title: String, title passed through words.addPadding().
+        optimize: Bool, spend extra time on smaller PNG output.
+        palette: Bool, quantize to a 256 colour palette, as zopflipng's
+                 lossy mode did.
+    Returns:
+        Bytes of the PNG image.
+    """
+    image = drawLogo(title)
+    if palette:
+        image = image.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=optimize)
+    return out.getvalue()
+
+
+def drawLogo(title: str):
+    """Draw, trim and border a logo, returning an RGB PIL image."""
+    # Same split as render() in tmnt.html: words and their separators.
+    parts = re.split(r"(\s|-)", title)
+    banner = _drawBanner("".join(parts[:6]))
+    turtles = _drawTurtles("".join(parts[6:]))
+
+    width = max(banner.width, turtles.width)
+    height = banner.height + turtles.height - TURTLES_OVERLAP
+    canvas = Image.new("RGBA", (width, max(height, banner.height)), WHITE)
+    canvas.alpha_composite(banner, ((width - banner.width) // 2, 0))
+    canvas.alpha_composite(turtles, ((width - turtles.width) // 2,
+                                     banner.height - TURTLES_OVERLAP))
+    return _addBorder(_trim(canvas.convert("RGB")))
+
+
+def _drawBanner(text: str):
+    """The red banner with skewed white capitals and pointed ends."""
+    font = _font("banner")
+    letters = text.upper()
+    start, end = BANNER_SKEW
+    band_height = BANNER_LINE_HEIGHT + 2 * BANNER_BORDER
+    end_width = END_WIDTH + BANNER_BORDER
+
+    glyphs = []
+    for i, letter in enumerate(letters):
+        # Angle interpolation from skewLetters() in tmnt.html.
+        angle = end if i == len(letters) - 1 else start + i * (end - start) / len(letters)
+        if letter == " ":
+            glyphs.append((None, SPACE_WIDTH))
+            continue
+        glyph = _glyphImage(letter, font, WHITE, BANNER_LINE_HEIGHT)
+        glyphs.append((_skew(glyph, angle), font.getlength(letter)))
+    band_width = math.ceil(sum(advance for _, advance in glyphs))
+
+    band_x = end_width - END_OVERLAP
+    slant = math.ceil(math.tan(math.radians(END_SKEW)) * band_height / 2)
+    width = band_x + band_width + end_width - END_OVERLAP + 2 * slant
+    band_x += slant
+    image = Image.new("RGBA", (width, band_height + END_DROP), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    # DOM order: left end, banner, right end, then the letters on top.
+    _drawEnd(draw, band_x - end_width + END_OVERLAP, END_DROP, band_height, 1)
+    draw.rectangle((band_x, 0, band_x + band_width - 1, band_height - 1), fill=BLACK)
+    draw.rectangle((band_x, BANNER_BORDER, band_x + band_width - 1,
+                    band_height - BANNER_BORDER - 1), fill=RED)
+    _drawEnd(draw, band_x + band_width - END_OVERLAP, END_DROP, band_height, -1)
+
+    x = band_x
+    for glyph, advance in glyphs:
+        if glyph is not None:
+            image.alpha_composite(glyph, (round(x + (advance - glyph.width) / 2),
+                                          BANNER_BORDER))
+        x += advance
+    return image
+
+
+def _drawEnd(draw, x, y, height, direction):
+    """One pointed banner end; direction 1 for the left end, -1 the right."""
+    width = END_WIDTH + BANNER_BORDER
+    shift = math.tan(math.radians(END_SKEW)) * height / 2 * direction
+
+    def _box(left, top, right, bottom):
+        return [(left - shift, top), (right - shift, top),
+                (right + shift, bottom), (left + shift, bottom)]
+
+    draw.polygon(_box(x, y, x + width, y + height), fill=BLACK)
+    if direction == 1:
+        inner = _box(x + BANNER_BORDER, y + BANNER_BORDER, x + width,
+                     y + height - BANNER_BORDER)
+    else:
+        inner = _box(x, y + BANNER_BORDER, x + width - BANNER_BORDER,
+                     y + height - BANNER_BORDER)
+    draw.polygon(inner, fill=RED)
+
+
+def _drawTurtles(text: str):
+    """The arcing green letters of the last word(s)."""
+    font = _font("turtles")
+    start, end = TURTLES_ROTATE
+
+    placed = []
+    x = 0
+    for i, letter in enumerate(text):
+        # Angle and arc from rotateLetters() in tmnt.html.
+        angle = 0 if len(text) == 1 else start + i * (end - start) / (len(text) - 1)
+        if letter == " ":
+            x += SPACE_WIDTH
+            continue
+        advance = font.getlength(letter)
+        glyph = _glyphImage(letter, font, GREEN, None, TURTLES_OUTLINE)
+        top = TURTLES_ARC * (1 - math.cos(math.radians(angle)))
+        center = (x + advance / 2, top + glyph.height / 2)
+        placed.append((glyph.rotate(-angle, expand=True,
+                                    resample=Image.Resampling.BICUBIC), center))
+        x += advance
+
+    if not placed:
+        return Image.new("RGBA", (1, 1), (0, 0, 0, 0))
+    left = min(cx - g.width / 2 for g, (cx, cy) in placed)
+    top = min(cy - g.height / 2 for g, (cx, cy) in placed)
+    right = max(cx + g.width / 2 for g, (cx, cy) in placed)
+    bottom = max(cy + g.height / 2 for g, (cx, cy) in placed)
+    image = Image.new("RGBA", (math.ceil(right - left), math.ceil(bottom - top)),
+                      (0, 0, 0, 0))
+    for glyph, (cx, cy) in placed:
+        image.alpha_composite(glyph, (round(cx - glyph.width / 2 - left),
+                                      round(cy - glyph.height / 2 - top)))
+    return image
+
+
+def _glyphImage(letter, font, fill, line_height=None, outline=0):
+    """A letter on a transparent box one advance wide and one line high."""
+    ascent, descent = font.getmetrics()
+    height = line_height or ascent + descent
+    width = math.ceil(font.getlength(letter)) + 2 * outline
+    image = Image.new("RGBA", (width, height + 2 * outline), (0, 0, 0, 0))
+    top = outline + (height - ascent - descent) // 2
+    ImageDraw.Draw(image).text((outline, top), letter, font=font, fill=fill,
+                               stroke_width=outline, stroke_fill=BLACK)
+    return image
+
+
+def _skew(image, angle):
+    """CSS skew(angle) about the image centre, widening to fit."""
+    slope = math.tan(math.radians(angle))
+    pad = math.ceil(abs(slope) * image.height / 2)
+    center_y = image.height / 2
+    return image.transform(
+        (image.width + 2 * pad, image.height), Image.Transform.AFFINE,
+        (1, -slope, slope * center_y - pad, 0, 1, 0),
+        resample=Image.Resampling.BICUBIC)
+
+
+def _trim(image):
+    """Crop away the white margin, like `convert -trim +repage`."""
+    background = Image.new("RGB", image.size, WHITE[:3])
+    bbox = ImageChops.difference(image, background).getbbox()
+    return image.crop(bbox) if bbox else image
+
+
+def _addBorder(image):
+    """Pad with white, like `convert -border 15%x20%`."""
+    pad_x = round(image.width * BORDER[0])
+    pad_y = round(image.height * BORDER[1])
+    bordered = Image.new("RGB", (image.width + 2 * pad_x,
+                                 image.height + 2 * pad_y), WHITE[:3])
+    bordered.paste(image, (pad_x, pad_y))
+    return bordered
+
+
+def _font(kind):
+    if kind not in _fonts:
+        if kind == "turtles":
+            _fonts[kind] = ImageFont.truetype(TURTLES_FONT_PATH, TURTLES_FONT_SIZE)
+        else:
+            _fonts[kind] = _bannerFont()
+    return _fonts[kind]
+
+
+def _bannerFont():
+    for path in BANNER_FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, BANNER_FONT_SIZE)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=BANNER_FONT_SIZE)
+
+
+def benchmark(title: str, runs: int = 10):
+    """Time this renderer against the wss/ImageMagick/zopfli pipeline.
+
+    Each pipeline runs in its own child process, so peak memory is that
+    child's max RSS, including any subprocesses it spawned.
+
+    Args:
+        title: String, padded title to render.
+        runs: Integer, renders per pipeline.
+    Returns:
+        Dict of pipeline name to {"mean_ms", "min_ms", "peak_rss_kb"}, or
+        {"error": message} for a pipeline that couldn't run here.
+    """
+    return {
+        "native": _measure(_benchNative, title, runs),
+        "legacy": _measure(_benchLegacy, title, runs),
+    }
+
+
+def _benchNative(title):
+    renderLogo(title)
+
+
+def _benchLegacy(title):
+    import os
+    from lib import images
+    from lib.constants import WSS
+
+    if not os.path.exists(WSS):
+        raise RuntimeError(f"{WSS} not installed")
+    os.remove(images.getLogo(title))
+
+
+def _measure(fn, title, runs):
+    import multiprocessing
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_measureChild,
+                                      args=(child, fn, title, runs))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def _measureChild(conn, fn, title, runs):
+    import resource
+    import time
+
+    try:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn(title)
+            timings.append((time.perf_counter() - start) * 1000)
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        conn.send({"mean_ms": sum(timings) / len(timings),
+                   "min_ms": min(timings), "peak_rss_kb": peak})
+    except Exception as e:
+        conn.send({"error": str(e)})
+    finally:
+        conn.close()
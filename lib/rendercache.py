@@ -0,0 +1,139 @@
+"""Content-addressed cache of rendered logos.
+
+Each logo is stored as a file named by a hash of everything that affects its
+bytes: the padded title, RENDER_VERSION and the encoder options. A
+changed renderer or option therefore never serves a stale image. Reads bump a
+file's mtime, and the cache evicts the least recently used files once it
+grows past its size limit.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lib.constants import RENDER_CACHE_BYTES, RENDER_CACHE_DIR, RENDER_VERSION
+from lib import metrics
+from lib import words
+
+_SUFFIX = ".png"
+
+
+class RenderCache:
+    """Directory of rendered logos, bounded to max_bytes."""
+
+    def __init__(self, path=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, padded_title: str, **options):
+        """Return the cache key for a padded title and renderLogo() options."""
+        material = json.dumps([padded_title, RENDER_VERSION, options],
+                              sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, padded_title: str, **options):
+        """Return cached logo bytes, or None."""
+        path = self._file(self.key(padded_title, **options))
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, padded_title: str, data: bytes, **options):
+        """Store logo bytes. Readers never see a partly written file."""
+        path = self._file(self.key(padded_title, **options))
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Delete least recently used logos until the cache fits max_bytes.
+
+        Returns:
+            Integer, number of files deleted.
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith(_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        deleted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        return deleted
+
+    def _file(self, key):
+        return os.path.join(self.path, key + _SUFFIX)
+
+
+def getLogo(title: str, cache=None, **options):
+    """Return logo bytes for an unpadded title, rendering on a cache miss."""
+    cache = cache or RenderCache()
+    padded = words.addPadding(title)
+    data = cache.get(padded, **options)
+    metrics.inc("render_cache_total", result="miss" if data is None else "hit")
+    if data is None:
+        # Pillow is only imported on a miss, a pre-rendered post never needs it.
+        from lib import render
+
+        with metrics.timed("render"):
+            data = render.renderLogo(padded, **options)
+        cache.put(padded, data, **options)
+        cache.evict()
+    return data
+
+
+def renderBatch(titles, cache=None, workers=None, **options):
+    """Render every title not already cached, across a process pool.
+
+    Args:
+        titles: Iterable of unpadded titles.
+        cache: RenderCache to fill, the default one if None.
+        workers: Integer or None, pool size. None uses every CPU.
+        **options: Passed through to render.renderLogo().
+    Returns:
+        Tuple of (titles rendered, titles already cached).
+    """
+    cache = cache or RenderCache()
+    todo = []
+    cached = 0
+    for title in titles:
+        padded = words.addPadding(title)
+        if os.path.exists(cache._file(cache.key(padded, **options))):
+            cached += 1
+        else:
+            todo.append(padded)
+
+    if todo:
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = [pool.submit(_renderInto, cache.path, padded, options)
+                    for padded in todo]
+            for job in jobs:
+                job.result()
+        cache.evict()
+    return len(todo), cached
+
+
+def _renderInto(cache_path, padded_title, options):
+    # Eviction happens once in the parent; workers only write.
+    from lib import render
+
+    cache = RenderCache(cache_path, max_bytes=float("inf"))
+    cache.put(padded_title, render.renderLogo(padded_title, **options), **options)
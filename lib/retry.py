@@ -0,0 +1,184 @@
+"""Retries with capped, jittered exponential backoff and a circuit breaker.
+
+A RetryPolicy wraps a flaky call. After the nth failure in a row it waits a
+random time between 0 and min(cap, base * 2**n), so short blips cost seconds,
+long outages are probed every few minutes at most, and many clients never
+retry in lockstep. Each policy allows a number of failed attempts in a row,
+and a run, until reset() or giving up, may lose only so many seconds to
+failures. Once either budget is used up, RetryError is raised so the caller
+can give up cleanly, and the next call starts a new run.
+
+A CircuitBreaker opens after several failures in a row. While it is open,
+calls fail straight away with CircuitOpenError instead of hitting an API that
+is clearly down. Once reset_timeout has passed, one trial call is let
+through. If it succeeds the breaker closes, and if it fails the breaker stays
+open for twice as long, up to max_reset_timeout.
+"""
+import random
+import time
+
+from lib.constants import (
+    BREAKER_FAILURES,
+    BREAKER_MAX_RESET,
+    BREAKER_RESET,
+    RETRY_ATTEMPTS,
+    RETRY_BASE,
+    RETRY_BUDGET,
+    RETRY_CAP,
+)
+from lib import metrics
+
+
+class RetryError(Exception):
+    """A policy's budget ran out; __cause__ is the last failure."""
+
+
+class CircuitOpenError(Exception):
+    """The circuit breaker is open, so the call wasn't attempted."""
+
+
+class CircuitBreaker:
+    """Fail fast after failure_threshold failures in a row.
+
+    Args:
+        failure_threshold: Integer, failures in a row that open the breaker.
+        reset_timeout: Float, seconds open before a trial call.
+        max_reset_timeout: Float, most seconds open after repeated failed
+                           trial calls.
+        clock: Function returning monotonic seconds.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES,
+                 reset_timeout=BREAKER_RESET, max_reset_timeout=BREAKER_MAX_RESET,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._timeout = reset_timeout
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self._timeout:
+            return "half-open"
+        return "open"
+
+    def retryAfter(self):
+        """Return seconds until a call is allowed, 0 if one is now."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self._timeout - self.clock())
+
+    def allow(self):
+        return self.state != "open"
+
+    def recordSuccess(self):
+        self.failures = 0
+        self.opened_at = None
+        self._timeout = self.reset_timeout
+
+    def recordFailure(self):
+        self.failures += 1
+        if self.opened_at is not None:
+            # A failed trial call, stay open for longer.
+            self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            self.opened_at = self.clock()
+        elif self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+            metrics.inc("circuit_opened_total")
+
+
+class RetryPolicy:
+    """Call a function until it succeeds or the budget runs out.
+
+    Failed attempts count in a row across calls, so an outage spanning
+    several calls is still given up on while blips split up by successes
+    never add up. Seconds lost count over the whole run, until reset() or a
+    RetryError, after which the next call is tried afresh.
+
+    Args:
+        retry_on: Tuple of exception types worth retrying, others propagate.
+        base: Float, seconds the first backoff is drawn up to.
+        cap: Float, most seconds one backoff is drawn up to.
+        max_attempts: Integer, failed attempts in a row allowed.
+        max_elapsed: Float, seconds a run may lose to failed attempts and
+                     backoff.
+        breaker: CircuitBreaker or None.
+        sleep: Function, sleeps for seconds.
+        clock: Function returning monotonic seconds.
+    """
+
+    def __init__(self, retry_on=(Exception,), base=RETRY_BASE, cap=RETRY_CAP,
+                 max_attempts=RETRY_ATTEMPTS, max_elapsed=RETRY_BUDGET,
+                 breaker=None, sleep=time.sleep, clock=time.monotonic):
+        self.retry_on = retry_on
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        self.max_elapsed = max_elapsed
+        self.breaker = breaker
+        self.sleep = sleep
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Start a new run with the full budget and no failures counted."""
+        self.failed_attempts = 0
+        self.lost = 0.0
+        self._streak = 0
+
+    def backoff(self, streak: int):
+        """Seconds to wait after streak failures in a row, full jitter."""
+        return random.uniform(0, min(self.cap, self.base * 2 ** (streak - 1)))
+
+    def call(self, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), retrying failures within the budget.
+
+        Raises:
+            RetryError: the budget ran out, or an open breaker would not
+                        let a call through within what is left of it.
+        """
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                self._wait(self.breaker.retryAfter(), CircuitOpenError(
+                    f"circuit open for {self.breaker.retryAfter():.0f}s"))
+                continue
+
+            start = self.clock()
+            try:
+                result = fn(*args, **kwargs)
+            except self.retry_on as e:
+                self.lost += self.clock() - start
+                self.failed_attempts += 1
+                self._streak += 1
+                metrics.inc("fetch_failures_total", error=type(e).__name__)
+                if self.breaker is not None:
+                    self.breaker.recordFailure()
+                print(f"Attempt failed ({type(e).__name__}: {e}), "
+                      f"{self._streak} failed in a row")
+                if self._streak >= self.max_attempts:
+                    raise self._giveUp(
+                        f"gave up after {self._streak} failed attempts") from e
+                self._wait(self.backoff(self._streak), e)
+                continue
+
+            self._streak = 0
+            if self.breaker is not None:
+                self.breaker.recordSuccess()
+            return result
+
+    def _wait(self, seconds, error):
+        if self.lost + seconds > self.max_elapsed:
+            raise self._giveUp(
+                f"gave up after losing {self.lost:.0f}s to failures") from error
+        self.lost += seconds
+        self.sleep(seconds)
+
+    def _giveUp(self, message):
+        """End the run, so the next call() is tried with a fresh budget."""
+        self.reset()
+        return RetryError(message)
@@ -0,0 +1,71 @@
+import gzip
+from multiprocessing import Pool
+
+from lib.constants import SCAN_CHUNK_SIZE
+from lib import batch
+
+# First line of enwiki-*-all-titles-in-ns0 dumps is a column header.
+DUMP_HEADER = "page_title"
+
+
+def iterTitles(path: str):
+    """Yield page titles from an all-titles dump or any newline-delimited file.
+
+    Files ending in .gz are decompressed on the fly. Dump titles use
+    underscores in place of spaces, so those are swapped back.
+
+    Args:
+        path: String, path to the title file.
+    Yields:
+        String, one page title per line, skipping blanks and the dump header.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            title = line.rstrip("\n")
+            if title and title != DUMP_HEADER:
+                yield title.replace("_", " ").strip()
+
+
+def scanTitles(path: str, out_path: str, workers=None, chunk_size=SCAN_CHUNK_SIZE):
+    """Check every title in a dump for TMNT meter across a process pool.
+
+    Titles are streamed in chunks so the whole dump never sits in memory.
+    Matches are written to out_path, one per line, as soon as their chunk
+    comes back from the pool.
+
+    Args:
+        path: String, path to the title dump to scan.
+        out_path: String, path of the file matches are written to.
+        workers: Integer or None, pool size. None uses every CPU.
+        chunk_size: Integer, titles handed to a worker at a time.
+    Returns:
+        Tuple of (titles scanned, matches found).
+    """
+    scanned = 0
+    found = 0
+    with Pool(workers) as pool, open(out_path, "w", encoding="utf-8") as out:
+        chunks = _chunked(iterTitles(path), chunk_size)
+        for count, matches in pool.imap(_scanChunk, chunks):
+            scanned += count
+            found += len(matches)
+            for title in matches:
+                out.write(title + "\n")
+            out.flush()
+    return scanned, found
+
+
+def _scanChunk(titles):
+    matched, _ = batch.classifyBatch(titles)
+    return len(titles), [title for title, ok in zip(titles, matched) if ok]
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
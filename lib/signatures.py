@@ -0,0 +1,222 @@
+"""SQLite index of every title's stress signature.
+
+Classifying a title works out its stresses and then throws them away, so
+every new question (a new meter, all 8-syllable titles, a changed ban list)
+used to mean rescanning the whole dump. The index keeps each title's full
+signature (see words.titleSignature()), its syllable count and why TMNT
+rejected it, so those questions become queries:
+
+- query(pattern) matches a lib/meter.py pattern against stored signatures,
+  narrowed first by the pattern's syllable bounds through an index;
+- query(regex, regex=True) does the same with a Python regular expression;
+- rows are re-checked against the current ban lists as they are read, so
+  editing a ban list never needs a rebuild.
+
+Signatures use each word's first pronunciation, so a meter query can miss a
+title that matchTitle() would match through a rarer pronunciation.
+
+applyUpdates() keeps the index in step with Wikipedia from a file of changes,
+one title per line: a sign, a tab, then the title, "+" to add or refresh it
+and "-" to remove it. A line without a sign and a tab is added as it is.
+"""
+import re
+import sqlite3
+from multiprocessing import Pool
+
+from lib.constants import INDEX_PATH, SCAN_CHUNK_SIZE
+from lib.meter import Meter
+from lib import scan
+from lib import words
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    title TEXT PRIMARY KEY,
+    signature TEXT,
+    syllables INTEGER,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS titles_syllables ON titles (syllables, signature);
+CREATE INDEX IF NOT EXISTS titles_reason ON titles (reason);
+"""
+
+
+class SignatureIndex:
+    """Title to stress signature index in one SQLite file.
+
+    Args:
+        path: String, SQLite database file, created if missing.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+    def add(self, rows):
+        """Insert or replace (title, signature, syllables, reason) rows.
+
+        Returns:
+            Integer, rows written.
+        """
+        with self._transaction():
+            cursor = self._db.executemany(
+                "INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def remove(self, titles):
+        """Delete titles, returning how many were indexed."""
+        with self._transaction():
+            cursor = self._db.executemany(
+                "DELETE FROM titles WHERE title = ?", ((t,) for t in titles))
+        return cursor.rowcount
+
+    def get(self, title: str):
+        """Return (signature, syllables, reason) for a title, or None."""
+        return self._db.execute(
+            "SELECT signature, syllables, reason FROM titles WHERE title = ?",
+            (title,)).fetchone()
+
+    def query(self, pattern: str, regex=False, syllables=None,
+              skip_banned=True, limit=None):
+        """Yield titles whose signature matches pattern.
+
+        Args:
+            pattern: String, a lib/meter.py meter pattern, or a Python
+                     regular expression if regex. Either must match the
+                     whole signature.
+            regex: Bool, treat pattern as a Python regular expression.
+            syllables: Integer or None, only titles with this many syllables.
+            skip_banned: Bool, leave out titles the current ban lists ban.
+            limit: Integer or None, stop after this many titles.
+        Yields:
+            Tuples of (title, signature).
+        """
+        if regex:
+            compiled = re.compile(pattern)
+            matches = lambda signature: compiled.fullmatch(signature) is not None
+            low, high = 0, None
+        else:
+            meter = Meter(pattern)
+            matches = meter.matches
+            low, high = meter.min_syllables or 0, meter.max_syllables
+        if syllables is not None:
+            low = max(low, syllables)
+            high = syllables if high is None else min(high, syllables)
+
+        sql = "SELECT title, signature FROM titles WHERE syllables >= ?"
+        params = [low]
+        if high is not None:
+            sql += " AND syllables <= ?"
+            params.append(high)
+        found = 0
+        for title, signature in self._db.execute(sql, params):
+            if not matches(signature):
+                continue
+            if skip_banned and words.containsBanned(title):
+                continue
+            yield title, signature
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def reasons(self):
+        """Return {reason: titles} over the index, None meaning matched."""
+        return dict(self._db.execute(
+            "SELECT reason, COUNT(*) FROM titles GROUP BY reason"))
+
+    def _transaction(self):
+        # isolation_level=None leaves transactions to us; a bulk write in
+        # one transaction is far faster than a commit per row.
+        return _Transaction(self._db)
+
+
+class _Transaction:
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN")
+
+    def __exit__(self, exc_type, *exc):
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def signatureRow(title: str):
+    """Return the (title, signature, syllables, reason) row for a raw title.
+
+    reason is TMNT's: None if it matches, else "banned", "oov", "length" or
+    "pattern". signature and syllables are None if a word has no stresses.
+    """
+    tokens = words.tokenize(title)
+    signature = words.titleSignature(tokens)
+    syllables = None if signature is None else len(signature)
+    if words.containsBanned(tokens):
+        reason = "banned"
+    else:
+        reason = words.matchTitle(tokens, words.TMNT).reason
+    return title, signature, syllables, reason
+
+
+def buildIndex(dump_path: str, index_path=INDEX_PATH, workers=None,
+               chunk_size=SCAN_CHUNK_SIZE):
+    """Index every title in a dump across a process pool.
+
+    Args:
+        dump_path: String, all-titles dump or newline-delimited file, see
+                   scan.iterTitles().
+        index_path: String, SQLite index file, added to if it exists.
+        workers: Integer or None, pool size. None uses every CPU.
+        chunk_size: Integer, titles handed to a worker at a time.
+    Returns:
+        Integer, titles indexed.
+    """
+    indexed = 0
+    with SignatureIndex(index_path) as index, Pool(workers) as pool:
+        chunks = scan._chunked(scan.iterTitles(dump_path), chunk_size)
+        for rows in pool.imap(_signatureRows, chunks):
+            indexed += index.add(rows)
+    return indexed
+
+
+def applyUpdates(index, path: str):
+    """Apply a file of "+\tTitle" and "-\tTitle" lines to an index.
+
+    The sign needs the tab after it, so titles like "+44 (band)" or "-ism"
+    on a line of their own are added as they are, like every other line
+    without a sign. MediaWiki titles can't contain tabs. Blank lines are
+    skipped.
+
+    Returns:
+        Tuple of (titles added or refreshed, titles removed).
+    """
+    added = []
+    removed = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            op, tab, title = line.rstrip("\n").partition("\t")
+            if not tab or op not in ("+", "-"):
+                op, title = "+", line
+            title = title.strip()
+            if not title:
+                continue
+            (removed if op == "-" else added).append(title)
+    index.remove(removed)
+    index.add(_signatureRows(added))
+    return len(added), len(removed)
+
+
+def _signatureRows(titles):
+    return [signatureRow(title) for title in titles]
@@ -0,0 +1,161 @@
+"""Pluggable sources of random title batches for the search loop.
+
+A source is called with no arguments and returns a list of titles, like
+main.fetchTenTitles. There are three kinds:
+
+- LiveSource wraps a live fetch, main.fetchTenTitles.
+- Recorder wraps another source and appends each batch it returns to a
+  recording, with the time the fetch started and how long it took.
+- Replayer serves a recording back, as fast as possible or paced so each batch
+  arrives no earlier than it did when recorded.
+
+Recordings are tab-separated lines, gzipped if the path ends in .gz:
+
+    <unix time fetch started>\t<seconds it took>\t<title>\t<title>...
+
+MediaWiki titles can't contain tabs or newlines. Replayer reads one line at a
+time, so recordings of millions of titles don't have to fit in memory.
+"""
+import gzip
+import time
+
+from lib import metrics
+
+
+class SourceExhausted(Exception):
+    """A recording has no batches left."""
+
+
+class TitleSource:
+    """Base class of title sources, also usable as a context manager."""
+
+    def __call__(self):
+        return self.fetch()
+
+    def fetch(self):
+        """Return the next batch of titles."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LiveSource(TitleSource):
+    """Titles fetched from Wikipedia.
+
+    Args:
+        fetch: Function returning a batch of titles, main.fetchTenTitles for
+               the bot.
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+
+    def fetch(self):
+        return self._fetch()
+
+
+class Recorder(TitleSource):
+    """Write every batch another source returns to a recording.
+
+    Args:
+        source: TitleSource or function, where batches come from.
+        path: String, recording to write, gzipped if it ends in .gz.
+        append: Bool, add to an existing recording instead of replacing it.
+        clock: Function returning the current unix time.
+    """
+
+    def __init__(self, source, path: str, append=False, clock=time.time):
+        self.source = source
+        self.batches = 0
+        self.titles = 0
+        self._clock = clock
+        self._file = _open(path, "at" if append else "wt")
+
+    def fetch(self):
+        started = self._clock()
+        titles = self.source()
+        took = self._clock() - started
+        self._file.write("\t".join(
+            [f"{started:.3f}", f"{took:.4f}", *titles]) + "\n")
+        self.batches += 1
+        self.titles += len(titles)
+        return titles
+
+    def close(self):
+        self._file.close()
+
+
+class Replayer(TitleSource):
+    """Serve the batches of a recording in order.
+
+    Args:
+        path: String, recording to read.
+        paced: Bool, hand each batch over no earlier, relative to the first,
+               than it arrived when recorded, instead of at once. Time the
+               caller spends between fetches counts towards the wait.
+        speed: Float, paced replay runs this many times faster than recorded.
+        loop: Bool, start over at the end instead of raising SourceExhausted.
+        clock: Function returning seconds on a monotonic clock.
+        sleep: Function sleeping for a number of seconds.
+    """
+
+    def __init__(self, path: str, paced=False, speed=1.0, loop=False,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.path = path
+        self.paced = paced
+        self.speed = speed
+        self.loop = loop
+        self.batches = 0
+        self.titles = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._file = None
+        self._start = None
+
+    def fetch(self):
+        with metrics.timed("fetch"):
+            started, took, titles = self._next()
+            if self.paced:
+                if self._start is None:
+                    self._start = (self._clock(), started)
+                replay_start, recorded_start = self._start
+                due = replay_start + (started + took - recorded_start) / self.speed
+                wait = due - self._clock()
+                if wait > 0:
+                    self._sleep(wait)
+        self.batches += 1
+        self.titles += len(titles)
+        return titles
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _next(self):
+        for _ in range(2):
+            if self._file is None:
+                self._file = _open(self.path, "rt")
+            line = self._file.readline()
+            if line:
+                started, took, *titles = line.rstrip("\n").split("\t")
+                return float(started), float(took), titles
+            self.close()
+            if not self.loop or self.batches == 0:
+                break
+            # Recorded times start over too, so pace from here.
+            self._start = None
+        raise SourceExhausted(f"{self.path} has no batches left "
+                              f"after {self.batches}")
+
+
+def _open(path, mode):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, mode, encoding="utf-8")
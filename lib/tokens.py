@@ -0,0 +1,120 @@
+"""Split a title into the normalized words every check shares.
+
+Matching a title used to take three passes over it: cleanStr() made ten
+str.replace() calls, the ban filter lowercased and split it again, and the
+stress lookup split it a third time. tokenize() does it once:
+
+- ASCII titles, nearly all of them, are just lowercased;
+- anything else is NFKD-decomposed and stripped of combining marks, so
+  "Café" and "Zürich" become "cafe" and "zurich", with the few letters NFKD
+  leaves alone (ø, æ, ł...) folded by hand;
+- one translate() then deletes punctuation, turns dashes into spaces and
+  curly apostrophes into straight ones, before a single split(). ASCII
+  titles are translated as bytes, which is several times faster than
+  str.translate() with its per-character dict lookups.
+
+Abbreviations on PRONUNCIATION_OVERRIDES, like "U.S.", are kept whole, dots
+and all, so the lexicon finds their override.
+
+The result holds the folded lowercase title, for ban phrases, and the words,
+for ban words, numerals and the lexicon.
+"""
+import unicodedata
+from typing import NamedTuple
+
+from lib.constants import PRONUNCIATION_OVERRIDES
+
+# Deleted, or swapped for a space, before splitting into words. The first ten
+# deletions and the hyphen are what cleanStr() has always done.
+_DELETE = "()[]{},:;." + "!?\"“”„«»"
+_SPACE = "-/‐‑‒–—―_"
+_APOSTROPHES = "‘’ʼ′`"
+# Letters NFKD doesn't decompose into ASCII.
+_LETTERS = {"ø": "o", "æ": "ae", "œ": "oe", "ł": "l", "đ": "d", "ð": "d",
+            "þ": "th", "ı": "i", "ß": "ss"}
+
+TRANSLATION = str.maketrans(
+    {**dict.fromkeys(_DELETE), **dict.fromkeys(_SPACE, " "),
+     **dict.fromkeys(_APOSTROPHES, "'"), "&": " and "})
+_FOLD = str.maketrans(_LETTERS)
+# Overridden words with dots in them, and the punctuation still stripped
+# from around them.
+_KEEP = frozenset(word.lower() for word, _ in PRONUNCIATION_OVERRIDES
+                  if "." in word)
+_EDGES = _DELETE.replace(".", "")
+
+# The ASCII part of TRANSLATION, bar "&", for bytes.translate().
+_ASCII_DELETE = "".join(c for c in _DELETE if c.isascii()).encode("ascii")
+_ASCII_TABLE = bytes.maketrans(
+    "".join(c for c in _SPACE + _APOSTROPHES if c.isascii()).encode("ascii"),
+    "".join(" " if c in _SPACE else "'"
+            for c in _SPACE + _APOSTROPHES if c.isascii()).encode("ascii"))
+
+
+class Tokens(NamedTuple):
+    """A title split into normalized words.
+
+    Attributes:
+        title: String, the title as given.
+        lowered: String, the title lowercased and folded to ASCII where it
+                 can be, punctuation kept.
+        words: Tuple of lowercase words, see tokenize().
+    """
+
+    title: str
+    lowered: str
+    words: tuple
+
+
+_new = tuple.__new__
+
+
+def fold(text: str):
+    """Lowercase text and fold accented letters to plain ones.
+
+    >>> fold('Zürich Café Øresund')
+    'zurich cafe oresund'
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed
+                   if not unicodedata.combining(char)).lower().translate(_FOLD)
+
+
+def tokenize(title: str):
+    """Split a raw title into lowercase words in a single pass.
+
+    >>> tokenize('Teenage Mutant Ninja-Turtles (Café)').words
+    ('teenage', 'mutant', 'ninja', 'turtles', 'cafe')
+
+    >>> tokenize('Ain’t It Fun & Games').words
+    ("ain't", 'it', 'fun', 'and', 'games')
+
+    Args:
+        title: String, title of a wikipedia page.
+    Returns:
+        Tokens.
+    """
+    lowered = fold(title)
+    if "." in lowered and _KEEP:
+        return _new(Tokens, (title, lowered, _keepOverrides(lowered)))
+    if lowered.isascii() and "&" not in lowered:
+        spaced = lowered.encode("ascii").translate(
+            _ASCII_TABLE, _ASCII_DELETE).decode("ascii")
+    else:
+        spaced = lowered.translate(TRANSLATION)
+    # tuple.__new__ skips the NamedTuple constructor's Python-level call.
+    return _new(Tokens, (title, lowered, tuple(spaced.split())))
+
+
+def _keepOverrides(lowered: str):
+    """Split like tokenize(), keeping words in _KEEP whole."""
+    kept = []
+    for part in lowered.split():
+        word = part.strip(_EDGES)
+        if word in _KEEP:
+            kept.append(word)
+        else:
+            kept.extend(part.translate(TRANSLATION).split())
+    return tuple(kept)
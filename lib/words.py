@@ -1,15 +1,63 @@
-import pronouncing
 import urllib
-import re
-
+import time
+from dataclasses import dataclass
+
+from lib import banned
+from lib import estimate
+from lib import lexicon
+from lib import metrics
+from lib import numerals
+from lib.tokens import TRANSLATION, Tokens, tokenize
 from lib.constants import (
-    BANNED_WORDS,
-    BANNED_PHRASES,
-    CHARS_ONLY,
-    PRONUNCIATION_OVERRIDES,
-    TMNT_STRESSES,
+    MAX_PRONUNCIATIONS,
+    TMNT_METER,
 )
-from num2words import num2words as n2w
+from lib.meter import DEAD, Meter, MeterSet, getMeters
+
+TMNT = Meter(TMNT_METER)
+
+# Looked up once here, these run for every title classified.
+_TOKENIZE_SECONDS = metrics.histogram("stage_seconds", stage="tokenize")
+_BAN_SECONDS = metrics.histogram("stage_seconds", stage="ban_filter")
+_LOOKUP_SECONDS = metrics.histogram("stage_seconds", stage="stress_lookup")
+_METER_SECONDS = metrics.histogram("stage_seconds", stage="meter_match")
+_MATCHED = metrics.counter("titles_matched_total")
+_ESTIMATED = metrics.counter("words_estimated_total")
+_REJECTED = {reason: metrics.counter("titles_rejected_total", reason=reason)
+             for reason in ("banned", "oov", "length", "pattern")}
+
+
+@dataclass
+class MatchResult:
+    """Outcome of matching one title against a meter.
+
+    Attributes:
+        matched: Bool, whether the title fits the meter.
+        stresses: String, stresses of the chosen reading of the title, or
+                  of the reading that got furthest before rejection.
+        syllables: Integer, syllables fed to the meter automaton, over
+                   every pronunciation tried.
+        lookups: Integer, lexicon lookups done.
+        words: Integer, words in the title.
+        reason: String or None, why the title was rejected: "oov",
+                "length" or "pattern".
+        meters: Frozenset of the names of every meter the title fits.
+        variants: Tuple of the stresses chosen for each word looked up.
+        estimated: Integer, words whose stresses were guessed by
+                   lib/estimate.py because the lexicon lacks them.
+        lookup_seconds: Float, time spent in lexicon lookups.
+    """
+
+    matched: bool
+    stresses: str
+    syllables: int
+    lookups: int
+    words: int
+    reason: str = None
+    meters: frozenset = frozenset()
+    variants: tuple = ()
+    estimated: int = 0
+    lookup_seconds: float = 0.0
 
 
 def isTMNT(title: str):
@@ -24,39 +72,193 @@ def isTMNT(title: str):
     >>> isTMNT('Romeo, Romeo, wherefore art thou, Romeo?')
     False
     """
-    if containsBanned(title):
+    start = time.perf_counter()
+    tokens = tokenize(title)
+    tokenized = time.perf_counter()
+    banned_title = containsBanned(tokens)
+    _TOKENIZE_SECONDS.observe(tokenized - start)
+    _BAN_SECONDS.observe(time.perf_counter() - tokenized)
+    if banned_title:
+        _REJECTED["banned"].inc()
         return False
 
-    title = cleanStr(title)
-    title_stresses = getTitleStresses(title)
+    result = matchTitle(tokens, TMNT)
+    if result.matched:
+        _MATCHED.inc()
+    else:
+        _REJECTED[result.reason].inc()
+    return result.matched
 
-    if (not title_stresses) or (len(title_stresses) != 8):
-        return False
 
-    return True if TMNT_STRESSES.match(title_stresses) else False
+def classify(title: str):
+    """Return the set of registered meters a Wikipedia page title fits.
 
+    The title is tokenized and looked up once, however many meters are
+    registered (see meter.registerMeter()).
 
-def containsBanned(title: str):
-    """Return True if banned words or phrases in string.
+    >>> sorted(classify('Teenage Mutant Ninja Turtles'))
+    ['tmnt']
 
-    This implementation is slow, but is was fast to write and I don't care about
-    speed for this script.
+    Args:
+        title: String, title of a wikipedia page.
+    Returns:
+        Set of meter names, empty if the title fits none or is banned.
     """
+    tokens = tokenize(title)
+    if containsBanned(tokens):
+        return set()
 
-    def _containsBannedWord(title: str):
-        for word in title.split():
-            word = CHARS_ONLY.sub("", word.lower())
-            if word in BANNED_WORDS:
-                return True
-        return False
+    return set(matchTitle(tokens, getMeters()).meters)
+
+
+def matchTitle(title, meter: MeterSet = TMNT):
+    """Stream a cleaned title's syllables through a meter, stopping early.
+
+    Words are looked up one at a time and each syllable advances the meter's
+    automaton, so a title is rejected on the first syllable that can't fit
+    and the words after it are never looked up.
+
+    Every pronunciation of every word is tried. Rather than expanding each
+    combination of variants, the matcher keeps the set of automaton states
+    reachable so far, each with the first variant path that reached it. Paths
+    meeting in the same state are interchangeable from then on, so the work
+    per word is bounded by (meter states x MAX_PRONUNCIATIONS), however many
+    variants the words before it had.
+
+    >>> matchTitle('Teenage Mutant Ninja Turtles').matched
+    True
+
+    >>> result = matchTitle('Adventure Time with Finn and Jake')
+    >>> result.reason, result.lookups, result.words
+    ('pattern', 1, 6)
+
+    Args:
+        title: Tokens from tokenize(), or a string already passed through
+               cleanStr().
+        meter: Meter or MeterSet to match against, TMNT by default.
+    Returns:
+        MatchResult with the outcome and per-title stats.
+    """
+    start = time.perf_counter()
+    result = _matchTitle(_titleWords(title), meter)
+    elapsed = time.perf_counter() - start
+    _LOOKUP_SECONDS.observe(result.lookup_seconds)
+    _METER_SECONDS.observe(elapsed - result.lookup_seconds)
+    return result
+
+
+def _matchTitle(title_words, meter):
+    # Reachable state -> stresses chosen for each word looked up so far.
+    frontier = {meter.start: ()}
+    syllables = 0
+    lookups = 0
+    estimated = 0
+    lookup_seconds = 0.0
+    for i, word in enumerate(title_words):
+        unread = len(title_words) - i - 1
+        lookups += 1
+        lookup_start = time.perf_counter()
+        variants = wordStresses(word)
+        if not variants:
+            variants = estimate.estimateStresses(word)
+            if variants:
+                estimated += 1
+                _ESTIMATED.inc()
+        lookup_seconds += time.perf_counter() - lookup_start
+        if not variants:
+            path = next(iter(frontier.values()))
+            return MatchResult(False, "".join(path), syllables, lookups,
+                               lookups + unread, "oov", variants=path,
+                               estimated=estimated,
+                               lookup_seconds=lookup_seconds)
+
+        reached = {}
+        furthest = ""
+        for state, path in frontier.items():
+            for variant in variants[:MAX_PRONUNCIATIONS]:
+                nxt = state
+                for j, syllable in enumerate(variant):
+                    syllables += 1
+                    nxt = meter.step(nxt, syllable)
+                    if nxt == DEAD:
+                        attempt = "".join(path) + variant[:j + 1]
+                        if len(attempt) > len(furthest):
+                            furthest = attempt
+                        break
+                else:
+                    if nxt not in reached:
+                        reached[nxt] = path + (variant,)
+        if not reached:
+            return MatchResult(False, furthest, syllables, lookups,
+                               lookups + unread,
+                               _rejectReason(meter, len(furthest)),
+                               estimated=estimated,
+                               lookup_seconds=lookup_seconds)
+        frontier = reached
+
+    for state, path in frontier.items():
+        meters = meter.accepted(state)
+        if meters:
+            # Another reachable state may accept different meters.
+            meters = frozenset().union(*map(meter.accepted, frontier))
+            return MatchResult(True, "".join(path), syllables, lookups,
+                               lookups, meters=meters, variants=path,
+                               estimated=estimated,
+                               lookup_seconds=lookup_seconds)
+
+    path = next(iter(frontier.values()))
+    return MatchResult(False, "".join(path), syllables, lookups, lookups,
+                       _rejectReason(meter, len("".join(path)), ended=True),
+                       variants=path, estimated=estimated,
+                       lookup_seconds=lookup_seconds)
+
+
+def titleSignature(title: str):
+    """Return the stresses of a whole title, however it matches any meter.
+
+    Each word contributes its first, most common, pronunciation, estimated
+    if the lexicon lacks it (see lib/estimate.py).
+
+    >>> titleSignature('Teenage Mutant Ninja Turtles')
+    '12101010'
+
+    Args:
+        title: Tokens from tokenize(), or a string already passed through
+               cleanStr().
+    Returns:
+        String of stresses, or None if any word has no stresses at all.
+    """
+    signature = []
+    for word in _titleWords(title):
+        stresses = wordStresses(word) or estimate.estimateStresses(word)
+        if not stresses:
+            return None
+        signature.append(stresses[0])
+    return "".join(signature)
+
+
+def _titleWords(title):
+    return title.words if isinstance(title, Tokens) else title.split()
 
-    def _containsBannedPhrase(title: str):
-        for phrase in BANNED_PHRASES:
-            if phrase in title.lower():
-                return True
-        return False
 
-    return _containsBannedWord(title) or _containsBannedPhrase(title)
+def _rejectReason(meter: MeterSet, syllables: int, ended: bool = False):
+    if meter.max_syllables is not None and syllables > meter.max_syllables:
+        return "length"
+    if ended and meter.min_syllables is not None and syllables < meter.min_syllables:
+        return "length"
+    return "pattern"
+
+
+def containsBanned(title):
+    """Return True if banned words or phrases in string.
+
+    The ban lists are files under assets/banned, see lib/banned.py. title may
+    also be the Tokens of one, saving the filter tokenizing it again.
+
+    >>> containsBanned('Teenage Mutant Rugby Player')
+    True
+    """
+    return banned.containsBanned(title)
 
 
 def getTitleStresses(title: str):
@@ -79,64 +281,59 @@ def getTitleStresses(title: str):
         if len(title_stresses) >= 8:
             return None
         word = title_words.pop(0)
-        word_stresses = getWordStresses(word)
-        # If word was a long number, it may have been parsed into several words.
-        if isinstance(word_stresses, list):
-            title_words = word_stresses + title_words
-        else:
-            title_stresses += getWordStresses(word)
+        title_stresses += getWordStresses(word)
 
     return title_stresses
 
 
-def getWordStresses(word: str):
-    word = numbersToWords(word)
-    if " " in word:
-        return word.split()
+def wordStresses(word: str):
+    """Return every stress string for a word or numeral, or None if unknown.
+
+    Numerals are read aloud, see lib/numerals.py, and the lexicon has
+    everything else, overrides included (see lexicon.buildLexicon()).
 
-    for override, stresses in PRONUNCIATION_OVERRIDES:
-        if word.lower() == override.lower():
+    >>> wordStresses('21st')
+    ('101',)
+    """
+    if word[:1].isdigit():
+        stresses = numerals.numeralStresses(word)
+        if stresses is not None:
             return stresses
+    return lexicon.lookup(word)
+
 
-    phones = pronouncing.phones_for_word(word)
-    if not phones:
+def getWordStresses(word: str):
+    stresses = wordStresses(word) or estimate.estimateStresses(word)
+    if not stresses:
         # Hacky way of discarding candidate title
         return "1111111111"
-    
-    stresses = pronouncing.stresses(phones[0])
-    return stresses
+
+    return stresses[0]
 
 
 def numbersToWords(word):
-    ordinal_number_endings = ("nd", "rd", "st", "th")
-    if word.isdigit():
-        if len(word) == 4:
-            try:
-                word = n2w(word, to="year")
-            except Exception:
-                # Hacky way of discarding candidate title
-                return "1111111111"
-        else:
-            try:
-                word = n2w(word)
-            except Exception:
-                # Hacky way of discarding candidate title
-                return "1111111111"
-    if word[:-2].isdigit() and word[-2:] in ordinal_number_endings:
-        word = word[:-2]
-        try:
-            word = n2w(word, to="ordinal")
-        except Exception:
-            # Hacky way of discarding candidate title
-            return "1111111111"
-
-    return word
+    """Spell out a numeral the way it is read, or return word unchanged.
+
+    >>> numbersToWords('2019')
+    'twenty nineteen'
+
+    Stresses come from numerals.numeralStresses() instead, this is only
+    for showing how a numeral was read.
+    """
+    if not numerals.isNumeral(word):
+        return word
+    spoken = numerals.spokenForm(word)
+    if spoken is None:
+        # Hacky way of discarding candidate title
+        return "1111111111"
+    return spoken
 
 
 def cleanStr(s: str):
     """Remove characters that the pronouncing dictionary doesn't like.
 
-    This isn't very efficient, but it's readable at least. :-)
+    Matching uses tokenize() instead, which also lowercases and folds
+    accents, this keeps the title's case for showing it.
 
     >>> cleanStr('fooBar123')
     'fooBar123'
@@ -152,16 +349,7 @@ def cleanStr(s: str):
     Returns:
         String without offending characters
     """
-    DEL_CHARS = ["(", ")", "[", "]", "{", "}", ",", ":", ";", "."]
-    SWAP_CHARS = [("-", " ")]
-
-    for char in DEL_CHARS:
-        s = s.replace(char, "")
-
-    for char, replacement in SWAP_CHARS:
-        s = s.replace(char, replacement)
-
-    return s
+    return s.translate(TRANSLATION)
 
 
 def getWikiUrl(title: str):
@@ -1,46 +1,262 @@
 #!/usr/bin/env python3
 from datetime import datetime
-import os
+import argparse
 import sys
 import time
-import wikipedia
 
-from lib.constants import BACKOFF, MAX_ATTEMPTS, MAX_STATUS_LEN, TIMEOUT_BACKOFF
-from lib import images
-from lib import mastodon
-from lib import twitter
+from lib.constants import (
+    BACKOFF,
+    BUNDLE_PATH,
+    ENRICH_CACHE_PATH,
+    ENRICH_POOL,
+    ESTIMATOR_PATH,
+    HARVEST_TARGET,
+    INDEX_PATH,
+    LEXICON_PATH,
+    MAX_ATTEMPTS,
+    MAX_STATUS_LEN,
+    METRICS_PATH,
+    POST_INTERVAL,
+    POST_JITTER,
+    QUEUE_PATH,
+)
+from lib import candidates
+from lib import estimate
+from lib import history
+from lib import lexicon
+from lib import metrics
+from lib import retry
 from lib import words
 
+# Everything else, numpy, aiohttp, wikipedia, requests and Pillow included, is
+# imported by the functions using it, so a run only pays for what it needs.
+# Check with `python -m bench.startup`.
+_fetch_policy = None
 
-def main():
+
+def main(async_fetch=False, record=None):
+    print(f"[{datetime.now()}] Start")
+    if async_fetch:
+        title = searchForTMNTAsync(MAX_ATTEMPTS * 10)
+    else:
+        with titleSource(record) as source:
+            title = searchForTMNT(MAX_ATTEMPTS, BACKOFF, source)
+    postTitle(title)
+
+
+def postQueued(queue_path=QUEUE_PATH, enrich_path=ENRICH_CACHE_PATH):
+    """Post the best ranked harvested title, searching live if none are queued."""
     print(f"[{datetime.now()}] Start")
-    title = searchForTMNT(MAX_ATTEMPTS, BACKOFF)
-    logo = images.getLogo(words.addPadding(title))
+    from lib import enrich
+
+    with candidates.CandidateQueue(queue_path) as queue, \
+            enrich.PageInfoCache(enrich_path) as cache:
+        postNext(queue, enrich.Enricher(cache=cache))
+
+
+def postNext(queue, enricher, search=True):
+    """Post the best ranked title in the queue.
+
+    Args:
+        CandidateQueue: queue, harvested titles.
+        Enricher: enricher, looks up the pages behind titles.
+        Bool: search, search live if the queue is empty, which exits if
+              nothing is found.
+    Returns:
+        Bool: False if the queue was empty and nothing was posted.
+    """
+    title = pickCandidate(queue, enricher)
+    if title is None:
+        if not search:
+            print(f"[{datetime.now()}] Candidate queue is empty.")
+            return False
+        print("Candidate queue is empty, searching live.")
+        title = searchForTMNT(MAX_ATTEMPTS, BACKOFF)
+        queue.add(title)
+    postTitle(title)
+    queue.markPosted(title)
+    print(f"{queue.pending()} candidates left in queue.")
+    return True
+
+
+def pickCandidate(queue, enricher, pool=ENRICH_POOL):
+    """Return the queued title most worth posting, or None if none are left.
+
+    The oldest pool titles are looked up and ranked, see lib/enrich.py.
+    Titles posted before are marked posted, and pages not worth posting,
+    like disambiguation pages and stubs, are dropped from the queue.
+
+    Args:
+        CandidateQueue: queue, harvested titles.
+        Enricher: enricher, looks up the pages behind titles.
+        Integer: pool, titles ranked at a time.
+    Returns:
+        String or None: the title to post. The oldest title, unranked, if
+                        the pages couldn't be looked up.
+    """
+    from lib import enrich
+
+    while True:
+        titles = []
+        for title in queue.pendingTitles(pool):
+            if history.wasPosted(title):
+                queue.markPosted(title)
+            else:
+                titles.append(title)
+        if not titles:
+            if not queue.pending():
+                return None
+            continue
+
+        try:
+            infos = enricher.enrich(titles)
+        except enrichErrors() as e:
+            print(f"Couldn't look up candidate pages ({type(e).__name__}: "
+                  f"{e}), taking the oldest.")
+            return titles[0]
+        ranked, rejected = enrich.rankCandidates(titles, infos)
+        for title, reason in rejected.items():
+            print(f"Dropping {title} ({reason})")
+            queue.drop(title, reason)
+        if ranked:
+            return ranked[0]
+
+
+def harvest(target=HARVEST_TARGET, queue_path=QUEUE_PATH, backoff=BACKOFF,
+            record=None):
+    """Fill the candidate queue until target titles are waiting to be posted.
+
+    Args:
+        Integer: target, stop once this many unposted titles are queued.
+        String: queue_path, SQLite candidate queue file.
+        Integer: backoff, seconds to wait between each fetch.
+        String: record, recording to append fetched batches to, if any.
+    """
+    with candidates.CandidateQueue(queue_path) as queue, \
+            titleSource(record) as source:
+        while harvestBatch(queue, target, source):
+            time.sleep(backoff)
+        print(f"[{datetime.now()}] {queue.pending()} candidates queued.")
+
+
+def harvestBatch(queue, target=HARVEST_TARGET, source=None):
+    """Fetch one batch of titles and queue the new TMNT ones.
+
+    Args:
+        CandidateQueue: queue, where harvested titles go.
+        Integer: target, do nothing once this many titles are waiting.
+        Function: source, returns a batch of titles, fetchTenTitles if None.
+    Returns:
+        Bool: False if the queue was already full.
+    """
+    from lib import batch
+
+    if queue.pending() >= target:
+        return False
+    titles = (source or fetchTenTitles)()
+    matched, _ = batch.classifyBatch(titles)
+    for title, is_tmnt in zip(titles, matched):
+        if is_tmnt and not history.wasPosted(title) and queue.add(title):
+            print(f"[{datetime.now()}] Harvested: {title}")
+    return True
+
+
+def runDaemon(interval=POST_INTERVAL, jitter=POST_JITTER, target=HARVEST_TARGET,
+              queue_path=QUEUE_PATH, post_now=False, metrics_path=METRICS_PATH,
+              enrich_path=ENRICH_CACHE_PATH):
+    """Stay running, posting every interval and harvesting in between.
+
+    Args:
+        Float: interval, average seconds between posts.
+        Float: jitter, most seconds a post time is moved either way.
+        Integer: target, harvest until this many titles are queued.
+        String: queue_path, SQLite candidate queue file.
+        Bool: post_now, post once straight away.
+        String: metrics_path, metrics are written here after every post.
+        String: enrich_path, page lookup cache.
+    """
+    from lib import daemon
+    from lib import enrich
+
+    print(f"[{datetime.now()}] Starting daemon, posting every {interval}s "
+          f"+/- {jitter}s")
+    with candidates.CandidateQueue(queue_path) as queue, \
+            enrich.PageInfoCache(enrich_path) as cache:
+        enricher = enrich.Enricher(cache=cache)
+
+        def post():
+            # An empty queue waits for the harvest rather than searching.
+            posted = postNext(queue, enricher, search=False)
+            exportMetrics(metrics_path)
+            # Each post gets a fresh fetch retry budget.
+            getFetchPolicy().reset()
+            return posted
+
+        def harvest():
+            return harvestBatch(queue, target)
+
+        bot = daemon.Daemon(post, harvest, interval, jitter, BACKOFF, post_now)
+        bot.installSignalHandlers()
+        bot.warmUp()
+        bot.run()
+
+
+def renderQueued(queue_path=QUEUE_PATH, limit=None, workers=None):
+    """Pre-render logos for queued titles so posting only reads the cache."""
+    from lib import rendercache
+
+    with candidates.CandidateQueue(queue_path) as queue:
+        titles = queue.pendingTitles(limit)
+    rendered, cached = rendercache.renderBatch(titles, workers=workers)
+    print(f"[{datetime.now()}] Rendered {rendered} logos, {cached} already cached.")
+
+
+def postTitle(title: str):
+    """Render the logo for title and post both to every network."""
+    from lib import publish
+    from lib import rendercache
+
+    logo = rendercache.getLogo(title)
     status_text = "\n".join((title, words.getWikiUrl(title)))
 
     if len(status_text) > MAX_STATUS_LEN:
         status_text = title
 
-    _ = twitter.sendTweet(status_text, logo)
-    _ = mastodon.sendToot(status_text, logo)
+    results = publish.publish(status_text, logo)
+    for result in results:
+        outcome = f"posted {result.status_id}" if result.ok else result.error
+        print(f"{result.network}: {outcome} ({result.latency:.2f}s)")
 
-    os.remove(logo)
+    if not any(result.ok for result in results):
+        print(f"[{datetime.now()}] Failed to post: {title}\n=====")
+        sys.exit(1)
+    history.markPosted(title)
     print(f"[{datetime.now()}] Complete! Posted: {title}\n=====")
 
-def searchForTMNT(attempts=MAX_ATTEMPTS, backoff=BACKOFF):
+def searchForTMNT(attempts=MAX_ATTEMPTS, backoff=BACKOFF, source=None,
+                  isMatch=None):
     """Loop MAX_ATTEMPT times, searching for a TMNT meter wikipedia title.
 
     Args:
         Integer: attempts, retries remaining.
         Integer: backoff, seconds to wait between each loop.
+        Function: source, returns a batch of titles, fetchTenTitles if None.
+                  Any TitleSource from lib/sources.py will do.
+        Function: isMatch, title to bool, isNewTMNT if None.
     Returns:
         String or False: String of wikipedia title in TMNT meter, or False if
                          none found.
     """
+    from lib import sources
+
     for attempt in range(attempts):
         # print(f"\r{str(attempt * 10)} articles fetched...", end="")
         sys.stdout.flush()
-        title = checkTenPagesForTMNT()
+        try:
+            title = checkTenPagesForTMNT(source, isMatch)
+        except sources.SourceExhausted as e:
+            print(f"\n{e}")
+            break
 
         if type(title) == str and len(title) > 1:
             print(f"\nAfter {attempt * 10} pages, found match: {title}")
@@ -52,36 +268,387 @@ def searchForTMNT(attempts=MAX_ATTEMPTS, backoff=BACKOFF):
     sys.exit(1)
 
 
-def checkTenPagesForTMNT():
+def searchForTMNTAsync(max_titles):
+    """Search with several rate-limited API requests in flight at once.
+
+    Args:
+        Integer: max_titles, titles to check before giving up.
+    Returns:
+        String: wikipedia title in TMNT meter. Exits if none found.
+    """
+    import asyncio
+    from lib import fetch
+
+    title, stats = asyncio.run(
+        fetch.searchForTMNTAsync(max_titles, isMatch=isNewTMNT))
+    print(f"\nFetched {stats.titles} titles in {stats.requests} requests, "
+          f"{stats.titlesPerSecond():.1f} titles/s")
+    if title is None:
+        print(f"\nNo matches found.")
+        sys.exit(1)
+    print(f"Found match after {stats.timeToFirstMatch():.1f}s: {title}")
+    return title
+
+
+def checkTenPagesForTMNT(source=None, isMatch=None):
     """Get 10 random wiki titles, check if any of them isTMNT().
 
     We grab the max allowed Wikipedia page titles (10) using wikipedia.random().
     If any title is in TMNT meter, return the title. Otherwise, return False.
 
     Args:
-        None
+        Function: source, returns a batch of titles, fetchTenTitles if None.
+        Function: isMatch, title to bool, isNewTMNT if None.
     Returns:
         String or False: The TMNT compliant title, or False if none found.
     """
+    source = source or fetchTenTitles
+    isMatch = isMatch or isNewTMNT
+    for title in source():
+        if isMatch(title):
+            return title
+    return False
+
+
+def isNewTMNT(title: str):
+    """True if title is in TMNT meter and has never been posted."""
+    return words.isTMNT(title) and not history.wasPosted(title)
+
+
+def titleSource(record=None):
+    """Return the live title source, recording to record if given."""
+    from lib import sources
+
+    source = sources.LiveSource(fetchTenTitles)
+    if record:
+        source = sources.Recorder(source, record, append=True)
+    return source
+
+
+def simulateSearch(recording: str, paced=False, speed=1.0):
+    """Run the search loop over a recording, printing throughput and
+    time-to-match. Nothing is posted and posting history is ignored.
+
+    Args:
+        String: recording, written by --record, see lib/sources.py.
+        Bool: paced, replay at the recorded pace rather than flat out. The
+              recorded pace includes the backoff of the run that recorded it.
+        Float: speed, how many times faster than recorded to pace it.
+    Returns:
+        Dict: titles, matches, seconds, and match_seconds, the time each
+              match took to find.
+    """
+    from lib import sources
+
+    match_seconds = []
+    with sources.Replayer(recording, paced, speed) as source:
+        start = last = time.perf_counter()
+        while True:
+            try:
+                title = checkTenPagesForTMNT(source, words.isTMNT)
+            except sources.SourceExhausted:
+                break
+            if title:
+                now = time.perf_counter()
+                match_seconds.append(now - last)
+                last = now
+        seconds = time.perf_counter() - start
+
+    titles, matches = source.titles, len(match_seconds)
+    print(f"Replayed {titles} titles in {source.batches} batches, "
+          f"{seconds:.1f}s, {titles / seconds if seconds else 0:.0f} titles/s")
+    if matches:
+        ranked = sorted(match_seconds)
+        print(f"{matches} matches, one per {titles / matches:.0f} titles. "
+              f"Time to match: median {ranked[matches // 2]:.2f}s, "
+              f"p90 {ranked[matches * 9 // 10]:.2f}s, max {ranked[-1]:.2f}s")
+    else:
+        print("No matches found.")
+    return {"titles": titles, "matches": matches, "seconds": seconds,
+            "match_seconds": match_seconds}
+
+
+def fetchTenTitles(policy=None):
+    """Get 10 random wiki titles using wikipedia.random().
+
+    Failures are retried with backoff by policy, getFetchPolicy() if None,
+    picking up where the search left off. Exits once its budget runs out.
+    """
+    import wikipedia
+
+    policy = policy or getFetchPolicy()
     wikipedia.set_rate_limiting(True)
     try:
-        titles = wikipedia.random(10)
-    except wikipedia.exceptions.HTTPTimeoutError as e:
-        print(f"Wikipedia timout exception: {e}")
-        time.sleep(TIMEOUT_BACKOFF)
-        main()
-    except wikipedia.exceptions.WikipediaException as e:
-        print(f"Wikipedia exception: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Exception while fetching wiki titles: {e}")
+        return policy.call(_fetchRandom)
+    except retry.RetryError as e:
+        print(f"Giving up fetching wiki titles: {e} ({e.__cause__})")
         sys.exit(1)
 
-    for title in titles:
-        if words.isTMNT(title):
-            return title
-    return False
+
+def getFetchPolicy():
+    """Return the process-wide retry policy for title fetches."""
+    global _fetch_policy
+    if _fetch_policy is None:
+        _fetch_policy = retry.RetryPolicy(
+            retry_on=fetchErrors(), breaker=retry.CircuitBreaker())
+    return _fetch_policy
+
+
+def fetchErrors():
+    """Errors worth retrying a fetch for.
+
+    An error page instead of JSON shows up as a ValueError, and an API error
+    response as a KeyError.
+    """
+    import requests
+    import wikipedia
+
+    return (
+        wikipedia.exceptions.WikipediaException,
+        requests.exceptions.RequestException,
+        ValueError,
+        KeyError,
+    )
+
+
+def enrichErrors():
+    """Errors looking up candidate pages, which only cost them their ranking."""
+    import requests
+
+    return (
+        requests.exceptions.RequestException,
+        RuntimeError,
+        ValueError,
+        KeyError,
+    )
+
+
+def _fetchRandom():
+    import wikipedia
+
+    with metrics.timed("fetch"):
+        return wikipedia.random(10)
+
+
+def scanDump(dump_path: str, out_path: str, workers=None):
+    """Scan a local title dump offline and write every TMNT match to a file."""
+    from lib import scan
+
+    print(f"[{datetime.now()}] Scanning {dump_path}")
+    scanned, found = scan.scanTitles(dump_path, out_path, workers)
+    print(f"[{datetime.now()}] Scanned {scanned} titles, {found} matches "
+          f"written to {out_path}")
+
+
+def exportMetrics(path: str):
+    """Write this run's metrics, warning rather than failing the run."""
+    try:
+        metrics.export(path)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}")
+
+
+def indexDump(dump_path: str, index_path=INDEX_PATH, workers=None):
+    """Store the stress signature of every title in a dump in the index."""
+    from lib import signatures
+
+    print(f"[{datetime.now()}] Indexing {dump_path}")
+    indexed = signatures.buildIndex(dump_path, index_path, workers)
+    print(f"[{datetime.now()}] Indexed {indexed} titles into {index_path}")
+
+
+def updateIndex(changes_path: str, index_path=INDEX_PATH):
+    """Apply a file of +<tab>Title / -<tab>Title lines to the signature index."""
+    from lib import signatures
+
+    with signatures.SignatureIndex(index_path) as index:
+        added, removed = signatures.applyUpdates(index, changes_path)
+        print(f"Added {added} and removed {removed} titles, "
+              f"{len(index)} indexed.")
+
+
+def queryIndex(pattern: str, index_path=INDEX_PATH, regex=False,
+               syllables=None, limit=None):
+    """Print every indexed title whose stresses match pattern."""
+    from lib import signatures
+
+    with signatures.SignatureIndex(index_path) as index:
+        for title, signature in index.query(pattern, regex, syllables,
+                                            limit=limit):
+            print(f"{signature}\t{title}")
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="TMNT Wikipedia bot.")
+    parser.add_argument("--async-fetch", action="store_true",
+                        help="fetch titles with concurrent async requests")
+    parser.add_argument("--metrics", default=METRICS_PATH,
+                        help="file to write stage timings and rejection "
+                             "counts to, .prom for a Prometheus textfile "
+                             f"(default: {METRICS_PATH})")
+    parser.add_argument("--record", metavar="FILE",
+                        help="append the title batches fetched by a search "
+                             "or harvest to this recording, .gz to compress")
+    commands = parser.add_subparsers(dest="command")
+
+    scan_cmd = commands.add_parser(
+        "scan", help="Find every TMNT title in a local all-titles dump.")
+    scan_cmd.add_argument("dump", help="all-titles-in-ns0 dump, .gz or plain")
+    scan_cmd.add_argument("out", help="file to write matching titles to")
+    scan_cmd.add_argument("--workers", type=int, default=None,
+                          help="worker processes (default: all CPUs)")
+
+    index_cmd = commands.add_parser(
+        "index-build", help="Index the stress signature of every dump title.")
+    index_cmd.add_argument("dump", help="all-titles-in-ns0 dump, .gz or plain")
+    index_cmd.add_argument("--index", default=INDEX_PATH,
+                           help="signature index database")
+    index_cmd.add_argument("--workers", type=int, default=None,
+                           help="worker processes (default: all CPUs)")
+
+    update_cmd = commands.add_parser(
+        "index-update", help="Apply '+<tab>Title' and '-<tab>Title' lines "
+                             "to the index.")
+    update_cmd.add_argument("changes", help="file of titles added or removed")
+    update_cmd.add_argument("--index", default=INDEX_PATH,
+                            help="signature index database")
+
+    query_cmd = commands.add_parser(
+        "index-query", help="List indexed titles whose stresses match a "
+                            "meter pattern, e.g. '1[02]1[02]1[02]1[02]'.")
+    query_cmd.add_argument("pattern", help="meter pattern, see lib/meter.py")
+    query_cmd.add_argument("--regex", action="store_true",
+                           help="pattern is a Python regular expression")
+    query_cmd.add_argument("--syllables", type=int, default=None,
+                           help="only titles with this many syllables")
+    query_cmd.add_argument("--limit", type=int, default=None)
+    query_cmd.add_argument("--index", default=INDEX_PATH,
+                           help="signature index database")
+
+    lexicon_cmd = commands.add_parser(
+        "build-lexicon", help="Compile CMUdict into the mmap stress lexicon.")
+    lexicon_cmd.add_argument("--out", default=LEXICON_PATH,
+                             help=f"output path (default: {LEXICON_PATH})")
+
+    estimator_cmd = commands.add_parser(
+        "build-estimator",
+        help="Train the stress estimator for words missing from CMUdict.")
+    estimator_cmd.add_argument("--out", default=ESTIMATOR_PATH,
+                               help=f"output path (default: {ESTIMATOR_PATH})")
+
+    bundle_cmd = commands.add_parser(
+        "build-bundle",
+        help="Build a zipapp of the bot with bytecode and assets embedded.")
+    bundle_cmd.add_argument("--out", default=BUNDLE_PATH,
+                            help=f"output path (default: {BUNDLE_PATH})")
+
+    harvest_cmd = commands.add_parser(
+        "harvest", help="Fill the candidate queue with TMNT titles.")
+    harvest_cmd.add_argument("--target", type=int, default=HARVEST_TARGET,
+                             help="stop once this many titles are queued "
+                                  f"(default: {HARVEST_TARGET})")
+    harvest_cmd.add_argument("--queue", default=QUEUE_PATH,
+                             help="candidate queue database")
+
+    post_cmd = commands.add_parser(
+        "post", help="Post the next title from the candidate queue.")
+    post_cmd.add_argument("--queue", default=QUEUE_PATH,
+                          help="candidate queue database")
+
+    render_cmd = commands.add_parser(
+        "render", help="Pre-render logos for queued titles into the cache.")
+    render_cmd.add_argument("--queue", default=QUEUE_PATH,
+                            help="candidate queue database")
+    render_cmd.add_argument("--limit", type=int, default=None,
+                            help="render at most this many titles")
+    render_cmd.add_argument("--workers", type=int, default=None,
+                            help="worker processes (default: all CPUs)")
+
+    daemon_cmd = commands.add_parser(
+        "daemon", help="Keep running, posting on an interval and harvesting "
+                       "in between. SIGHUP reloads the ban lists.")
+    daemon_cmd.add_argument("--interval", type=float, default=POST_INTERVAL,
+                            help="average seconds between posts "
+                                 f"(default: {POST_INTERVAL})")
+    daemon_cmd.add_argument("--jitter", type=float, default=POST_JITTER,
+                            help="most seconds each post time moves either way "
+                                 f"(default: {POST_JITTER})")
+    daemon_cmd.add_argument("--target", type=int, default=HARVEST_TARGET,
+                            help="harvest until this many titles are queued "
+                                 f"(default: {HARVEST_TARGET})")
+    daemon_cmd.add_argument("--queue", default=QUEUE_PATH,
+                            help="candidate queue database")
+    daemon_cmd.add_argument("--post-now", action="store_true",
+                            help="post once straight away")
+
+    simulate_cmd = commands.add_parser(
+        "simulate", help="Run the search over a --record recording without "
+                         "posting, reporting throughput and time-to-match.")
+    simulate_cmd.add_argument("recording", help="recorded title batches")
+    simulate_cmd.add_argument("--paced", action="store_true",
+                              help="replay at the recorded pace instead of "
+                                   "as fast as possible")
+    simulate_cmd.add_argument("--speed", type=float, default=1.0,
+                              help="with --paced, replay this many times "
+                                   "faster than recorded (default: 1)")
+
+    bench_cmd = commands.add_parser(
+        "bench-render", help="Compare the native and legacy logo renderers.")
+    bench_cmd.add_argument("--title", default="Teenage Mutant Ninja Turtles")
+    bench_cmd.add_argument("--runs", type=int, default=10)
+
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    """Run the command line, argv being sys.argv[1:] if None."""
+    args = parseArgs(argv)
+    try:
+        if args.command == "scan":
+            scanDump(args.dump, args.out, args.workers)
+        elif args.command == "index-build":
+            indexDump(args.dump, args.index, args.workers)
+        elif args.command == "index-update":
+            updateIndex(args.changes, args.index)
+        elif args.command == "index-query":
+            queryIndex(args.pattern, args.index, args.regex, args.syllables,
+                       args.limit)
+        elif args.command == "harvest":
+            harvest(args.target, args.queue, record=args.record)
+        elif args.command == "post":
+            postQueued(args.queue)
+        elif args.command == "daemon":
+            runDaemon(args.interval, args.jitter, args.target, args.queue,
+                      args.post_now, args.metrics)
+        elif args.command == "simulate":
+            simulateSearch(args.recording, args.paced, args.speed)
+        elif args.command == "render":
+            renderQueued(args.queue, args.limit, args.workers)
+        elif args.command == "bench-render":
+            from lib import render
+
+            results = render.benchmark(words.addPadding(args.title), args.runs)
+            for pipeline, result in results.items():
+                print(f"{pipeline}: {result}")
+        elif args.command == "build-lexicon":
+            count = lexicon.buildLexicon(args.out)
+            print(f"Wrote {count} words to {args.out}")
+        elif args.command == "build-estimator":
+            rows, coverage, precision = estimate.buildEstimator(args.out)
+            print(f"Wrote {rows} suffixes to {args.out}. Held-out words: "
+                  f"{coverage:.0%} guessed, {precision:.0%} of guesses right")
+        elif args.command == "build-bundle":
+            from lib import bundle
+
+            size = bundle.buildBundle(args.out)
+            print(f"Wrote {args.out} ({size / 1e6:.1f}MB)")
+        else:
+            main(args.async_fetch, args.record)
+    finally:
+        # Build and index commands record nothing, so write nothing.
+        if metrics.recorded():
+            exportMetrics(args.metrics)
 
 
 if __name__ == "__main__":
-    main()
+    cli()
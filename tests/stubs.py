@@ -0,0 +1,145 @@
+"""Local stub HTTP servers standing in for the real APIs in tests."""
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer:
+    """Serve handler(method, path, query, body) on a local port.
+
+    The handler returns (status, headers dict, body bytes or JSON-able).
+    Every request is recorded in self.requests as (method, path, query).
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                if self.headers.get("Content-Type", "").startswith(
+                        "application/x-www-form-urlencoded"):
+                    query.update({k: v[-1] for k, v in
+                                  parse_qs(body.decode()).items()})
+                stub.requests.append((self.command, url.path, query))
+                status, headers, payload = stub.handler(
+                    self.command, url.path, query, body)
+                if not isinstance(payload, bytes):
+                    payload = json.dumps(payload).encode()
+                    headers = {"Content-Type": "application/json", **headers}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def mediaWikiRandom(titles, latency=0.0):
+    """Handler serving list=random batches cycling through titles."""
+    pool = itertools.cycle(titles)
+    lock = threading.Lock()
+
+    def handler(method, path, query, body):
+        time.sleep(latency)
+        with lock:
+            batch = [next(pool) for _ in range(int(query.get("rnlimit", 10)))]
+        return 200, {}, {"query": {"random": [
+            {"id": i, "ns": 0, "title": title} for i, title in enumerate(batch)]}}
+
+    return handler
+
+
+def faulty(handler, faults):
+    """Wrap a handler so requests fail as scripted before reaching it.
+
+    Each request takes the next entry of faults: an HTTP status to fail with
+    an HTML error page, like a proxy in front of a struggling API, or None to
+    pass the request to handler. Once faults run out every request passes.
+    """
+    faults = iter(faults)
+    lock = threading.Lock()
+
+    def wrapped(method, path, query, body):
+        with lock:
+            fault = next(faults, None)
+        if fault is not None:
+            return fault, {"Content-Type": "text/html"}, b"<h1>Unavailable</h1>"
+        return handler(method, path, query, body)
+
+    return wrapped
+
+
+def mediaWikiPages(pages, redirects=None, continued=False):
+    """Handler serving prop=info|pageprops|pageviews queries, formatversion=2.
+
+    Args:
+        pages: Dict of title to dict with length, disambiguation (bool) and
+               pageviews ({date: views}), titles not in it are missing.
+        redirects: Dict of redirect title to target title.
+        continued: Bool, send pageviews in a continuation of each query, as
+                   MediaWiki does when they don't fit in one response.
+    """
+    redirects = redirects or {}
+
+    def handler(method, path, query, body):
+        normalized = []
+        found = []
+        result = {}
+        for title in query["titles"].split("|"):
+            name = title[:1].upper() + title[1:]
+            if name != title:
+                normalized.append({"from": title, "to": name})
+            if name in redirects:
+                result.setdefault("redirects", []).append(
+                    {"from": name, "to": redirects[name]})
+                name = redirects[name]
+            page = pages.get(name)
+            if page is None:
+                found.append({"ns": 0, "title": name, "missing": True})
+                continue
+            entry = {"pageid": len(found) + 1, "ns": 0, "title": name,
+                     "length": page["length"]}
+            if page.get("disambiguation"):
+                entry["pageprops"] = {"disambiguation": ""}
+            if not continued or "pvipcontinue" in query:
+                entry["pageviews"] = page.get("pageviews", {})
+            found.append(entry)
+        if normalized:
+            result["normalized"] = normalized
+        result["pages"] = found
+        response = {"batchcomplete": True, "query": result}
+        if continued and "pvipcontinue" not in query:
+            response["continue"] = {"pvipcontinue": "1", "continue": "||"}
+        return 200, {}, response
+
+    return handler
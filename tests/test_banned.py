@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+import lib.banned as banned
+import lib.tokens as tokens
+
+
+class AhoCorasickTest(unittest.TestCase):
+    def test_search_finds_overlapping_patterns(self):
+        """
+        search() should find patterns that only appear through a
+        failure link, like 'she' inside 'ushers'
+        """
+        matcher = banned.AhoCorasick(["he", "she", "hers"])
+        self.assertEqual(matcher.search("ushers"), "she")
+        self.assertEqual(matcher.search("a hermit"), "he")
+        self.assertIsNone(matcher.search("turtles"))
+
+    def test_search_finds_pattern_inside_longer_prefix(self):
+        """
+        A short pattern that is a suffix of a partial longer match
+        should still be found
+        """
+        matcher = banned.AhoCorasick(["abcd", "bc"])
+        self.assertEqual(matcher.search("xabcx"), "bc")
+
+
+class BanFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.words_path = os.path.join(self.tmpdir.name, "words.txt")
+        self.phrases_path = os.path.join(self.tmpdir.name, "phrases.txt")
+        self._write(self.words_path, "# comment\nnazi\n\n")
+        self._write(self.phrases_path, 'rugby player\n", baron "\n')
+        self.filter = banned.BanFilter(self.words_path, self.phrases_path,
+                                       reload_interval=3600)
+
+    def _write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_banned_words_match_whole_words_only(self):
+        """
+        Banned words should match a title word with punctuation stripped,
+        but not a longer word that merely contains them
+        """
+        self.assertEqual(self.filter.match("Teenage (Nazi) Turtles"), "nazi")
+        self.assertIsNone(self.filter.match("Nazirite Vow"))
+
+    def test_quoted_phrases_keep_their_spaces(self):
+        """
+        A phrase wrapped in double quotes should keep its surrounding
+        spaces when matched
+        """
+        self.assertEqual(self.filter.match("John Smith, Baron Smith"), ", baron ")
+        self.assertIsNone(self.filter.match("John Smith, Baroness"))
+
+    def test_raw_titles_match_like_tokens(self):
+        """
+        A raw title should match the same as its tokens, and a one-word
+        phrase should also match the title's words with punctuation stripped
+        """
+        self._write(self.phrases_path, "shooting\n")
+        self.filter.reload(force=True)
+        for title in ["Shoot.ing Star", "Neo-Nazi Party", "Nazi/Soviet Pact",
+                      "The  Nazi_1984 Era", "Crazi Nazirite", "Shoot & Ing"]:
+            self.assertEqual(self.filter.match(title),
+                             self.filter.match(tokens.tokenize(title)), title)
+        self.assertEqual(self.filter.match("Shoot.ing Star"), "shooting")
+        self.assertEqual(self.filter.match("The  Nazi_1984 Era"), "nazi")
+
+    def test_reload_picks_up_edited_lists(self):
+        """
+        reload() should recompile once a list file changes, and leave the
+        matcher alone when nothing changed
+        """
+        self.assertFalse(self.filter.reload())
+        self._write(self.words_path, "turtles\n")
+        os.utime(self.words_path, ns=(0, 1))
+        self.assertTrue(self.filter.reload())
+        self.assertEqual(self.filter.match("Teenage Mutant Ninja Turtles"),
+                         "turtles")
+        self.assertIsNone(self.filter.match("Teenage Mutant Nazi Tortoises"))
+
+    def test_shipped_lists_load(self):
+        """
+        The ban lists shipped in assets should load and be non-empty
+        """
+        shipped = banned.BanFilter()
+        self.assertIn("nazi", shipped.words)
+        self.assertIn(", baron ", shipped.phrases)
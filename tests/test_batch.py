@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+import lib.batch as batch
+import lib.words as words
+from lib.meter import Meter
+
+
+class ClassifyBatchTest(unittest.TestCase):
+    TITLES = [
+        "Teenage Mutant Ninja Turtles",
+        "Single Payer Health Insurance",
+        "Teenage Mutant Rugby Player",
+        "Zxqvbnm Wikipedia",
+        "Dog",
+        "Adventure Time with Finn and Jake",
+        "Romeo, Romeo, wherefore art thou, Romeo?",
+        "",
+    ]
+
+    def test_agrees_with_is_tmnt(self):
+        """
+        classifyBatch() should match exactly the titles isTMNT() matches
+        """
+        matched, _ = batch.classifyBatch(self.TITLES)
+        self.assertEqual(matched.tolist(),
+                         [words.isTMNT(title) for title in self.TITLES])
+
+    def test_reason_codes(self):
+        """
+        Each rejected title should get the same reason matchTitle() gives,
+        and banned titles should be reported as banned
+        """
+        _, reasons = batch.classifyBatch(self.TITLES)
+        self.assertEqual([batch.REASONS[code] for code in reasons],
+                         [None, None, "banned", "oov", "length", "pattern",
+                          "pattern", "length"])
+
+    def test_words_are_looked_up_once(self):
+        """
+        A word shared by several titles should be looked up once, and words
+        after a title's first impossible word not at all
+        """
+        classifier = batch.BatchClassifier()
+        titles = ["Teenage Mutant Ninja Turtles",
+                  "Teenage Mutant Ninja Turtles",
+                  "Adventure Teenage Mutant"]
+        with mock.patch("lib.words.wordStresses",
+                        wraps=words.wordStresses) as lookup:
+            classifier.classify(titles)
+            classifier.classify(titles)
+        looked_up = [call.args[0] for call in lookup.call_args_list]
+        self.assertEqual(sorted(looked_up),
+                         ["adventure", "mutant", "ninja", "teenage", "turtles"])
+
+    def test_every_pronunciation_is_tried(self):
+        """
+        A title should match if any combination of pronunciations fits,
+        like matchTitle()
+        """
+        meter = Meter("1001")
+        with mock.patch("lib.words.wordStresses",
+                        side_effect=lambda word: {"a": ("1", "10"),
+                                                  "b": ("01", "10")}[word]):
+            matched, _ = batch.BatchClassifier(meter).classify(["a b", "b a"])
+        self.assertEqual(matched.tolist(), [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+import bench.run as bench
+import bench.sample as sample
+import bench.startup as startup
+from lib import fetch
+from tests.stubs import StubServer, mediaWikiRandom
+
+
+def results(**values):
+    better = {"render_ms": "lower"}
+    return {"metrics": {name: bench.metric(value, "unit", better.get(name, "higher"))
+                        for name, value in values.items()}}
+
+
+class CompareTest(unittest.TestCase):
+    def test_compare_flags_slower_throughput(self):
+        """
+        Throughput falling by more than the threshold is a regression
+        """
+        regressions = bench.compare(results(isTMNT_warm=70),
+                                    results(isTMNT_warm=100), threshold=0.2)
+        self.assertEqual([r[0] for r in regressions], ["isTMNT_warm"])
+
+    def test_compare_flags_higher_latency(self):
+        """
+        Latency rising by more than the threshold is a regression, and
+        falling is not
+        """
+        baseline = results(render_ms=100)
+        self.assertEqual(len(bench.compare(results(render_ms=130), baseline)), 1)
+        self.assertEqual(bench.compare(results(render_ms=50), baseline), [])
+
+    def test_compare_allows_noise_within_threshold(self):
+        """
+        Small changes and metrics missing from the current run are ignored
+        """
+        baseline = results(isTMNT_warm=100, render_ms=100)
+        self.assertEqual(bench.compare(results(isTMNT_warm=90), baseline), [])
+
+
+    def test_best_of_runs(self):
+        """
+        bestOf() should keep the highest throughput and lowest latency
+        seen across runs
+        """
+        runs = [results(isTMNT_warm=90, render_ms=80),
+                results(isTMNT_warm=110, render_ms=120),
+                results(isTMNT_warm=100, render_ms=70)]
+        for run in runs:
+            run["meta"] = {}
+        best = bench.bestOf(runs)["metrics"]
+        self.assertEqual((best["isTMNT_warm"]["value"], best["render_ms"]["value"]),
+                         (110, 70))
+
+
+class CorpusTest(unittest.TestCase):
+    def test_corpus_is_fixed_and_unique(self):
+        """
+        The checked-in corpus should load with no blank or duplicate titles
+        """
+        titles = bench.loadCorpus()
+        self.assertGreater(len(titles), 1000)
+        self.assertEqual(len(titles), len(set(titles)))
+
+    def test_estimator_raises_yield_on_oov_titles(self):
+        """
+        On the OOV title set, estimated stresses should turn OOV rejections
+        into matches
+        """
+        results = bench.benchYield(bench.loadCorpus(bench.OOV_CORPUS_PATH),
+                                   prefix="oov_set_")
+        value = {name: m["value"] for name, m in results.items()}
+        self.assertGreater(value["oov_set_yield_per_1k_estimated"],
+                           value["oov_set_yield_per_1k_lexicon"] * 10)
+        self.assertLess(value["oov_set_oov_per_1k_estimated"],
+                        value["oov_set_oov_per_1k_lexicon"] / 10)
+
+    def test_sample_random_titles(self):
+        """
+        sampleTitles() should draw distinct titles from list=random, and
+        stop short rather than loop when the API keeps repeating itself
+        """
+        pool = [f"Random page {i}" for i in range(30)]
+        with StubServer(mediaWikiRandom(pool)) as server:
+            fetcher = fetch.RandomTitleFetcher(server.url, concurrency=1,
+                                               rate=100, burst=10, batch=7)
+            titles = asyncio.run(sample.sampleTitles(20, fetcher))
+            self.assertEqual(titles, pool[:20])
+            fetcher = fetch.RandomTitleFetcher(server.url, concurrency=1,
+                                               rate=100, burst=10, batch=7)
+            titles = asyncio.run(sample.sampleTitles(40, fetcher))
+        self.assertEqual(sorted(titles), sorted(pool))
+
+
+class StartupTest(unittest.TestCase):
+    def test_parse_import_times(self):
+        """
+        -X importtime lines should parse into module, self and cumulative
+        microseconds and nesting depth
+        """
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       300 |        300 |     lib.tokens\n"
+                  "import time:       900 |       1200 |   lib.banned\n"
+                  "import time:      2000 |       3200 | main\n")
+        self.assertEqual(startup.parseImportTimes(stderr), [
+            ("lib.tokens", 300, 300, 2), ("lib.banned", 900, 1200, 1),
+            ("main", 2000, 3200, 0)])
+
+    def test_heavy_dependencies_are_deferred(self):
+        """
+        Starting main.py should import none of the heavy dependencies
+        """
+        report = startup.measure(runs=1)
+        self.assertEqual(report["deferred"], [])
+        self.assertGreater(report["main_ms"], 0)
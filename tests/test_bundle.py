@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+import lib.bundle as bundle
+from lib.constants import LEXICON_PATH
+
+
+@unittest.skipUnless(os.path.exists(LEXICON_PATH),
+                     "needs the lexicon, run `main.py build-lexicon`")
+class BundleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "tmnt.pyz")
+        bundle.buildBundle(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def run_bundle(self, *args, cache):
+        env = {**os.environ, "TMNT_BUNDLE_CACHE": cache}
+        env.pop("TMNT_ASSETS", None)
+        return subprocess.run([sys.executable, self.path, *args], env=env,
+                              cwd=self.tmpdir.name, capture_output=True,
+                              text=True, check=True)
+
+    def test_bundle_holds_bytecode_and_assets(self):
+        """
+        The bundle should hold compiled modules without their sources, and
+        the lexicon
+        """
+        with zipfile.ZipFile(self.path) as archive:
+            names = set(archive.namelist())
+        self.assertIn("main.pyc", names)
+        self.assertIn("lib/words.pyc", names)
+        self.assertNotIn("lib/words.py", names)
+        self.assertIn("assets/lexicon.bin", names)
+        self.assertIn("assets/banned/words.txt", names)
+
+    def test_bundle_runs_from_extracted_assets(self):
+        """
+        Running the bundle should extract its assets once and classify
+        titles with the embedded lexicon
+        """
+        with tempfile.TemporaryDirectory() as cache:
+            changes = os.path.join(cache, "changes.txt")
+            with open(changes, "w") as f:
+                f.write("Teenage Mutant Ninja Turtles\nGeneral relativity\n")
+            index = os.path.join(cache, "index.db")
+            metrics = os.path.join(cache, "metrics.jsonl")
+            self.run_bundle("--metrics", metrics, "index-update", changes,
+                            "--index", index, cache=cache)
+            result = self.run_bundle("--metrics", metrics, "index-query",
+                                     "1[02]1[02]1[02]1[02]", "--index", index,
+                                     cache=cache)
+            self.assertEqual(result.stdout,
+                             "12101010\tTeenage Mutant Ninja Turtles\n")
+            extracted = [name for name in os.listdir(cache)
+                         if not name.endswith((".txt", ".db", ".jsonl",
+                                               "-wal", "-shm"))]
+            self.assertEqual(len(extracted), 1)
+            self.assertTrue(os.path.exists(
+                os.path.join(cache, extracted[0], "lexicon.bin")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import main
+from lib.candidates import CandidateQueue
+
+
+class CandidateQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.queue = CandidateQueue(os.path.join(self.tmpdir.name, "q.db"))
+        self.addCleanup(self.queue.close)
+
+    def test_add_dedupes_titles(self):
+        """
+        A title should only be queued once, however often it is harvested
+        """
+        self.assertTrue(self.queue.add("Teenage Mutant Ninja Turtles"))
+        self.assertFalse(self.queue.add("Teenage Mutant Ninja Turtles"))
+        self.assertEqual(self.queue.pending(), 1)
+
+    def test_next_candidate_is_oldest_unposted(self):
+        """
+        nextCandidate() should return the earliest harvested title that
+        hasn't been posted, and leave it queued until markPosted()
+        """
+        self.queue.add("Single Payer Health Insurance", harvested_at=2)
+        self.queue.add("Teenage Mutant Ninja Turtles", harvested_at=1)
+        self.assertEqual(self.queue.nextCandidate(), "Teenage Mutant Ninja Turtles")
+        self.assertEqual(self.queue.nextCandidate(), "Teenage Mutant Ninja Turtles")
+
+        self.queue.markPosted("Teenage Mutant Ninja Turtles", posted_at=3)
+        self.assertEqual(self.queue.nextCandidate(), "Single Payer Health Insurance")
+        self.assertEqual(self.queue.get("Teenage Mutant Ninja Turtles"), (1, 3))
+
+    def test_posted_title_is_not_requeued(self):
+        """
+        Harvesting a title again after it was posted should not queue it
+        """
+        self.queue.add("Teenage Mutant Ninja Turtles")
+        self.queue.markPosted("Teenage Mutant Ninja Turtles")
+        self.assertFalse(self.queue.add("Teenage Mutant Ninja Turtles"))
+        self.assertIsNone(self.queue.nextCandidate())
+
+    def test_dropped_title_is_not_requeued(self):
+        """
+        A dropped title should leave the queue, and harvesting it again
+        should not queue it
+        """
+        self.queue.add("Microsoft Transaction Server", harvested_at=1)
+        self.queue.add("Teenage Mutant Ninja Turtles", harvested_at=2)
+        self.queue.drop("Microsoft Transaction Server", "stub")
+        self.assertEqual(self.queue.pendingTitles(),
+                         ["Teenage Mutant Ninja Turtles"])
+
+        with mock.patch("lib.history.wasPosted", return_value=False):
+            main.harvestBatch(self.queue, source=lambda: [
+                "Microsoft Transaction Server", "Single Payer Health Insurance"])
+        self.assertEqual(self.queue.pendingTitles(),
+                         ["Teenage Mutant Ninja Turtles",
+                          "Single Payer Health Insurance"])
+        self.assertEqual(self.queue.pending(), 2)
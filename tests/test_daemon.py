@@ -0,0 +1,152 @@
+import os
+import signal
+import tempfile
+import unittest
+from unittest import mock
+from lib.daemon import Daemon
+
+
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        self.calls = []
+
+    def makeDaemon(self, post=None, harvest=None, **kwargs):
+        def defaultPost():
+            self.calls.append("post")
+            if self.calls.count("post") == 2:
+                bot.stop()
+
+        def defaultHarvest():
+            self.calls.append("harvest")
+
+        options = dict(interval=0.05, jitter=0, backoff=0.01)
+        options.update(kwargs)
+        bot = Daemon(post or defaultPost, harvest or defaultHarvest, **options)
+        return bot
+
+    def test_harvests_between_posts(self):
+        """
+        The daemon should post on the interval and harvest while it waits
+        """
+        bot = self.makeDaemon()
+        bot.run()
+        self.assertEqual(bot.posts, 2)
+        first = self.calls.index("post")
+        self.assertGreater(first, 0)
+        self.assertIn("harvest", self.calls[first:])
+
+    def test_full_queue_idles_until_post(self):
+        """
+        Once harvest reports a full queue the daemon should wait for the post
+        time instead of polling harvest
+        """
+        def harvest():
+            self.calls.append("harvest")
+            return False
+
+        bot = self.makeDaemon(harvest=harvest, interval=0.2)
+        bot.run()
+        self.assertEqual(self.calls, ["harvest", "post", "harvest", "post"])
+
+    def test_failed_post_does_not_stop_daemon(self):
+        """
+        A post that exits or raises should be logged, not counted, and the
+        daemon should keep its schedule
+        """
+        def post():
+            self.calls.append("post")
+            posts = self.calls.count("post")
+            if posts == 1:
+                raise SystemExit(1)
+            if posts == 2:
+                raise RuntimeError("network down")
+            bot.stop()
+
+        bot = self.makeDaemon(post=post, post_now=True)
+        bot.run()
+        self.assertEqual(self.calls.count("post"), 3)
+        self.assertEqual(bot.posts, 1)
+
+    def test_empty_queue_retries_after_harvest(self):
+        """
+        A post that finds nothing queued should be retried after the next
+        harvest batch, not at the next post time
+        """
+        def post():
+            self.calls.append("post")
+            if self.calls.count("post") == 1:
+                return False
+            bot.stop()
+
+        bot = self.makeDaemon(post=post, interval=100, post_now=True)
+        bot.run()
+        self.assertEqual(self.calls, ["post", "harvest", "post"])
+        self.assertEqual(bot.posts, 1)
+
+    def test_failed_harvests_back_off(self):
+        """
+        The wait between harvest batches should double with each failed
+        harvest in a row, up to max_backoff, and go back once one succeeds
+        """
+        def harvest():
+            self.calls.append("harvest")
+            harvests = self.calls.count("harvest")
+            if harvests == 5:
+                bot.stop()
+            if harvests < 4:
+                raise ConnectionError("down")
+
+        bot = self.makeDaemon(harvest=harvest, interval=100, max_backoff=0.04)
+        waits = []
+        with mock.patch.object(bot._stop, "wait",
+                               side_effect=lambda seconds: waits.append(seconds)):
+            bot.run()
+        self.assertEqual(waits, [0.02, 0.04, 0.04, 0.01, 0.01])
+
+    def test_daemon_post_does_not_search_live(self):
+        """
+        postNext() without search should return False on an empty queue
+        rather than searching live
+        """
+        import main
+        from lib.candidates import CandidateQueue
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                CandidateQueue(os.path.join(tmpdir, "q.db")) as queue, \
+                mock.patch("main.searchForTMNT") as search, \
+                mock.patch("main.postTitle") as postTitle:
+            self.assertFalse(main.postNext(queue, None, search=False))
+        search.assert_not_called()
+        postTitle.assert_not_called()
+
+    def test_jitter_bounds_post_time(self):
+        """
+        Post times should fall within interval +/- jitter
+        """
+        bot = self.makeDaemon(interval=100, jitter=10)
+        for _ in range(100):
+            self.assertTrue(90 <= bot.nextPostTime(0) <= 110)
+
+    def test_sigterm_stops_and_sighup_reloads(self):
+        """
+        SIGHUP should reload the ban lists without stopping, and SIGTERM
+        should stop the loop
+        """
+        def post():
+            self.calls.append("post")
+            os.kill(os.getpid(), signal.SIGHUP)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        bot = self.makeDaemon(post=post, post_now=True)
+        bot.installSignalHandlers()
+        with mock.patch("lib.banned.reloadBanLists") as reload:
+            bot.run()
+        reload.assert_called_once_with(force=True)
+        self.assertEqual(self.calls, ["post"])
+        self.assertTrue(bot.stopping)
+
+
+if __name__ == "__main__":
+    unittest.main()
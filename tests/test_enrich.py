@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import lib.enrich as enrich
+import main
+from lib.candidates import CandidateQueue
+from tests.stubs import StubServer, faulty, mediaWikiPages
+
+PAGES = {
+    "Teenage Mutant Ninja Turtles": {
+        "length": 90000, "pageviews": {"2026-10-01": 500, "2026-10-02": 700}},
+    "Single Payer Health Insurance": {
+        "length": 20000, "pageviews": {"2026-10-01": 30, "2026-10-02": None}},
+    "Microsoft Transaction Server": {
+        "length": 8000, "pageviews": {"2026-10-01": 30}},
+    "Mercury (disambiguation)": {"length": 3000, "disambiguation": True},
+    "Turtle Stub": {"length": 300},
+}
+REDIRECTS = {"TMNT": "Teenage Mutant Ninja Turtles"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class PageInfoClientTest(unittest.TestCase):
+    def fetch(self, titles, **kwargs):
+        with StubServer(mediaWikiPages(PAGES, REDIRECTS, **kwargs)) as server:
+            infos = enrich.PageInfoClient(server.url).fetch(titles)
+        return infos, server.requests
+
+    def test_page_properties(self):
+        """
+        Each title should get its length, pageviews, disambiguation flag
+        and redirect target, following normalization
+        """
+        infos, _ = self.fetch(["teenage Mutant Ninja Turtles",
+                               "Mercury (disambiguation)", "TMNT",
+                               "No Such Page", "Single Payer Health Insurance"])
+        self.assertEqual(infos["teenage Mutant Ninja Turtles"],
+                         enrich.PageInfo("teenage Mutant Ninja Turtles",
+                                         length=90000, pageviews=1200))
+        self.assertTrue(infos["Mercury (disambiguation)"].disambiguation)
+        self.assertEqual(infos["TMNT"].redirect, "Teenage Mutant Ninja Turtles")
+        self.assertTrue(infos["No Such Page"].missing)
+        self.assertEqual(infos["Single Payer Health Insurance"].pageviews, 30)
+
+    def test_fifty_titles_per_request(self):
+        """
+        Titles should be looked up 50 to a query, sent as one prop= query
+        """
+        titles = [f"Page {i}" for i in range(120)]
+        infos, requests = self.fetch(titles)
+        self.assertEqual(len(infos), 120)
+        self.assertEqual([len(query["titles"].split("|"))
+                          for _, _, query in requests], [50, 50, 20])
+        self.assertEqual(requests[0][2]["prop"], "info|pageprops|pageviews")
+
+    def test_continued_pageviews(self):
+        """
+        Pageviews sent in a continuation should be merged into the pages
+        the first response described
+        """
+        infos, requests = self.fetch(["Teenage Mutant Ninja Turtles",
+                                      "Mercury (disambiguation)"], continued=True)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(infos["Teenage Mutant Ninja Turtles"].pageviews, 1200)
+        self.assertTrue(infos["Mercury (disambiguation)"].disambiguation)
+
+
+class EnricherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.clock = Clock()
+        self.cache = enrich.PageInfoCache(
+            os.path.join(self.tmpdir.name, "pages.db"), ttl=60, clock=self.clock)
+        self.addCleanup(self.cache.close)
+
+    def test_cache_expires_after_ttl(self):
+        """
+        Cached titles should not be looked up again until the TTL passes
+        """
+        titles = ["Teenage Mutant Ninja Turtles", "Turtle Stub"]
+        with StubServer(mediaWikiPages(PAGES)) as server:
+            enricher = enrich.Enricher(enrich.PageInfoClient(server.url),
+                                       self.cache)
+            first = enricher.enrich(titles)
+            self.clock.now += 30
+            self.assertEqual(enricher.enrich(titles + ["TMNT"]), {
+                **first, "TMNT": enrich.PageInfo("TMNT", missing=True)})
+            self.clock.now += 31
+            enricher.enrich(titles)
+        self.assertEqual([query["titles"] for _, _, query in server.requests], [
+            "Teenage Mutant Ninja Turtles|Turtle Stub", "TMNT",
+            "Teenage Mutant Ninja Turtles|Turtle Stub"])
+
+    def test_rank_candidates(self):
+        """
+        Disambiguation pages, redirects, missing pages and stubs should be
+        rejected, the rest ordered by pageviews then length
+        """
+        titles = ["Microsoft Transaction Server", "Mercury (disambiguation)",
+                  "Single Payer Health Insurance", "TMNT", "Turtle Stub",
+                  "No Such Page", "Teenage Mutant Ninja Turtles"]
+        with StubServer(mediaWikiPages(PAGES, REDIRECTS)) as server:
+            infos = enrich.Enricher(enrich.PageInfoClient(server.url)).enrich(titles)
+        ranked, rejected = enrich.rankCandidates(titles, infos)
+        self.assertEqual(ranked, ["Teenage Mutant Ninja Turtles",
+                                  "Single Payer Health Insurance",
+                                  "Microsoft Transaction Server"])
+        self.assertEqual(rejected, {"Mercury (disambiguation)": "disambiguation",
+                                    "TMNT": "redirect", "Turtle Stub": "stub",
+                                    "No Such Page": "missing"})
+
+
+class PickCandidateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.queue = CandidateQueue(os.path.join(self.tmpdir.name, "q.db"))
+        self.addCleanup(self.queue.close)
+        for i, title in enumerate(["Turtle Stub", "Mercury (disambiguation)",
+                                   "Microsoft Transaction Server",
+                                   "Teenage Mutant Ninja Turtles"]):
+            self.queue.add(title, harvested_at=i + 1)
+        patcher = mock.patch("lib.history.wasPosted", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_picks_best_and_drops_rejected(self):
+        """
+        pickCandidate() should take the most viewed page and drop the
+        pages not worth posting from the queue
+        """
+        with StubServer(mediaWikiPages(PAGES)) as server:
+            title = main.pickCandidate(
+                self.queue, enrich.Enricher(enrich.PageInfoClient(server.url)))
+        self.assertEqual(title, "Teenage Mutant Ninja Turtles")
+        self.assertEqual(self.queue.pendingTitles(),
+                         ["Microsoft Transaction Server",
+                          "Teenage Mutant Ninja Turtles"])
+
+    def test_lookup_failure_takes_oldest(self):
+        """
+        If the API fails, the oldest queued title should be posted unranked
+        and nothing dropped
+        """
+        handler = faulty(mediaWikiPages(PAGES), [503])
+        with StubServer(handler) as server:
+            title = main.pickCandidate(
+                self.queue, enrich.Enricher(enrich.PageInfoClient(server.url)))
+        self.assertEqual(title, "Turtle Stub")
+        self.assertEqual(self.queue.pending(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
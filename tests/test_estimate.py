@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import lib.estimate as estimate
+import lib.words as words
+from lib.estimate import StressEstimator
+
+
+TRAINING = [
+    ("nation", "10"), ("station", "10"), ("ration", "10"), ("lotion", "10"),
+    ("population", "2010"), ("education", "2010"), ("generation", "2010"),
+    ("kowalski", "010"), ("kaminski", "010"), ("lewinski", "010"),
+    ("berzinski", "100"),
+]
+
+
+class StressEstimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.estimator = estimate.trainEstimator(
+            TRAINING, max_suffix=5, min_support=3)
+        self.estimator.threshold = 0.8
+
+    def test_guesses_from_longest_suffix(self):
+        """
+        An unknown word should get the stresses of training words with the
+        same ending and vowel groups
+        """
+        self.assertEqual(self.estimator.stresses("Zorbulation"), ("2010",))
+        self.assertEqual(self.estimator.stresses("Plation"), ("10",))
+
+    def test_confidence_threshold(self):
+        """
+        A guess whose training words disagree too often should be withheld
+        """
+        self.assertEqual(self.estimator.guess("Dombrinski"), ("010", 0.75))
+        self.assertIsNone(self.estimator.stresses("Dombrinski"))
+
+    def test_no_guess_without_vowels_or_letters(self):
+        """
+        Words with no vowel groups or with digits should never be guessed
+        """
+        self.assertIsNone(self.estimator.guess("Zxq"))
+        self.assertIsNone(self.estimator.guess("R2D2"))
+
+    def test_save_and_load(self):
+        """
+        A saved model should load back with the same table
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "model.tsv.gz")
+            self.estimator.save(path)
+            loaded = StressEstimator.load(path)
+        self.assertEqual(loaded.table, self.estimator.table)
+        self.assertEqual(loaded.max_suffix, 5)
+
+
+class EstimatedMatchTest(unittest.TestCase):
+    def test_match_title_uses_estimates_for_oov_words(self):
+        """
+        matchTitle() should fall back to estimated stresses and count the
+        words it estimated
+        """
+        with mock.patch("lib.estimate.estimateStresses",
+                        side_effect=lambda word: {"Zorbin": ("10",)}.get(word)):
+            result = words.matchTitle("Teenage Mutant Zorbin Turtles")
+        self.assertTrue(result.matched)
+        self.assertEqual(result.estimated, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
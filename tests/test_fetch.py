@@ -0,0 +1,77 @@
+import asyncio
+import time
+import unittest
+import lib.fetch as fetch
+from tests.stubs import StubServer, mediaWikiRandom
+
+FILLER = ["Romeo, Romeo, wherefore art thou, Romeo?", "Turtle", "Adventure Time"]
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_bucket_limits_rate_after_burst(self):
+        """
+        A bucket of 20/s with a burst of 2 should let two tokens through
+        at once, then space the rest out
+        """
+        bucket = fetch.TokenBucket(rate=20, capacity=2)
+
+        async def take(n):
+            for _ in range(n):
+                await bucket.acquire()
+
+        start = time.monotonic()
+        asyncio.run(take(2))
+        self.assertLess(time.monotonic() - start, 0.04)
+        start = time.monotonic()
+        asyncio.run(take(4))
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+
+class RandomTitleFetcherTest(unittest.TestCase):
+    def test_search_finds_match_from_stub_server(self):
+        """
+        searchForTMNTAsync() should stream titles from a stub MediaWiki
+        and stop at the first TMNT title
+        """
+        titles = FILLER * 5 + ["Teenage Mutant Ninja Turtles"]
+        with StubServer(mediaWikiRandom(titles, latency=0.01)) as server:
+            fetcher = fetch.RandomTitleFetcher(server.url, concurrency=3,
+                                               rate=100, burst=10, batch=4)
+            title, stats = asyncio.run(fetch.searchForTMNTAsync(1000, fetcher))
+        self.assertEqual(title, "Teenage Mutant Ninja Turtles")
+        self.assertGreaterEqual(stats.titles, 16)
+        self.assertIsNotNone(stats.timeToFirstMatch())
+        self.assertEqual(server.requests[0][2]["list"], "random")
+
+    def test_search_gives_up_after_max_titles(self):
+        """
+        searchForTMNTAsync() should return None once max_titles titles
+        have been checked without a match
+        """
+        with StubServer(mediaWikiRandom(FILLER)) as server:
+            fetcher = fetch.RandomTitleFetcher(server.url, concurrency=2,
+                                               rate=100, burst=10)
+            title, stats = asyncio.run(fetch.searchForTMNTAsync(25, fetcher))
+        self.assertIsNone(title)
+        self.assertGreaterEqual(stats.titles, 25)
+
+    def test_server_errors_are_retried(self):
+        """
+        A 503 from the API should be counted and retried rather than
+        ending the search
+        """
+        calls = []
+        ok = mediaWikiRandom(["Teenage Mutant Ninja Turtles"])
+
+        def flaky(method, path, query, body):
+            calls.append(path)
+            if len(calls) == 1:
+                return 503, {"Retry-After": "0"}, {}
+            return ok(method, path, query, body)
+
+        with StubServer(flaky) as server:
+            fetcher = fetch.RandomTitleFetcher(server.url, concurrency=1,
+                                               rate=100, burst=10)
+            title, stats = asyncio.run(fetch.searchForTMNTAsync(100, fetcher))
+        self.assertEqual(title, "Teenage Mutant Ninja Turtles")
+        self.assertEqual(stats.errors, 1)
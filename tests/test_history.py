@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from lib.history import BloomFilter
+
+
+class BloomFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "posted.bloom")
+
+    def test_added_titles_are_members(self):
+        """
+        Titles added to the filter should always be found, and add()
+        should report whether a title was new
+        """
+        bloom = BloomFilter(self.path, capacity=1000, error_rate=0.01)
+        self.addCleanup(bloom.close)
+        self.assertTrue(bloom.add("Teenage Mutant Ninja Turtles"))
+        self.assertFalse(bloom.add("Teenage Mutant Ninja Turtles"))
+        self.assertIn("Teenage Mutant Ninja Turtles", bloom)
+        self.assertNotIn("Single Payer Health Insurance", bloom)
+        self.assertEqual(len(bloom), 1)
+
+    def test_filter_persists_across_opens(self):
+        """
+        Reopening the filter file should keep every title added before
+        """
+        bloom = BloomFilter(self.path, capacity=1000, error_rate=0.01)
+        bloom.add("Teenage Mutant Ninja Turtles")
+        bloom.close()
+        reopened = BloomFilter(self.path)
+        self.addCleanup(reopened.close)
+        self.assertIn("Teenage Mutant Ninja Turtles", reopened)
+
+    def test_false_positive_rate_near_target(self):
+        """
+        At capacity, unseen titles should be reported present at roughly
+        the configured error rate
+        """
+        bloom = BloomFilter(self.path, capacity=2000, error_rate=0.01)
+        self.addCleanup(bloom.close)
+        for i in range(2000):
+            bloom.add(f"Title {i}")
+        false_positives = sum(f"Other {i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_file_size_follows_capacity(self):
+        """
+        The filter file should be sized from capacity and error rate, about
+        1.2 bytes per title at 1% error
+        """
+        bloom = BloomFilter(self.path, capacity=100000, error_rate=0.01)
+        self.addCleanup(bloom.close)
+        self.assertLess(os.path.getsize(self.path), 130000)
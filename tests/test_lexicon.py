@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import lib.lexicon as lexicon
+
+
+class LexiconTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "lexicon.bin")
+        cls.count = lexicon.buildLexicon(cls.path)
+        cls.lexicon = lexicon.Lexicon(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_compiled_lexicon_holds_every_word(self):
+        """
+        The compiled table should report as many words as were written
+        """
+        self.assertEqual(len(self.lexicon), self.count)
+        self.assertGreater(self.count, 100000)
+
+    def test_lookup_is_case_insensitive(self):
+        """
+        Looking up 'Turtles' should return its stresses, '10'
+        """
+        self.assertEqual(self.lexicon.lookup("Turtles"), ("10",))
+
+    def test_lookup_returns_every_distinct_variant(self):
+        """
+        Words with several pronunciations should keep each distinct
+        stress pattern, in CMUdict order
+        """
+        self.assertEqual(self.lexicon.lookup("record"), ("01", "10"))
+
+    def test_lookup_applies_pronunciation_overrides(self):
+        """
+        Words on the Pronunciation Override list should be compiled
+        with the override in place of CMUdict's stresses
+        """
+        self.assertEqual(self.lexicon.lookup("U.S."), ("10",))
+        self.assertEqual(self.lexicon.lookup("Laos"), ("1",))
+
+    def test_lookup_unknown_word_returns_none(self):
+        """
+        Words missing from the lexicon should return None
+        """
+        self.assertIsNone(self.lexicon.lookup("zzxqturtlez"))
+
+    def test_fallback_matches_compiled_lexicon(self):
+        """
+        The pronouncing fallback should agree with the compiled table
+        """
+        fallback = lexicon.PronouncingLexicon()
+        for word in ("Teenage", "record", "U.S.", "zzxqturtlez"):
+            self.assertEqual(fallback.lookup(word), self.lexicon.lookup(word))
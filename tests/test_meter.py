@@ -0,0 +1,89 @@
+import unittest
+import lib.meter as meter
+from lib.meter import DEAD, Meter, MeterSet
+
+
+class MeterTest(unittest.TestCase):
+    def test_tmnt_meter_matches_trochaic_tetrameter(self):
+        """
+        The TMNT meter should accept eight syllables of stressed,
+        unstressed pairs and nothing else
+        """
+        tmnt = Meter("1[02]1[02]1[02]1[02]")
+        self.assertTrue(tmnt.matches("12101010"))
+        self.assertFalse(tmnt.matches("1210101"))
+        self.assertFalse(tmnt.matches("121010101"))
+        self.assertFalse(tmnt.matches("11101010"))
+
+    def test_first_syllable_that_cannot_fit_is_rejected(self):
+        """
+        step() should return DEAD as soon as no match is reachable,
+        without needing the rest of the syllables
+        """
+        tmnt = Meter("1[02]1[02]1[02]1[02]")
+        self.assertEqual(tmnt.step(tmnt.start, "0"), DEAD)
+        self.assertEqual(tmnt.step(DEAD, "1"), DEAD)
+
+    def test_quantifiers_and_alternation(self):
+        """
+        Repeats, optional syllables and alternation should all compile
+        """
+        anapest = Meter("0?(001)+|1{2,3}")
+        for stresses in ("001", "0001001", "11", "111"):
+            self.assertTrue(anapest.matches(stresses), stresses)
+        for stresses in ("", "00", "1", "1111", "00011"):
+            self.assertFalse(anapest.matches(stresses), stresses)
+
+    def test_syllable_bounds(self):
+        """
+        Meters should know the fewest and most syllables a match has,
+        with no maximum for unbounded repeats
+        """
+        self.assertEqual(Meter("([02]1){5}").min_syllables, 10)
+        self.assertEqual(Meter("([02]1){5}").max_syllables, 10)
+        self.assertEqual(Meter("0?1[0-2]").min_syllables, 2)
+        self.assertEqual(Meter("0?1[0-2]").max_syllables, 3)
+        self.assertIsNone(Meter("(10)+").max_syllables)
+
+    def test_bad_pattern_raises_value_error(self):
+        """
+        Patterns using anything but stress digits should be refused
+        """
+        for pattern in ("1[a]", "(10", "10)", "1{3,2}", "x"):
+            with self.assertRaises(ValueError):
+                Meter(pattern)
+
+
+class MeterSetTest(unittest.TestCase):
+    def test_meter_set_reports_every_matching_meter(self):
+        """
+        A stress string fitting several meters should be reported for
+        all of them from one pass
+        """
+        meters = MeterSet({"tmnt": "1[02]1[02]1[02]1[02]",
+                           "eight": ".{8}",
+                           "iambic": "([02]1){4}"})
+        self.assertEqual(meters.matches("12101010"), {"tmnt", "eight"})
+        self.assertEqual(meters.matches("01010101"), {"eight", "iambic"})
+        self.assertEqual(meters.matches("0101"), set())
+
+    def test_meter_set_stays_alive_while_any_meter_can_match(self):
+        """
+        A syllable that rules out one meter but not another should not
+        reject the title
+        """
+        meters = MeterSet({"tmnt": "1[02]1[02]1[02]1[02]", "iambic": "([02]1){4}"})
+        state = meters.step(meters.start, "0")
+        self.assertNotEqual(state, DEAD)
+        self.assertEqual(meters.step(state, "0"), DEAD)
+
+    def test_register_meter_recompiles_registry(self):
+        """
+        Meters added with registerMeter() should be part of getMeters()
+        until they are removed again
+        """
+        meter.registerMeter("spondee", "11")
+        self.addCleanup(meter.unregisterMeter, "spondee")
+        self.assertIn("spondee", meter.getMeters().matches("11"))
+        with self.assertRaises(ValueError):
+            meter.registerMeter("broken", "1[")
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import unittest
+from lib import metrics
+from lib import words
+from lib.metrics import Metrics
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_counters_are_keyed_by_labels(self):
+        """
+        Counters with the same name but different labels should be separate
+        """
+        self.metrics.inc("titles_rejected_total", reason="oov")
+        self.metrics.inc("titles_rejected_total", reason="oov")
+        self.metrics.inc("titles_rejected_total", reason="banned")
+        counters = self.metrics.snapshot()["counters"]
+        self.assertEqual(counters['titles_rejected_total{reason="oov"}'], 2)
+        self.assertEqual(counters['titles_rejected_total{reason="banned"}'], 1)
+
+    def test_timed_records_a_histogram(self):
+        """
+        timed() should add one observation per with block to stage_seconds
+        """
+        for _ in range(3):
+            with self.metrics.timed("render"):
+                pass
+        histogram = self.metrics.snapshot()["histograms"][
+            'stage_seconds{stage="render"}']
+        self.assertEqual(histogram["count"], 3)
+        self.assertEqual(sum(histogram["buckets"].values()), 3)
+
+    def test_prometheus_buckets_are_cumulative(self):
+        """
+        The Prometheus export should have cumulative le buckets ending in a
+        +Inf bucket equal to the count
+        """
+        self.metrics.observe("stage_seconds", 0.005, stage="fetch")
+        self.metrics.observe("stage_seconds", 0.3, stage="fetch")
+        self.metrics.observe("stage_seconds", 100, stage="fetch")
+        text = self.metrics.toPrometheus()
+        self.assertIn("# TYPE tmnt_stage_seconds histogram", text)
+        self.assertIn('tmnt_stage_seconds_bucket{stage="fetch",le="0.01"} 1', text)
+        self.assertIn('tmnt_stage_seconds_bucket{stage="fetch",le="0.5"} 2', text)
+        self.assertIn('tmnt_stage_seconds_bucket{stage="fetch",le="+Inf"} 3', text)
+        self.assertIn('tmnt_stage_seconds_count{stage="fetch"} 3', text)
+
+    def test_recorded_ignores_empty_series(self):
+        """
+        recorded() should be False while series are only registered or
+        reset, and True once one counts something
+        """
+        counter = self.metrics.counter("titles_matched_total")
+        self.metrics.histogram("stage_seconds", stage="fetch")
+        self.assertFalse(self.metrics.recorded())
+        counter.inc()
+        self.assertTrue(self.metrics.recorded())
+        self.metrics.reset()
+        self.assertFalse(self.metrics.recorded())
+        self.metrics.observe("stage_seconds", 0.1, stage="fetch")
+        self.assertTrue(self.metrics.recorded())
+
+    def test_export_format_follows_extension(self):
+        """
+        export() should write a Prometheus textfile for .prom paths and
+        append JSON lines otherwise
+        """
+        self.metrics.inc("titles_matched_total")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prom_path = os.path.join(tmpdir, "tmnt.prom")
+            self.metrics.export(prom_path)
+            with open(prom_path) as f:
+                self.assertIn("tmnt_titles_matched_total 1", f.read())
+
+            jsonl_path = os.path.join(tmpdir, "tmnt.jsonl")
+            self.metrics.export(jsonl_path)
+            self.metrics.export(jsonl_path)
+            with open(jsonl_path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[0]["counters"]["titles_matched_total"], 1)
+
+
+class FunnelTest(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_is_tmnt_counts_rejection_reasons(self):
+        """
+        isTMNT() should count matches and each kind of rejection, and time
+        the ban filter, lookup and meter stages
+        """
+        words.isTMNT("Teenage Mutant Ninja Turtles")
+        words.isTMNT("Teenage Mutant Rugby Player")
+        words.isTMNT("Zxqvbnm Wikipedia")
+        words.isTMNT("Dog")
+        words.isTMNT("Adventure Time with Finn and Jake")
+        snapshot = metrics.snapshot()
+        counters = snapshot["counters"]
+        self.assertEqual(counters["titles_matched_total"], 1)
+        self.assertEqual(counters['titles_rejected_total{reason="banned"}'], 1)
+        self.assertEqual(counters['titles_rejected_total{reason="oov"}'], 1)
+        self.assertEqual(counters['titles_rejected_total{reason="length"}'], 1)
+        self.assertEqual(counters['titles_rejected_total{reason="pattern"}'], 1)
+        for stage in ("ban_filter", "stress_lookup", "meter_match"):
+            histogram = snapshot["histograms"][f'stage_seconds{{stage="{stage}"}}']
+            self.assertGreater(histogram["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+import lib.numerals as numerals
+import lib.words as words
+
+
+class NumeralStressesTest(unittest.TestCase):
+    def test_year_is_read_as_year(self):
+        """
+        A four digit number should be stressed as a year, nineteen
+        eighty-four, not one thousand nine hundred...
+        """
+        self.assertEqual(numerals.numeralStresses("1984")[0], "11101")
+
+    def test_hyphenated_numbers_are_not_oov(self):
+        """
+        Numbers num2words hyphenates, like twenty-one, should get stresses
+        rather than being rejected as unknown words
+        """
+        self.assertEqual(words.getWordStresses("21"), "101")
+        self.assertEqual(words.getWordStresses("21st"), "101")
+        self.assertNotEqual(words.matchTitle("21 Jump Street").reason, "oov")
+
+    def test_unreadable_numeral_is_oov(self):
+        """
+        A numeral that can't be read should be OOV without the discard
+        sentinel ever being looked up
+        """
+        self.addCleanup(numerals.numeralStresses.cache_clear)
+        with mock.patch("lib.lexicon.lookup", return_value=None) as lookup:
+            result = words.matchTitle("123456789 Zone")
+            self.assertEqual(numerals.numeralStresses("99th"), ())
+        self.assertEqual((result.reason, result.lookups), ("oov", 1))
+        looked_up = [call.args[0] for call in lookup.call_args_list]
+        self.assertNotIn("1111111111", looked_up)
+
+    def test_table_matches_fallback(self):
+        """
+        Precomputed table entries should equal what num2words gives for the
+        same numeral
+        """
+        table = numerals.buildTable(words.lexicon.lookup)
+        for token in ("0", "7", "99", "500", "1066", "1999", "2000", "2099",
+                      "1st", "12th", "23rd", "101st"):
+            self.assertEqual(
+                table[token], numerals.stressesFor(token, words.lexicon.lookup))
+        self.assertNotIn("2100", table)
+
+    def test_ordinal_suffixes(self):
+        """
+        ordinal() should use th for the teens and st, nd, rd otherwise
+        """
+        self.assertEqual([numerals.ordinal(n) for n in (1, 2, 3, 4, 11, 12,
+                                                       13, 21, 102, 111)],
+                         ["1st", "2nd", "3rd", "4th", "11th", "12th", "13th",
+                          "21st", "102nd", "111th"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import time
+import unittest
+import lib.publish as publish
+from tests.stubs import StubServer
+
+PNG = b"\x89PNG\r\n\x1a\nlogo"
+
+
+def twitterApi(delay=0.0):
+    def handler(method, path, query, body):
+        time.sleep(delay)
+        if path.endswith("/media/upload.json"):
+            assert PNG in body
+            return 200, {}, {"media_id_string": "m1"}
+        if path.endswith("/statuses/update.json"):
+            assert query["media_ids"] == "m1"
+            return 200, {}, {"id_str": "t1"}
+        return 404, {}, {}
+    return handler
+
+
+def mastodonApi(status=200):
+    def handler(method, path, query, body):
+        if path == "/api/v2/media":
+            assert PNG in body
+            return 202, {}, {"id": "m2"}
+        if path == "/api/v1/statuses":
+            return status, {}, {"id": 2}
+        return 404, {}, {}
+    return handler
+
+
+class PublishTest(unittest.TestCase):
+    def test_publish_posts_to_every_network(self):
+        """
+        publish() should upload the shared image and post the status to
+        both stub APIs, reporting each status id
+        """
+        with StubServer(twitterApi()) as tw, StubServer(mastodonApi()) as md:
+            publishers = [publish.TwitterPublisher(tw.url, tw.url),
+                          publish.MastodonPublisher(md.url, "token")]
+            results = publish.publish("Teenage Mutant Ninja Turtles", PNG, publishers)
+        self.assertEqual([(r.network, r.ok, r.status_id) for r in results],
+                         [("twitter", True, "t1"), ("mastodon", True, "2")])
+
+    def test_failing_network_does_not_abort_others(self):
+        """
+        A network returning errors should be reported as failed while the
+        other still posts
+        """
+        with StubServer(twitterApi()) as tw, StubServer(mastodonApi(500)) as md:
+            publishers = [publish.TwitterPublisher(tw.url, tw.url),
+                          publish.MastodonPublisher(md.url, "token")]
+            twitter, mastodon = publish.publish("Status", PNG, publishers)
+        self.assertTrue(twitter.ok)
+        self.assertFalse(mastodon.ok)
+        self.assertIn("500", mastodon.error)
+
+    def test_networks_post_concurrently(self):
+        """
+        Two slow networks should take about as long as one, not the sum
+        """
+        with StubServer(twitterApi(0.3)) as one, StubServer(twitterApi(0.3)) as two:
+            publishers = [publish.TwitterPublisher(one.url, one.url),
+                          publish.TwitterPublisher(two.url, two.url)]
+            start = time.perf_counter()
+            results = publish.publish("Status", PNG, publishers)
+            elapsed = time.perf_counter() - start
+        self.assertTrue(all(r.ok for r in results))
+        self.assertLess(elapsed, 1.1)
+        self.assertGreaterEqual(min(r.latency for r in results), 0.6)
+
+    def test_session_is_reused_across_posts(self):
+        """
+        A publisher should keep one authenticated session between posts
+        """
+        with StubServer(mastodonApi()) as md:
+            publisher = publish.MastodonPublisher(md.url, "token")
+            publish.publish("One", PNG, [publisher])
+            session = publisher.session
+            publish.publish("Two", PNG, [publisher])
+        self.assertIs(publisher.session, session)
+        self.assertEqual(session.headers["Authorization"], "Bearer token")
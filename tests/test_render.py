@@ -0,0 +1,43 @@
+import io
+import unittest
+from PIL import Image
+import lib.render as render
+
+
+class RenderLogoTest(unittest.TestCase):
+    def test_render_logo_returns_png_bytes(self):
+        """
+        renderLogo() should return PNG bytes in memory, no temp file
+        """
+        logo = render.renderLogo("Teenage Mutant Ninja Turtles")
+        self.assertTrue(logo.startswith(b"\x89PNG\r\n\x1a\n"))
+        image = Image.open(io.BytesIO(logo))
+        self.assertGreater(image.width, image.height)
+
+    def test_logo_has_white_border(self):
+        """
+        The trimmed logo should be padded with white on every side, like
+        `convert -border 15%x20%`
+        """
+        image = render.drawLogo("Teenage Mutant Ninja Turtles")
+        width, height = image.size
+        for xy in ((0, 0), (width - 1, height - 1),
+                   (int(width * 0.1), height // 2), (width // 2, int(height * 0.1))):
+            self.assertEqual(image.getpixel(xy), (255, 255, 255))
+
+    def test_logo_uses_logo_colours(self):
+        """
+        The banner red and turtle green should both appear in the logo
+        """
+        colours = {colour for _, colour in
+                   render.drawLogo("Teenage Mutant Ninja Turtles").getcolors(1 << 16)}
+        self.assertIn((255, 0, 0), colours)
+        self.assertIn((156, 203, 64), colours)
+
+    def test_padded_two_word_title_renders(self):
+        """
+        Padded short titles put their last word in the turtle font and
+        should render without error
+        """
+        image = render.drawLogo("  Two  Words")
+        self.assertGreater(image.width, 0)
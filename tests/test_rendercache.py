@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import lib.rendercache as rendercache
+
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = rendercache.RenderCache(self.tmpdir.name, max_bytes=1000)
+
+    def test_key_depends_on_title_and_options(self):
+        """
+        Different titles or encoder options should never share a key
+        """
+        key = self.cache.key("  Two  Words", palette=True)
+        self.assertEqual(key, self.cache.key("  Two  Words", palette=True))
+        self.assertNotEqual(key, self.cache.key("Two Words", palette=True))
+        self.assertNotEqual(key, self.cache.key("  Two  Words", palette=False))
+
+    def test_put_then_get(self):
+        """
+        Bytes stored under a title should come back from get()
+        """
+        self.assertIsNone(self.cache.get("  Two  Words"))
+        self.cache.put("  Two  Words", b"png")
+        self.assertEqual(self.cache.get("  Two  Words"), b"png")
+
+    def test_evict_removes_least_recently_used(self):
+        """
+        Once over max_bytes, the logo read least recently should go first
+        """
+        for i, title in enumerate(("a", "b", "c")):
+            self.cache.put(title, b"x" * 400)
+            path = self.cache._file(self.cache.key(title))
+            os.utime(path, (i, i))
+        self.cache.get("a")
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_render_batch_fills_cache(self):
+        """
+        renderBatch() should render uncached titles in worker processes
+        and skip ones already cached
+        """
+        cache = rendercache.RenderCache(self.tmpdir.name, max_bytes=10 ** 8)
+        titles = ["Two Words", "Teenage Mutant Ninja Turtles"]
+        self.assertEqual(rendercache.renderBatch(titles, cache, workers=2), (2, 0))
+        self.assertEqual(rendercache.renderBatch(titles, cache, workers=2), (0, 2))
+        logo = rendercache.getLogo("Two Words", cache)
+        self.assertTrue(logo.startswith(b"\x89PNG"))
@@ -0,0 +1,240 @@
+import random
+import unittest
+from unittest import mock
+import wikipedia
+import main
+from lib.retry import CircuitBreaker, CircuitOpenError, RetryError, RetryPolicy
+from tests.stubs import StubServer, faulty, mediaWikiRandom
+
+
+class FakeClock:
+    """Monotonic clock that sleep() advances instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def flaky(failures, error=ConnectionError):
+    """Return a function failing failures times, then returning 'ok'."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error("down")
+        return "ok"
+
+    fn.calls = calls
+    return fn
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.clock = FakeClock()
+
+    def policy(self, **kwargs):
+        options = dict(retry_on=(ConnectionError,), base=1, cap=8,
+                       max_attempts=10, max_elapsed=1000,
+                       sleep=self.clock.sleep, clock=self.clock)
+        options.update(kwargs)
+        return RetryPolicy(**options)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """
+        Backoff after n failures should be at most base * 2**(n-1), never
+        more than cap, and random
+        """
+        policy = self.policy()
+        for streak in range(1, 10):
+            delays = {policy.backoff(streak) for _ in range(20)}
+            self.assertTrue(all(0 <= d <= min(8, 2 ** (streak - 1)) for d in delays))
+            self.assertGreater(len(delays), 1)
+
+    def test_retries_until_success(self):
+        """
+        A call failing a few times should be retried, sleeping between
+        attempts, and return its result
+        """
+        fn = flaky(3)
+        self.assertEqual(self.policy().call(fn), "ok")
+        self.assertEqual((len(fn.calls), len(self.clock.sleeps)), (4, 3))
+
+    def test_attempt_budget(self):
+        """
+        Once the failed attempts budget is spent the policy should raise
+        RetryError from the last failure, and reset() should restore it
+        """
+        policy = self.policy(max_attempts=4)
+        self.assertEqual(policy.call(flaky(2)), "ok")
+        with self.assertRaises(RetryError) as cm:
+            policy.call(flaky(5))
+        self.assertIsInstance(cm.exception.__cause__, ConnectionError)
+        policy.reset()
+        self.assertEqual(policy.call(flaky(2)), "ok")
+
+    def test_success_clears_failure_streak(self):
+        """
+        Failures split up by successes should not add up to the attempt
+        budget, but a run of failures across calls should
+        """
+        policy = self.policy(max_attempts=3)
+        for _ in range(5):
+            self.assertEqual(policy.call(flaky(2)), "ok")
+        self.assertEqual(policy.failed_attempts, 10)
+
+        errors = [ConnectionError("down")] * 2 + [TypeError("bad reply")]
+
+        def outage():
+            raise errors.pop(0)
+
+        with self.assertRaises(TypeError):
+            policy.call(outage)
+        failing = flaky(100)
+        with self.assertRaises(RetryError):
+            policy.call(failing)
+        self.assertEqual(len(failing.calls), 1)
+
+    def test_time_budget_spans_the_run(self):
+        """
+        Seconds lost should add up over the run despite successes in
+        between, until reset()
+        """
+        policy = self.policy(max_elapsed=10, base=4, cap=4)
+        with mock.patch("random.uniform", return_value=4):
+            self.assertEqual(policy.call(flaky(2)), "ok")
+            policy.reset()
+            self.assertEqual(policy.call(flaky(2)), "ok")
+            with self.assertRaises(RetryError):
+                policy.call(flaky(1))
+        self.assertEqual(self.clock.sleeps, [4, 4, 4, 4])
+
+    def test_call_after_giving_up_tries_again(self):
+        """
+        A call after a RetryError should try the fetch again with a fresh
+        budget rather than failing straight away
+        """
+        policy = self.policy(max_attempts=2)
+        with self.assertRaises(RetryError):
+            policy.call(flaky(100))
+        retried = flaky(1)
+        self.assertEqual(policy.call(retried), "ok")
+        self.assertEqual(len(retried.calls), 2)
+
+    def test_time_budget(self):
+        """
+        The policy should give up rather than sleep past its time budget
+        """
+        policy = self.policy(max_elapsed=10, base=4, cap=4)
+        with self.assertRaises(RetryError):
+            policy.call(flaky(100))
+        self.assertLessEqual(sum(self.clock.sleeps), 10)
+
+    def test_other_errors_propagate(self):
+        """
+        Errors not in retry_on should not be retried
+        """
+        fn = flaky(1, error=TypeError)
+        with self.assertRaises(TypeError):
+            self.policy().call(fn)
+        self.assertEqual(len(fn.calls), 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60,
+                                      max_reset_timeout=200, clock=self.clock)
+
+    def test_opens_and_half_opens(self):
+        """
+        The breaker should open after failure_threshold failures, allow a
+        trial call after reset_timeout, and double its timeout if that fails
+        """
+        for _ in range(3):
+            self.breaker.recordFailure()
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now += 60
+        self.assertEqual(self.breaker.state, "half-open")
+        self.breaker.recordFailure()
+        self.assertEqual(self.breaker.retryAfter(), 120)
+        self.clock.now += 120
+        self.breaker.recordSuccess()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_policy_waits_out_open_breaker(self):
+        """
+        With the breaker open the policy should wait for the trial call
+        instead of hammering the API
+        """
+        policy = RetryPolicy(retry_on=(ConnectionError,), base=1, cap=1,
+                             max_elapsed=1000, breaker=self.breaker,
+                             sleep=self.clock.sleep, clock=self.clock)
+        fn = flaky(4)
+        self.assertEqual(policy.call(fn), "ok")
+        self.assertEqual(len(fn.calls), 5)
+        self.assertGreaterEqual(self.clock.now, 60 + 120)
+
+    def test_fails_fast_when_budget_cannot_cover_outage(self):
+        """
+        If the breaker stays open longer than the budget left, the policy
+        should give up at once rather than sleep
+        """
+        for _ in range(3):
+            self.breaker.recordFailure()
+        policy = RetryPolicy(retry_on=(ConnectionError,), max_elapsed=30,
+                             breaker=self.breaker, sleep=self.clock.sleep,
+                             clock=self.clock)
+        fn = flaky(0)
+        with self.assertRaises(RetryError) as cm:
+            policy.call(fn)
+        self.assertIsInstance(cm.exception.__cause__, CircuitOpenError)
+        self.assertEqual((fn.calls, self.clock.sleeps), ([], []))
+
+
+class FetchRetryTest(unittest.TestCase):
+    def test_fetch_resumes_after_faults(self):
+        """
+        fetchTenTitles() should ride out error pages and refused connections
+        from the API and return titles, without restarting the search
+        """
+        clock = FakeClock()
+        policy = RetryPolicy(retry_on=main.fetchErrors(), base=1, cap=4,
+                             breaker=CircuitBreaker(clock=clock),
+                             sleep=clock.sleep, clock=clock)
+        handler = faulty(mediaWikiRandom(["Teenage Mutant Ninja Turtles"]),
+                         [503, 502, 503])
+        with StubServer(handler) as stub, \
+                mock.patch.object(wikipedia.wikipedia, "API_URL", stub.url), \
+                mock.patch("main.main") as restart:
+            titles = main.fetchTenTitles(policy)
+        self.assertEqual(titles, ["Teenage Mutant Ninja Turtles"] * 10)
+        self.assertEqual(len(stub.requests), 4)
+        self.assertEqual(policy.failed_attempts, 3)
+        restart.assert_not_called()
+
+    def test_fetch_gives_up_after_budget(self):
+        """
+        A fetch that keeps failing should exit once its budget is spent
+        """
+        clock = FakeClock()
+        policy = RetryPolicy(retry_on=main.fetchErrors(), max_attempts=3,
+                             sleep=clock.sleep, clock=clock)
+        with StubServer(faulty(None, [503] * 10)) as stub, \
+                mock.patch.object(wikipedia.wikipedia, "API_URL", stub.url):
+            with self.assertRaises(SystemExit):
+                main.fetchTenTitles(policy)
+        self.assertEqual(len(stub.requests), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
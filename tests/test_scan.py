@@ -0,0 +1,43 @@
+import gzip
+import os
+import tempfile
+import unittest
+import lib.scan as scan
+
+
+class ScanTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_iter_titles_reads_gzipped_dump(self):
+        """
+        iterTitles() should skip the dump header and blank lines, and
+        swap dump underscores back to spaces
+        """
+        dump = self._path("all-titles-in-ns0.gz")
+        with gzip.open(dump, "wt", encoding="utf-8") as f:
+            f.write("page_title\nTeenage_Mutant_Ninja_Turtles\n\nTurtle\n")
+        self.assertEqual(list(scan.iterTitles(dump)),
+                         ["Teenage Mutant Ninja Turtles", "Turtle"])
+
+    def test_scan_titles_writes_matches(self):
+        """
+        scanTitles() should write only the titles in TMNT meter to the
+        output file, and count every title scanned
+        """
+        dump = self._path("titles.txt")
+        out = self._path("matches.txt")
+        with open(dump, "w", encoding="utf-8") as f:
+            f.write("Teenage Mutant Ninja Turtles\n"
+                    "Romeo, Romeo, wherefore art thou, Romeo?\n"
+                    "Single Payer Health Insurance\n")
+        scanned, found = scan.scanTitles(dump, out, workers=2, chunk_size=1)
+        self.assertEqual((scanned, found), (3, 2))
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual(f.read().split("\n")[:2],
+                             ["Teenage Mutant Ninja Turtles",
+                              "Single Payer Health Insurance"])
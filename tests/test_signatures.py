@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import lib.signatures as signatures
+from lib.signatures import SignatureIndex
+
+
+TITLES = [
+    "Teenage Mutant Ninja Turtles",
+    "Microsoft Transaction Server",
+    "Teenage Mutant Rugby Player",
+    "General relativity",
+    "Zxqvbnm Wikipedia",
+    "Dog",
+]
+
+
+class SignatureIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.index = SignatureIndex(os.path.join(self.tmpdir.name, "sig.db"))
+        self.addCleanup(self.index.close)
+        self.index.add(signatures.signatureRow(title) for title in TITLES)
+
+    def write(self, name, lines):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def test_rows_record_signature_and_reason(self):
+        """
+        Each title should be stored with its full signature, syllable count
+        and TMNT reject reason
+        """
+        self.assertEqual(self.index.get("Teenage Mutant Ninja Turtles"),
+                         ("12101010", 8, None))
+        self.assertEqual(self.index.get("Teenage Mutant Rugby Player"),
+                         ("12101010", 8, "banned"))
+        self.assertEqual(self.index.get("Zxqvbnm Wikipedia"), (None, None, "oov"))
+        self.assertEqual(self.index.get("Dog"), ("1", 1, "length"))
+
+    def test_meter_query_skips_banned(self):
+        """
+        A meter pattern query should return matching titles without those
+        the ban lists ban now
+        """
+        found = [title for title, _ in self.index.query("1[02]1[02]1[02]1[02]")]
+        self.assertEqual(sorted(found), ["Microsoft Transaction Server",
+                                         "Teenage Mutant Ninja Turtles"])
+
+    def test_ban_list_change_needs_no_rebuild(self):
+        """
+        Queries should apply the ban lists as they are when queried
+        """
+        with mock.patch("lib.words.containsBanned",
+                        side_effect=lambda title: "Microsoft" in title):
+            found = [t for t, _ in self.index.query("1[02]1[02]1[02]1[02]")]
+        self.assertIn("Teenage Mutant Rugby Player", found)
+        self.assertNotIn("Microsoft Transaction Server", found)
+
+    def test_regex_and_syllable_queries(self):
+        """
+        Regex queries should match whole signatures, optionally limited to
+        a syllable count
+        """
+        found = dict(self.index.query(r"1.*", regex=True, syllables=1))
+        self.assertEqual(found, {"Dog": "1"})
+        found = dict(self.index.query(r"10\d*", regex=True, skip_banned=False))
+        self.assertEqual(set(found), {"General relativity"})
+
+    def test_apply_updates(self):
+        """
+        applyUpdates() should add + lines and bare lines, and remove - lines,
+        leaving bare titles that start with a sign alone
+        """
+        path = self.write("changes.txt", [
+            "+\tSingle Payer Health Insurance",
+            "-\tDog",
+            "",
+            "Selma to Montgomery marches",
+            "+44 (band)",
+            "-ism",
+        ])
+        self.assertEqual(signatures.applyUpdates(self.index, path), (4, 1))
+        self.assertIsNone(self.index.get("Dog"))
+        self.assertIsNotNone(self.index.get("+44 (band)"))
+        self.assertIsNotNone(self.index.get("-ism"))
+        found = [title for title, _ in self.index.query("1[02]1[02]1[02]1[02]")]
+        self.assertIn("Single Payer Health Insurance", found)
+        self.assertEqual(len(self.index), len(TITLES) + 3)
+
+    def test_build_index_from_dump(self):
+        """
+        buildIndex() should index every title in a dump file
+        """
+        dump = self.write("dump.txt", ["page_title"] + [
+            title.replace(" ", "_") for title in TITLES])
+        index_path = os.path.join(self.tmpdir.name, "built.db")
+        self.assertEqual(signatures.buildIndex(dump, index_path, workers=2,
+                                               chunk_size=2), len(TITLES))
+        with SignatureIndex(index_path) as built:
+            self.assertEqual(built.reasons(), self.index.reasons())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import lib.sources as sources
+import main
+from lib import words
+
+BATCHES = [
+    ["General relativity", "Mercury"],
+    ["Teenage Mutant Ninja Turtles", "Microsoft Transaction Server"],
+    ["Two Words"],
+]
+
+
+class Clock:
+    def __init__(self, times=()):
+        self.now = 0.0
+        self.times = list(times)
+        self.slept = []
+
+    def __call__(self):
+        return self.times.pop(0) if self.times else self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
+
+
+class SourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "titles.tsv.gz")
+
+    def record(self, batches=BATCHES, times=(100.0, 100.2, 101.0, 101.5,
+                                            103.0, 103.1), **kwargs):
+        batches = iter(batches)
+        live = sources.LiveSource(lambda: next(batches))
+        with sources.Recorder(live, self.path, clock=Clock(times),
+                              **kwargs) as recorder:
+            for _ in range(3):
+                recorder()
+        return recorder
+
+    def test_record_and_replay(self):
+        """
+        A recording should replay the batches it recorded, in order, then
+        raise SourceExhausted
+        """
+        recorder = self.record()
+        self.assertEqual((recorder.batches, recorder.titles), (3, 5))
+        with sources.Replayer(self.path) as replayer:
+            self.assertEqual([replayer(), replayer(), replayer()], BATCHES)
+            with self.assertRaises(sources.SourceExhausted):
+                replayer()
+
+    def test_paced_replay(self):
+        """
+        Paced replay should hand batches over when they arrived in the
+        recording, counting time the caller spent towards the wait
+        """
+        self.record()
+        clock = Clock()
+        with sources.Replayer(self.path, paced=True, clock=clock,
+                              sleep=clock.sleep) as replayer:
+            replayer()
+            clock.now += 0.3
+            replayer()
+            replayer()
+        # Batches arrived 0.2s, 1.5s and 3.1s after the first fetch started.
+        self.assertEqual(clock.slept, [0.2, 1.0, 1.6])
+
+        clock = Clock()
+        with sources.Replayer(self.path, paced=True, speed=2, clock=clock,
+                              sleep=clock.sleep) as replayer:
+            replayer(), replayer(), replayer()
+        self.assertEqual(clock.slept, [0.1, 0.65, 0.8])
+
+    def test_loop_and_append(self):
+        """
+        An appended recording should hold both runs, and a looping replay
+        should start over at the end
+        """
+        self.record()
+        self.record(batches=[["Mercury"]] * 3, append=True)
+        with sources.Replayer(self.path, loop=True) as replayer:
+            batches = [replayer() for _ in range(8)]
+        self.assertEqual(batches, BATCHES + [["Mercury"]] * 3 + BATCHES[:2])
+
+    def test_search_over_replay(self):
+        """
+        searchForTMNT() should find a match in a replayed recording, and
+        exit once the recording runs out
+        """
+        self.record()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with sources.Replayer(self.path) as replayer:
+                title = main.searchForTMNT(10, 0, replayer, words.isTMNT)
+                self.assertEqual(title, "Teenage Mutant Ninja Turtles")
+                with self.assertRaises(SystemExit):
+                    main.searchForTMNT(10, 0, replayer, words.isTMNT)
+
+    def test_simulate_search(self):
+        """
+        simulateSearch() should count every replayed title and time each
+        match
+        """
+        self.record()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            result = main.simulateSearch(self.path)
+        self.assertEqual((result["titles"], result["matches"]), (5, 1))
+        self.assertEqual(len(result["match_seconds"]), 1)
+        self.assertIn("Replayed 5 titles in 3 batches", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+import lib.tokens as tokens
+import lib.words as words
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_matches_clean_str_on_ascii(self):
+        """
+        For plain ASCII titles the words should be cleanStr()'s, lowercased
+        """
+        for title in ("Teenage Mutant Ninja Turtles", "Hello ([world])",
+                      "{hello-world}", "St. John's Wood, London",
+                      "Selma to Montgomery marches: 1965"):
+            self.assertEqual(list(tokens.tokenize(title).words),
+                             words.cleanStr(title).lower().split())
+
+    def test_accents_are_folded(self):
+        """
+        Accented letters should be folded so the lexicon knows the words
+        """
+        tokenized = tokens.tokenize("Zürich Café Øresund Straße")
+        self.assertEqual(tokenized.words, ("zurich", "cafe", "oresund", "strasse"))
+        self.assertNotEqual(words.matchTitle(tokens.tokenize("Zürich Café")).reason,
+                            "oov")
+
+    def test_unicode_punctuation(self):
+        """
+        Curly apostrophes should become straight ones and dashes spaces
+        """
+        self.assertEqual(tokens.tokenize("Don’t Stop—Believin’ “Live”").words,
+                         ("don't", "stop", "believin'", "live"))
+        self.assertEqual(tokens.tokenize("Tom & Jerry").words,
+                         ("tom", "and", "jerry"))
+
+    def test_overridden_words_keep_their_punctuation(self):
+        """
+        Words on the Pronunciation Override list like 'U.S.' and 'vs.'
+        should reach the lexicon as written, so their override applies
+        """
+        self.assertEqual(tokens.tokenize("(U.S.) Route 66").words,
+                         ("u.s.", "route", "66"))
+        self.assertEqual(tokens.tokenize("Kramer vs. Kramer").words,
+                         ("kramer", "vs.", "kramer"))
+        self.assertEqual(tokens.tokenize("Mr. Smith").words, ("mr", "smith"))
+        self.assertEqual(words.getTitleStresses("Kramer vs. Kramer"), "101010")
+
+    def test_ban_filter_uses_tokens(self):
+        """
+        The ban filter should check folded words, including both halves of
+        hyphenated ones, and accept Tokens without tokenizing again
+        """
+        self.assertTrue(words.containsBanned("Neo-Nazi Party"))
+        self.assertTrue(words.containsBanned("Teenage Mutant RÂPE Player"))
+        tokenized = tokens.tokenize("Teenage Mutant Ninja Turtles")
+        with mock.patch("lib.tokens.tokenize") as tokenize:
+            self.assertFalse(words.containsBanned(tokenized))
+            self.assertTrue(words.isTMNT("Teenage Mutant Ninja Turtles"))
+        tokenize.assert_not_called()
+
+    def test_is_tmnt_tokenizes_once(self):
+        """
+        isTMNT() should tokenize a title once for both the ban filter and
+        the stress lookup
+        """
+        with mock.patch("lib.words.tokenize", wraps=tokens.tokenize) as tokenize:
+            self.assertTrue(words.isTMNT("Teenage Mutant Ninja Turtles"))
+        self.assertEqual(tokenize.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
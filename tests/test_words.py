@@ -28,6 +28,70 @@ class IsTMNTTest(unittest.TestCase):
         self.assertFalse(words.isTMNT(test_string))
 
 
+class MatchTitleTest(unittest.TestCase):
+    def test_match_title_matches_tmnt(self):
+        """
+        matchTitle() should match 'Teenage Mutant Ninja Turtles' after
+        looking up all four words
+        """
+        result = words.matchTitle("Teenage Mutant Ninja Turtles")
+        self.assertTrue(result.matched)
+        self.assertEqual(result.stresses, "12101010")
+        self.assertEqual((result.syllables, result.lookups), (8, 4))
+
+    def test_match_title_rejects_early(self):
+        """
+        A title whose first syllable can't fit should be rejected after
+        one lookup, leaving the rest of the words unread
+        """
+        result = words.matchTitle("Adventure Time with Finn and Jake")
+        self.assertFalse(result.matched)
+        self.assertEqual(result.reason, "pattern")
+        self.assertEqual((result.syllables, result.lookups, result.words),
+                         (1, 1, 6))
+
+    def test_match_title_tries_every_pronunciation(self):
+        """
+        'Record' is '01' in its first CMUdict pronunciation but '10' in
+        its second, which fits TMNT and should be reported as chosen
+        """
+        result = words.matchTitle("Record Label Record Label")
+        self.assertTrue(result.matched)
+        self.assertEqual(result.variants, ("10", "10", "10", "10"))
+
+    def test_match_title_rejects_long_title(self):
+        """
+        A title with too many syllables should be rejected for length
+        on its ninth syllable
+        """
+        result = words.matchTitle("Teenage Mutant Ninja Turtle Dinosaurs")
+        self.assertEqual(result.reason, "length")
+        self.assertEqual(result.syllables, 9)
+
+    def test_match_title_rejects_unknown_word(self):
+        """
+        A word missing from the lexicon should reject the title as
+        out-of-vocabulary
+        """
+        result = words.matchTitle("Xqzvbn Mutant Ninja Turtles")
+        self.assertEqual(result.reason, "oov")
+        self.assertEqual(result.lookups, 1)
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_classify_returns_matching_meters(self):
+        """
+        classify() should name each registered meter a title fits
+        """
+        self.assertEqual(words.classify("Teenage Mutant Ninja Turtles"), {"tmnt"})
+
+    def test_classify_banned_title_is_empty(self):
+        """
+        A banned title should fit no meters at all
+        """
+        self.assertEqual(words.classify("Teenage Mutant Nazi Turtles"), set())
+
+
 class ContainsBannedTest(unittest.TestCase):
     def test_banned_word_in_string(self):
         """